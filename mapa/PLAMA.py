@@ -4,20 +4,29 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import threading  # ← używane przez MapView
 from collections import deque
+from types import MappingProxyType
 from typing import Optional, List
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QGraphicsScene, QGraphicsView,
-    QGraphicsPixmapItem, QGraphicsItem, QMenu, QAction
+    QGraphicsPixmapItem, QGraphicsItem, QMenu, QAction, QMessageBox, QStyle
 )
-from PyQt5.QtCore import Qt, QRectF, QTimer, QPointF, QProcessEnvironment, QObject, QProcess, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtCore import Qt, QRectF, QSizeF, QTimer, QPointF, QProcessEnvironment, QObject, QProcess, QFileSystemWatcher, QThread, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QPixmap, QPen, QPainter, QCursor, QTransform
 from PyQt5.QtGui import QPixmap, QPen, QPainter, QCursor, QTransform, QColor
-from PyQt5.QtGui import QPainterPath  # ← DODANE dla LineItem
+from PyQt5.QtGui import QPainterPath, QPolygonF  # ← DODANE dla LineItem / LOD
 from PyQt5.QtWidgets import QGraphicsLineItem
 from PyQt5.QtCore import QPoint
 from PyQt5.QtGui import QBrush
 
+from indeks_xy import IndeksXY, zbuduj as zbuduj_indeks_xy
+from cache_ikon import CacheIkon
+from indeks_id import indeks_obiektow
+from status import PLIK_STATUSU, proces_z_tekstu, zapisz_atomowo
+from rejestr_opcji import RejestrOpcji
+from wtyczki_opcji import HostWtyczek
+import puls_mapy
+
 
 class Loger:
     COLORS = {"INFO": "\033[92m", "WARN": "\033[93m", "ERROR": "\033[91m", "RESET": "\033[0m",}
@@ -52,9 +61,62 @@ ZLO_MENAGER_PATH = HERE / "zlo_menager.py"
 ZLO_MENAGER_LOG  = HERE / "zlo_menager.log"
 
 # =========================
-# CACHE (Mapowanie Obiektów)
+# MODEL (w pamięci): SOURCE_CACHE[(folder_agenta, nr_wiersza)] → dane obiektu
+#                    LINE_SOURCE_CACHE[(folder_linii, plik)] → dane linii
+# Tożsamość = folder, NIE współrzędne. obraz.txt / polaczenie.txt to tylko eksport.
 # =========================
 SOURCE_CACHE = {}
+SOURCE_INDEX = IndeksXY()   # indeks przestrzenny nad SOURCE_CACHE (XY → element)
+XY_TOL = 0.51               # tolerancja na dryf zapisu/zaokrąglenia
+INDEKS_ID_OBIEKTOW = indeks_obiektow(BASE_DIR)   # id.txt → folder (wspólny z liniami i zlo)
+
+# =========================
+# IKONY: jedna pixmapa na plik (ścieżka + mtime + rozmiar), LRU z limitem pamięci
+# =========================
+try:
+    _IKONY_MB = float(os.environ.get("PLAMA_IKONY_MB", "128"))
+except ValueError:
+    _IKONY_MB = 128.0
+IKONY = CacheIkon(OBJECTS_DIR, ICONS_DIR, int(_IKONY_MB * 1024 * 1024))
+
+# =========================
+# TAPETA
+# =========================
+TAPETY_DIR = HERE / "tapety"
+TAPETY_NAZWY = ["tło.png", "tlo.png", "tło.jpg", "tlo.jpg", "background.png", "background.jpg"]
+TAPETY_PODGLAD_DIR = TAPETY_DIR / ".podglad"     # warianty przeskalowane do rozmiaru ekranu
+TAPETY_PODGLAD = os.environ.get("PLAMA_TAPETA_PODGLAD", "1").strip() != "0"
+
+# =========================
+# LOD: poniżej progu zoomu widoku obiekty = kropki statusu (klastry), linie = wsadowe ścieżki
+# =========================
+try:
+    LOD_PROG = float(os.environ.get("PLAMA_LOD_PROG", "0.05"))
+except ValueError:
+    LOD_PROG = 0.05
+LOD_KLASTER_PX = 12          # oczko siatki klastrów (px ekranu)
+
+KOLORY_PROCESU = {
+    "on": Qt.green,                 # zielony
+    "error": Qt.red,                # czerwony
+    "lag": QColor(255, 152, 0),     # pomarańcz
+    "old": QColor(144, 238, 144),   # jasna zieleń
+}
+# klaster pokazuje „najważniejszy” stan swoich obiektów
+PRIORYTET_PROCESU = {"error": 4, "lag": 3, "on": 2, "old": 1}
+
+
+def _lod_daleko(widget) -> bool:
+    """True, gdy element jest rysowany przez MapView w trybie dalekim (rysuje go drawForeground)."""
+    view = widget.parent() if widget is not None else None
+    return isinstance(view, MapView) and view.lod_daleko
+
+def read_id_file(path: Path) -> str:
+    """Czyta id.txt / L_id.txt (pusty string gdy brak lub błąd)."""
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").strip()
+    except Exception:
+        return ""
 
 # =========================
 # FUNKCJE DANYCH AGENTA (Source Data)
@@ -202,61 +264,133 @@ def parse_source_file(path: Path, lines: list, agent_folder: str = ""):
 
     return data_list
 
-def load_source_data():
-    """Wczytuje surowe dane ze WSZYSTKICH folderów agentów w obiekty/."""
-    global SOURCE_CACHE
-    SOURCE_CACHE = {}
-    
+def read_status(folder: Path):
+    """proces= z folder/status.txt (None, gdy pliku nie ma) — wygrywa z proces= z pliku danych."""
+    try:
+        tekst = (folder / PLIK_STATUSU).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    return proces_z_tekstu(tekst)
+
+def _load_agent_items(agent_folder: Path) -> list:
+    """Parsuje mapa_dane.txt jednego folderu agenta (pusta lista gdy brak pliku)."""
+    mapa_dane_file = agent_folder / "mapa_dane.txt"
+    if not mapa_dane_file.exists():
+        return []
+    try:
+        lines = mapa_dane_file.read_text(encoding="utf-8", errors="replace").splitlines()
+        source_items = parse_source_file(mapa_dane_file, lines, agent_folder.name)
+    except Exception as e:
+        log.error(f"Błąd odczytu pliku {mapa_dane_file}: {e}")
+        return []
+    obj_id = read_id_file(agent_folder / "id.txt")
+    stan = read_status(agent_folder)
+    for item in source_items:
+        item["id"] = obj_id
+        if stan is not None:
+            item["proces"] = stan
+    return source_items
+
+def read_all_agents() -> dict:
+    """I/O bez dotykania modelu: {folder_agenta: [elementy]} dla całego obiekty/."""
+    out = {}
     if not OBJECTS_DIR.exists():
         log.error(f"Folder obiektów nie istnieje: {OBJECTS_DIR}")
-        return []
-
-    final_data_list = []
-    
-    # Przeszukaj wszystkie foldery w obiekty/
+        return out
     for agent_folder in OBJECTS_DIR.iterdir():
-        if not agent_folder.is_dir():
+        if agent_folder.is_dir():
+            out[agent_folder.name] = _load_agent_items(agent_folder)
+    return out
+
+def read_agent(name: str) -> list:
+    agent_folder = OBJECTS_DIR / name
+    return _load_agent_items(agent_folder) if agent_folder.is_dir() else []
+
+def replace_source_model(agents: dict):
+    """Podmienia CAŁY model obiektów na gotowe dane (bez I/O)."""
+    global SOURCE_CACHE, SOURCE_INDEX
+    cache = {}
+    for name, items in agents.items():
+        for item in items:
+            cache[(name, item.get('line_no'))] = item
+    SOURCE_CACHE = cache
+    SOURCE_INDEX = zbuduj_indeks_xy(cache.values())
+    log.info(f"Załadowano dane z {len(cache)} obiektów z {len(agents)} agentów")
+
+# rodzaj zmiany z apply_agent / apply_line (pusty = brak zmian; niepusty → prawdziwy jak dawne True);
+# napisy rosną z wagą zmiany, więc max() wybiera silniejszą
+ZMIANA_BRAK = ""
+ZMIANA_STATUS = "status"   # zmieniło się tylko proces= → wystarczy kolor ramki
+ZMIANA_UKLAD = "uklad"
+
+def _rodzaj_zmiany(stare: list, nowe: list, i_proces: int) -> str:
+    if stare == nowe:
+        return ZMIANA_BRAK
+    bez = lambda lst: [t[:i_proces] + t[i_proces + 1:] for t in lst]
+    return ZMIANA_STATUS if bez(stare) == bez(nowe) else ZMIANA_UKLAD
+
+def apply_agent(name: str, new: list) -> str:
+    """Wstawia do modelu gotowe dane JEDNEGO agenta (bez I/O). Zwraca rodzaj zmiany (ZMIANA_*)."""
+    old = {k: v for k, v in SOURCE_CACHE.items() if k[0] == name}
+    for k, v in old.items():
+        del SOURCE_CACHE[k]
+        SOURCE_INDEX.usun(v, v.get('x'), v.get('y'))
+
+    for item in new:
+        SOURCE_CACHE[(name, item.get('line_no'))] = item
+        SOURCE_INDEX.dodaj(item.get('x', 0.0), item.get('y', 0.0), item)
+
+    def _stan(items):
+        return [(i.get('line_no'), i.get('x'), i.get('y'), i.get('ikona'), i.get('rozmiar'),
+                 i.get('proces'), i.get('id')) for i in items]
+    return _rodzaj_zmiany(_stan(old.values()), _stan(new), 5)
+
+def apply_agent_status(name: str, stan: str) -> list:
+    """
+    Sam status (status.txt) JEDNEGO agenta → model, bez ponownego parsowania mapa_dane.txt.
+    Zwraca klucze elementów, którym zmienił się proces (do odświeżenia samej ramki).
+    """
+    zmienione = []
+    for k, v in [(k, v) for k, v in SOURCE_CACHE.items() if k[0] == name]:
+        if v.get('proces') == stan:
             continue
-            
-        log.info(f"Ładuję dane z agenta: {agent_folder.name}")
-        
-        # SPRAWDŹ RÓŻNE MOŻLIWOŚCI:
-        data_paths = []
-        
-        # Opcja 1: Plik mapa_dane.txt bezpośrednio w folderze agenta
-        mapa_dane_file = agent_folder / "mapa_dane.txt"
-        if mapa_dane_file.exists():
-            data_paths.append(mapa_dane_file)
-            log.info(f"Znaleziono plik: {mapa_dane_file}")
-        
-        # Przetwórz znalezione pliki
-        for path in data_paths:
-            try:
-                lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-                source_items = parse_source_file(path, lines, agent_folder.name)
-                
-                for item in source_items:
-                    key = (item.get('ikona'), item.get('rozmiar'), item.get('proces'), 
-                           item.get('file'), item.get('line_no'), item.get('agent_folder'))
-                    SOURCE_CACHE[key] = item
-                    final_data_list.append(item)
-                    
-            except Exception as e:
-                log.error(f"Błąd odczytu pliku {path.name}: {e}")
-                
-    log.info(f"Załadowano dane z {len(final_data_list)} obiektów z {len(list(OBJECTS_DIR.iterdir()))} agentów")
-    return final_data_list
+        nowy = MappingProxyType(dict(v, proces=stan))
+        SOURCE_CACHE[k] = nowy
+        SOURCE_INDEX.usun(v, v.get('x'), v.get('y'))
+        SOURCE_INDEX.dodaj(nowy.get('x', 0.0), nowy.get('y', 0.0), nowy)
+        zmienione.append(k)
+    return zmienione
+
+def move_source_item(key, x: float, y: float, raw_line: str):
+    """Nowa pozycja JEDNEGO elementu w modelu (po zapisie z dragu) — bez przeładowania folderu."""
+    old = SOURCE_CACHE.get(key)
+    if old is None:
+        return None
+    new = MappingProxyType(dict(old, x=x, y=y, raw_line=raw_line))
+    SOURCE_CACHE[key] = new
+    SOURCE_INDEX.usun(old, old.get('x'), old.get('y'))
+    SOURCE_INDEX.dodaj(x, y, new)
+    return new
+
+def remove_source_item(key):
+    """Usuwa JEDEN element z modelu (po usunięciu z pliku przez mapę) — bez przeładowania folderu."""
+    old = SOURCE_CACHE.pop(key, None)
+    if old is not None:
+        SOURCE_INDEX.usun(old, old.get('x'), old.get('y'))
+    return old
 
 def write_obraz(source_data_list, output_path: Path = OBRAZ_PATH):
     """Generuje plik tekstowy obraz.txt (podsumowanie) z danych źródłowych."""
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
+        tmp_path = output_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
             for data in source_data_list:
                 x = int(round(data.get('x', 0))); y = int(round(data.get('y', 0)))
                 ikona = data.get('ikona', ''); rozmiar = data.get('rozmiar', '1')
                 proces = data.get('proces', '')
                 f.write(f"xy={x} {y}|ikona={ikona}|rozmiar={rozmiar}|proces={proces}\n")
+        os.replace(tmp_path, output_path)
         log.info(f"Zapisano podsumowanie do: {output_path}")
     except Exception as e:
         log.error(f"Nie udało się zapisać pliku {output_path}: {e}")
@@ -292,83 +426,170 @@ def parse_line_source_file(path: Path, lines: list, line_folder: str = ""):
         "file": str(path), "is_source_multi": True, "line_folder": line_folder
     }]
 
-def load_line_source_data():
-    """Wczytuje dane linii z /linie/*/linia_dane* (wiele plików na folder)."""
-    global LINE_SOURCE_CACHE
-    LINE_SOURCE_CACHE = {}
-    if not LINES_DIR.exists():
-        return []
-    out = []
-    for line_dir in LINES_DIR.iterdir():
-        if not line_dir.is_dir():
-            continue
+def read_ab(line_dir: Path):
+    """AB.txt linii → (id obiektu A, id obiektu B); puste napisy, gdy brak."""
+    a_id = b_id = ""
+    try:
+        for line in (line_dir / "AB.txt").read_text(encoding="utf-8", errors="replace").splitlines():
+            k, _, v = line.partition("=")
+            k = k.strip().lower()
+            if k == "obiekt_a":
+                a_id = v.strip()
+            elif k == "obiekt_b":
+                b_id = v.strip()
+    except OSError:
+        pass
+    return a_id, b_id
+
+def _load_line_items(line_dir: Path) -> list:
+    """Parsuje linia_dane* jednego folderu linii."""
+    try:
         # bierzemy wszystko co zaczyna się od 'linia_dane' (z lub bez rozszerzenia)
         cfg_list = sorted([
             p for p in line_dir.iterdir()
             if p.is_file() and p.name.lower().startswith("linia_dane")
         ], key=lambda p: p.name.lower())
+    except OSError:
+        return []
 
-        if not cfg_list:
+    out = []
+    l_id = read_id_file(line_dir / "L_id.txt") if cfg_list else ""
+    stan = read_status(line_dir) if cfg_list else None
+    a_id, b_id = read_ab(line_dir) if cfg_list else ("", "")
+    for cfg in cfg_list:
+        try:
+            lines = cfg.read_text(encoding="utf-8", errors="replace").splitlines()
+            for it in parse_line_source_file(cfg, lines, line_dir.name):
+                it["l_id"] = l_id
+                it["cfg"] = cfg.name
+                it["a_id"], it["b_id"] = a_id, b_id
+                if stan is not None:
+                    it["proces"] = stan
+                out.append(it)
+        except Exception as e:
+            log.warn(f"Linie: błąd odczytu {cfg}: {e}")
+    return out
+
+def read_all_lines() -> dict:
+    """I/O bez dotykania modelu: {folder_linii: [elementy]} dla całego linie/."""
+    out = {}
+    if not LINES_DIR.exists():
+        return out
+    for line_dir in LINES_DIR.iterdir():
+        if line_dir.is_dir():
+            out[line_dir.name] = _load_line_items(line_dir)
+    return out
+
+def read_line(name: str) -> list:
+    line_dir = LINES_DIR / name
+    return _load_line_items(line_dir) if line_dir.is_dir() else []
+
+def replace_line_model(lines: dict):
+    """Podmienia CAŁY model linii na gotowe dane (bez I/O)."""
+    global LINE_SOURCE_CACHE
+    LINE_SOURCE_CACHE = {(name, it["cfg"]): it for name, items in lines.items() for it in items}
+
+def apply_line(name: str, new: list) -> str:
+    """Wstawia do modelu gotowe dane JEDNEGO folderu linii (bez I/O). Zwraca rodzaj zmiany (ZMIANA_*)."""
+    old = {k: v for k, v in LINE_SOURCE_CACHE.items() if k[0] == name}
+    for k in old:
+        del LINE_SOURCE_CACHE[k]
+    for it in new:
+        LINE_SOURCE_CACHE[(name, it["cfg"])] = it
+
+    def _stan(items):
+        return [(i.get('cfg'), i.get('x1'), i.get('y1'), i.get('x2'), i.get('y2'),
+                 i.get('proces'), i.get('l_id'), i.get('a_id'), i.get('b_id')) for i in items]
+    return _rodzaj_zmiany(_stan(old.values()), _stan(new), 5)
+
+def apply_line_status(name: str, stan: str) -> list:
+    """Sam status (status.txt) JEDNEGO folderu linii → model. Zwraca klucze zmienionych linii."""
+    zmienione = []
+    for k, v in [(k, v) for k, v in LINE_SOURCE_CACHE.items() if k[0] == name]:
+        if v.get('proces') != stan:
+            LINE_SOURCE_CACHE[k] = MappingProxyType(dict(v, proces=stan))
+            zmienione.append(k)
+    return zmienione
+
+def lines_of_objects(ids) -> list:
+    """Klucze linii, których koniec A albo B (AB.txt) to jeden z obiektów o podanych id."""
+    ids = {i for i in ids if i}
+    return [k for k, v in LINE_SOURCE_CACHE.items() if v.get('a_id') in ids or v.get('b_id') in ids]
+
+def pozycje_obiektow(ids) -> dict:
+    """{id: (x, y)} z modelu dla obiektów o podanych id (folder z kilkoma elementami → pierwszy)."""
+    ids = {i for i in ids if i}
+    out = {}
+    for v in SOURCE_CACHE.values():
+        if v.get('id') in ids:
+            out.setdefault(v['id'], (v.get('x'), v.get('y')))
+    return out
+
+def update_line_ends_in_source(data, x1: float, y1: float, x2: float, y2: float) -> bool:
+    """
+    xy1 / xy2 w linia_dane.txt linii (atomowo; reszta pliku bez zmian, duplikaty kluczy znikają).
+    False = pliku linii nie ma; końce już zgodne → True bez zapisu.
+    """
+    path = Path(data.get('file') or '')
+    if not path.name or not path.is_file():
+        return False
+    tekst = path.read_text(encoding="utf-8", errors="replace")
+    lines = tekst.splitlines()
+    nowe = {"xy1": f"xy1={int(round(x1))} {int(round(y1))}", "xy2": f"xy2={int(round(x2))} {int(round(y2))}"}
+    out = []
+    for line in lines:
+        k = line.split("=", 1)[0].strip().lower() if "=" in line else ""
+        if k in nowe:
+            if nowe[k] is not None:
+                out.append(nowe[k])
+                nowe[k] = None
             continue
+        out.append(line)
+    out += [v for v in nowe.values() if v is not None]
+    if out != lines:
+        zapisz_atomowo(path, "\n".join(out) + "\n")
+    return True
+
+def move_line_item(key, x1: float, y1: float, x2: float, y2: float):
+    """Nowe końce JEDNEJ linii w modelu (po zapisie przez mapę) — bez przeładowania folderu."""
+    old = LINE_SOURCE_CACHE.get(key)
+    if old is None:
+        return None
+    new = MappingProxyType(dict(old, x1=x1, y1=y1, x2=x2, y2=y2))
+    LINE_SOURCE_CACHE[key] = new
+    return new
 
-        for cfg in cfg_list:
-            try:
-                lines = cfg.read_text(encoding="utf-8", errors="replace").splitlines()
-                items = parse_line_source_file(cfg, lines, line_dir.name)
-                for it in items:
-                    key = (it["x1"], it["y1"], it["x2"], it["y2"], it["proces"], it["line_folder"], cfg.name)
-                    LINE_SOURCE_CACHE[key] = it
-                    out.append(it)
-            except Exception as e:
-                log.warn(f"Linie: błąd odczytu {cfg}: {e}")
+def konce_linii(pozycje: dict) -> list:
+    """
+    Końce linii za obiektami: {id_obiektu: (x, y)} → [(klucz, data, x1, y1, x2, y2)] TYLKO dla linii,
+    które ich dotyczą (obiekt_A → xy1, obiekt_B → xy2) i których końce się różnią. Bez I/O.
+    """
+    out = []
+    for key in lines_of_objects(pozycje):
+        d = LINE_SOURCE_CACHE[key]
+        x1, y1 = pozycje.get(d.get('a_id'), (d.get('x1'), d.get('y1')))
+        x2, y2 = pozycje.get(d.get('b_id'), (d.get('x2'), d.get('y2')))
+        if (x1, y1, x2, y2) != (d.get('x1'), d.get('y1'), d.get('x2'), d.get('y2')):
+            out.append((key, d, float(x1), float(y1), float(x2), float(y2)))
     return out
 
 def write_polaczenie(line_source_list, output_path: Path = POLACZENIE_PATH):
     """Zapisuje podsumowanie linii (jak obraz.txt dla obiektów). Jedna linia = jedna linia na mapie."""
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
+        tmp_path = output_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
             for d in line_source_list:
                 x1, y1 = int(round(d.get("x1",0))), int(round(d.get("y1",0)))
                 x2, y2 = int(round(d.get("x2",0))), int(round(d.get("y2",0)))
                 proces = d.get("proces","")
-                f.write(f"xy1={x1} {y1}|xy2={x2} {y2}|proces={proces}\n")
+                linia = d.get("line_folder", ""); l_id = d.get("l_id", "")
+                f.write(f"xy1={x1} {y1}|xy2={x2} {y2}|proces={proces}|linia={linia}|L_id={l_id}\n")
+        os.replace(tmp_path, output_path)
         log.info(f"Zapisano polaczenie.txt → {output_path}")
     except Exception as e:
         log.error(f"Nie udało się zapisać {output_path}: {e}")
 
-def load_line_display_data(path: Path = POLACZENIE_PATH):
-    """Wczytuje dane do rysowania linii z polaczenie.txt."""
-    out = []
-    if not path.is_file():
-        return out
-    try:
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-        for raw in lines:
-            raw = raw.strip()
-            if not raw:
-                continue
-            parts = [p for p in raw.split('|') if p.strip()]
-            data = {}
-            for p in parts:
-                if '=' in p:
-                    k,v = p.split('=',1)
-                    data[k.strip().lower()] = v.strip()
-            def _xy(s):
-                ps = re.split(r'[\s,]+', (s or "0 0"))
-                x = float(ps[0]) if ps and ps[0] else 0.0
-                y = float(ps[1]) if len(ps)>1 and ps[1] else 0.0
-                return x, y
-            x1,y1 = _xy(data.get("xy1"))
-            x2,y2 = _xy(data.get("xy2"))
-            out.append({
-                "x1": x1, "y1": y1, "x2": x2, "y2": y2,
-                "proces": (data.get("proces","").lower())
-            })
-    except Exception as e:
-        log.error(f"Błąd odczytu polaczenie.txt: {e}")
-    return out
-
 class TempDragLineItem(QGraphicsLineItem):
     def __init__(self, x1, y1, x2, y2):
         super().__init__(x1, y1, x2, y2)
@@ -398,6 +619,27 @@ class LineItem(QGraphicsItem):
         self._path.moveTo(self._x1, self._y1)
         self._path.lineTo(self._x2, self._y2)
 
+    def set_data(self, data):
+        """Podmienia dane linii; geometria przebudowywana tylko gdy końce się ruszyły."""
+        x1 = float(data.get("x1",0)); y1 = float(data.get("y1",0))
+        x2 = float(data.get("x2",0)); y2 = float(data.get("y2",0))
+        old_proces = (self.data.get("proces","") or "").strip().lower()
+        self.data = data
+        if self.ustaw_konce(x1, y1, x2, y2):
+            return
+        if old_proces != (data.get("proces","") or "").strip().lower():
+            self.update()
+
+    def ustaw_konce(self, x1, y1, x2, y2) -> bool:
+        """Sama geometria (np. za przeciąganym obiektem, model bez zmian). True = końce się ruszyły."""
+        if (x1, y1, x2, y2) == (self._x1, self._y1, self._x2, self._y2):
+            return False
+        self.prepareGeometryChange()
+        self._x1, self._y1, self._x2, self._y2 = x1, y1, x2, y2
+        self._rebuild_path()
+        self.update()
+        return True
+
     def boundingRect(self):
         return self._path.boundingRect().adjusted(-8, -8, 8, 8)
 
@@ -414,6 +656,8 @@ class LineItem(QGraphicsItem):
         super().hoverLeaveEvent(event)
 
     def paint(self, painter: QPainter, option, widget=None):
+        if _lod_daleko(widget):
+            return  # daleki zoom → linie rysuje wsadowo MapView.drawForeground
         proces = (self.data.get("proces","") or "").strip().lower()
         hover = self.isUnderMouse()
 
@@ -465,9 +709,16 @@ def find_files_with_xy(target_x: float, target_y: float, target_agent: str = "")
                 log.error(f"Folder agenta nie istnieje: {agent_path}")
                 return []
         else:
-            # Jeśli nie znamy agenta, szukamy we wszystkich
-            search_paths = [agent_folder for agent_folder in OBJECTS_DIR.iterdir() 
-                          if agent_folder.is_dir()]
+            # Jeśli nie znamy agenta: najpierw kandydaci z indeksu XY (O(1)),
+            # pełny skan wszystkich folderów tylko gdy indeks nic nie zna
+            search_paths = []
+            for src in SOURCE_INDEX.w_poblizu(target_x, target_y, XY_TOL):
+                cand = OBJECTS_DIR / (src.get('agent_folder') or '')
+                if src.get('agent_folder') and cand.is_dir() and cand not in search_paths:
+                    search_paths.append(cand)
+            if not search_paths:
+                search_paths = [agent_folder for agent_folder in OBJECTS_DIR.iterdir() 
+                              if agent_folder.is_dir()]
 
         for agent_path in search_paths:
             # Sprawdź wszystkie możliwe lokalizacje plików
@@ -576,64 +827,138 @@ def update_xy_in_files(matching_files, new_x: float, new_y: float):
     
     return updated_count
 
-# =========================
-# FUNKCJA WCZYTUJĄCA DANE DO WIDOKU (z obraz.txt)
-# =========================
+def _xy_z_linii(line: str):
+    for part in line.split("|"):
+        k, _, v = part.partition("=")
+        if k.strip().lower() == "xy":
+            xy = v.replace(",", " ").split()
+            try:
+                return float(xy[0]), float(xy[1])
+            except (IndexError, ValueError):
+                return None
+    return None
+
+def _linia_elementu(lines: list, data):
+    """Indeks linii elementu single-line: line_no, a gdy plik się przesunął — linia z tym samym xy."""
+    old_xy = (float(data.get('x', 0)), float(data.get('y', 0)))
+    def _pasuje(i):
+        xy = _xy_z_linii(lines[i]) if 0 <= i < len(lines) else None
+        return xy is not None and abs(xy[0] - old_xy[0]) < 0.1 and abs(xy[1] - old_xy[1]) < 0.1
+    idx = int(data.get('line_no') or 1) - 1
+    if _pasuje(idx):
+        return idx
+    return next((i for i in range(len(lines)) if _pasuje(i)), None)
+
+def _podmien_xy(lines: list, data, new_x: float, new_y: float):
+    """Nowe xy elementu w liniach pliku (lista zmieniana w miejscu). Zwraca raw_line albo None."""
+    new_xy = f"xy={int(round(new_x))} {int(round(new_y))}"
+    if data.get('is_source_multi'):
+        # multi-line: jedna linia xy=... na plik
+        idx = next((i for i, l in enumerate(lines) if l.strip().lower().startswith("xy=")), None)
+        if idx is None:
+            lines.append(new_xy)
+        else:
+            lines[idx] = new_xy
+        return "\n".join(lines)
+    idx = _linia_elementu(lines, data)
+    if idx is None:
+        return None
+    lines[idx] = "|".join(new_xy if p.strip().lower().startswith("xy=") else p
+                          for p in lines[idx].split("|"))
+    return lines[idx]
 
-def load_display_data(path: Path = OBRAZ_PATH):
-    """Wczytuje dane do wyświetlenia z obraz.txt i łączy je z danymi źródłowymi po XY (z tolerancją)."""
-    display_data_list = []
-    if not path.is_file():
-        return []
+def update_xy_in_sources(zmiany: list) -> dict:
+    """
+    Zapis wielu pozycji naraz prosto do plików źródłowych (data['file'] / data['line_no']):
+    [(klucz, data, x, y)] → {klucz: raw_line}. Każdy mapa_dane.txt czytany i zapisywany (atomowo)
+    RAZ, niezależnie od liczby jego elementów w paczce; element, którego linii już nie ma, pomijany.
+    """
+    po_plikach = {}
+    for key, data, x, y in zmiany:
+        po_plikach.setdefault(data.get('file') or '', []).append((key, data, x, y))
+    out = {}
+    for plik, lista in po_plikach.items():
+        path = Path(plik)
+        if not path.name or not path.is_file():
+            continue
+        try:
+            tekst = path.read_text(encoding="utf-8", errors="replace")
+            lines = tekst.splitlines()
+            wynik = {key: _podmien_xy(lines, data, x, y) for key, data, x, y in lista}
+            wynik = {k: r for k, r in wynik.items() if r is not None}
+            if wynik:
+                zapisz_atomowo(path, "\n".join(lines) + ("\n" if tekst.endswith("\n") else ""))
+                out.update(wynik)
+                log.info(f"Zaktualizowano pozycję w: {path.parent.name}/{path.name}")
+        except Exception as e:
+            log.error(f"Błąd zapisu pozycji {path}: {e}")
+    return out
 
-    try:
-        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
-        data_from_obraz = parse_source_file(path, lines)
-
-        # tolerancja na dryf zapisu/zaokrąglenia
-        TOL = 0.51
-
-        for data in data_from_obraz:
-            x = float(data.get('x', 0.0))
-            y = float(data.get('y', 0.0))
-
-            source_data_match = None
-            best_dist = 1e9
-
-            # SZUKAJ PO XY w SOURCE_CACHE (to są dane z prawdziwych folderów)
-            for source_item in SOURCE_CACHE.values():
-                sx = float(source_item.get('x', 0.0))
-                sy = float(source_item.get('y', 0.0))
-                dx = abs(sx - x)
-                dy = abs(sy - y)
-                if dx <= TOL and dy <= TOL:
-                    # jeśli kilka w tolerancji — bierz najbliższy
-                    d = dx + dy
-                    if d < best_dist:
-                        best_dist = d
-                        source_data_match = source_item
-
-            if source_data_match:
-                data['original_source_data'] = source_data_match
-                data['agent_folder'] = source_data_match.get('agent_folder', '')
-                display_data_list.append(data)
+def remove_from_sources(elementy: list) -> list:
+    """
+    Usuwa obiekty z plików źródłowych: [(klucz, data)] → klucze faktycznie usuniętych.
+    multi-line → mapa_dane.txt kasowany (jak opcja usuń); single-line → linie elementów wycięte,
+    plik bez żadnego elementu kasowany. Jeden zapis na plik.
+    """
+    po_plikach = {}
+    for key, data in elementy:
+        po_plikach.setdefault(data.get('file') or '', []).append((key, data))
+    out = []
+    for plik, lista in po_plikach.items():
+        path = Path(plik)
+        if not path.name or not path.is_file():
+            continue
+        try:
+            if any(data.get('is_source_multi') for _, data in lista):
+                path.unlink()
+                out += [key for key, _ in lista]
+                continue
+            tekst = path.read_text(encoding="utf-8", errors="replace")
+            lines = tekst.splitlines()
+            trafione = {key: _linia_elementu(lines, data) for key, data in lista}
+            trafione = {k: i for k, i in trafione.items() if i is not None}
+            wyciete = set(trafione.values())
+            zostaja = [l for i, l in enumerate(lines) if i not in wyciete]
+            if not any(l.strip() for l in zostaja):
+                path.unlink()
             else:
-                # zostaw loga diagnostycznego — to pomoże gdy coś nie wejdzie w tolerancję
-                log.warn(f"Brak matcha po XY dla: x={x} y={y}")
-
-    except Exception as e:
-        log.error(f"Błąd odczytu obraz.txt: {e}")
-
-    return display_data_list
+                zapisz_atomowo(path, "\n".join(zostaja) + ("\n" if tekst.endswith("\n") else ""))
+            out += list(trafione)
+        except Exception as e:
+            log.error(f"Błąd usuwania z {path}: {e}")
+    return out
 
 # =========================
 # KLASY GUI I LOGIKA ZAPISU (Drag & Drop)
 # =========================
 
+_REJESTR_OPCJI = None
+
+
+def rejestr_opcji() -> RejestrOpcji:
+    """Wspólny rejestr opcji menu PPM (obiekty + tło mapy); powstaje przy pierwszym menu."""
+    global _REJESTR_OPCJI
+    if _REJESTR_OPCJI is None:
+        _REJESTR_OPCJI = RejestrOpcji(obserwuj=os.environ.get("PLAMA_POLLING", "").strip() != "1")
+    return _REJESTR_OPCJI
+
+
+_HOST_WTYCZEK = None
+
+
+def host_wtyczek() -> HostWtyczek:
+    """Opcje z otworz(kontekst) otwierane w procesie mapy (reszta dalej przez QProcess)."""
+    global _HOST_WTYCZEK
+    if _HOST_WTYCZEK is None:
+        _HOST_WTYCZEK = HostWtyczek()
+    return _HOST_WTYCZEK
+
+
 class MapItem(QGraphicsPixmapItem):
     """
     Ikona obiektu na mapie:
     - drag z aktualizacją XY w plikach (dwukierunkowa synchronizacja)
+    - zaznaczanie (gumka LP na tle, Ctrl+klik) → drag przesuwa całą grupę, zapis wspólną paczką
     - kolorowa ramka procesu (on/error)
     - PPM → menu opcji z <AGENT_DIR>/opcje/*
     """
@@ -644,9 +969,10 @@ class MapItem(QGraphicsPixmapItem):
         super().__init__(pixmap)
         self.data = data
         self.setFlag(QGraphicsItem.ItemIsMovable)
+        self.setFlag(QGraphicsItem.ItemIsSelectable)
         self.setZValue(1)
 
-        source_data = data.get('original_source_data', {}) or {}
+        source_data = data.get('original_source_data') or data
         self.original_x = data.get('x', 0)
         self.original_y = data.get('y', 0)
 
@@ -664,29 +990,40 @@ class MapItem(QGraphicsPixmapItem):
         # stan przytrzymania / drag
         self._press_state = {"lp": {"pos": None, "ts": None}, "pp": {"pos": None, "ts": None}}
         self._dragging = False
+        self._czeka_zapis = False   # drop czeka w paczce MainWindow (debounce przed zleceniem zapisu)
         self._snap_on_hover = True
         self._hover_target_item = None
         self._temp_line_start_item = None
     # === RYSOWANIE ===
+    def setPixmap(self, pixmap):
+        super().setPixmap(pixmap)
+        self._br = None
+
     def boundingRect(self):
-        br = super().boundingRect()
-        extra = 1.0
-        expanded = QRectF(br.x() - extra, br.y() - extra, br.width() + extra * 2, br.height() + extra * 2)
-        return br.united(expanded)
+        # wołane przez indeks sceny wiele razy na klatkę → liczone raz na pixmapę
+        br = getattr(self, "_br", None)
+        if br is None:
+            br = super().boundingRect()
+            extra = 1.0
+            expanded = QRectF(br.x() - extra, br.y() - extra, br.width() + extra * 2, br.height() + extra * 2)
+            br = self._br = br.united(expanded)
+        return br
 
     def paint(self, painter: QPainter, option, widget=None):
-        super().paint(painter, option, widget)
+        if _lod_daleko(widget):
+            return  # daleki zoom → kropka statusu w MapView.drawForeground
+        self._paint_pixmap(painter, option, widget)
+        if self.isSelected():
+            pen = QPen(QColor(0, 122, 255))
+            pen.setWidthF(2.0)
+            pen.setCosmetic(True)
+            pen.setStyle(Qt.DashLine)
+            painter.setPen(pen)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(super().boundingRect())
         proces = (self.data.get('proces', '') or '').strip().lower()
 
-        # mapa kolorów dla wszystkich stanów
-        color_map = {
-            "on": Qt.green,                 # zielony
-            "error": Qt.red,                # czerwony
-            "lag": QColor(255, 152, 0),     # pomarańcz
-            "old": QColor(144, 238, 144),   # jasna zieleń
-        }
-
-        color = color_map.get(proces)
+        color = KOLORY_PROCESU.get(proces)
         if not color:
             return  # brak obwódki dla pustych lub nieznanych stanów
 
@@ -699,6 +1036,19 @@ class MapItem(QGraphicsPixmapItem):
         rect = super().boundingRect().adjusted(25, 25, -25, -25)
         painter.drawEllipse(rect)
 
+    def _paint_pixmap(self, painter: QPainter, option, widget=None):
+        # przy oddaleniu: gotowy wariant z cache dla kubełka zoomu zamiast skalowania PNG co klatkę
+        t = painter.worldTransform()
+        skala = (t.m11() ** 2 + t.m12() ** 2) ** 0.5
+        wariant = IKONY.skalowana(getattr(self, "_ikona_klucz", None), skala)
+        if wariant is None:
+            option.state &= ~QStyle.State_Selected   # zaznaczenie rysuje paint() (tak samo w obu ścieżkach)
+            super().paint(painter, option, widget)
+            return
+        pix = self.pixmap()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        painter.drawPixmap(QRectF(self.offset(), QSizeF(pix.size())), wariant, QRectF(wariant.rect()))
+
     # === MENU OPCJI (PPM) ===
     def contextMenuEvent(self, event):
         # jeśli właśnie rysujemy gumkę po 2×PPM, to NIE pokazuj menu
@@ -752,7 +1102,9 @@ class MapItem(QGraphicsPixmapItem):
             menu.exec_(QCursor.pos())
 
     def _resolve_agent_dir_from_xy(self, x, y) -> Optional[Path]:
-        """Identyczna logika jak przy drag — szuka pliku z danym XY i zwraca folder obiektu."""
+        """Folder obiektu: znany z modelu, a gdy go brak — szukanie pliku z danym XY (stara logika dragu)."""
+        if self.agent_dir is not None and self.agent_dir.is_dir():
+            return self.agent_dir
         try:
             matches = find_files_with_xy(x, y, None)
             if not matches:
@@ -771,6 +1123,12 @@ class MapItem(QGraphicsPixmapItem):
             log.warn(f"Opcja '{opt_name}' nie ma gui.py ({gui_path})")
             return
 
+        kontekst = {"base_dir": self._base_dir, "objects_dir": self._objects_dir, "agent_dir": agent_dir,
+                    "x": int(round(float(self.original_x))), "y": int(round(float(self.original_y)))}
+        if host_wtyczek().uruchom(gui_path, kontekst):
+            log.info(f"Opcja {opt_name} (wtyczka) dla {agent_dir}")
+            return
+
         try:
             proc = QProcess()
             proc.setProgram(sys.executable)
@@ -785,21 +1143,14 @@ class MapItem(QGraphicsPixmapItem):
             log.error(f"Nie udało się uruchomić opcji '{opt_name}': {e}")
 
     def _load_options_from_agent(self, agent_dir: Optional[Path]):
-        """Czyta <agent_dir>/opcje/*, zwraca [(nazwa, ścieżka_do_gui.py|None)]."""
-        opts = []
+        """<agent_dir>/opcje/* z rejestru opcji (pamięć) → [(nazwa, ścieżka_do_gui.py|None)]."""
+        if not agent_dir:
+            return []
         try:
-            if not agent_dir or not agent_dir.exists():
-                return opts
-            opts_dir = agent_dir / "opcje"
-            if not opts_dir.exists():
-                return opts
-            for sub in sorted([p for p in opts_dir.iterdir() if p.is_dir()]):
-                name = sub.name
-                gui_py = sub / "gui.py"
-                opts.append((name, gui_py if gui_py.exists() else None))
+            return rejestr_opcji().opcje(agent_dir / "opcje")
         except Exception as e:
             log.error(f"Błąd ładowania opcji: {e}")
-        return opts
+            return []
 
     # === MYSZ / DRAG ===
     def mousePressEvent(self, event):
@@ -814,41 +1165,82 @@ class MapItem(QGraphicsPixmapItem):
                 MAIN_WINDOW_INSTANCE.dragging = True
         super().mousePressEvent(event)
 
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        # linie przypięte do przeciąganych obiektów idą za nimi na bieżąco (sama scena, zapis po dropie)
+        if self._dragging and MAIN_WINDOW_INSTANCE:
+            MAIN_WINDOW_INSTANCE.linie_za_obiektami(self._grupa())
+        # daleki zoom: obiekt nie rysuje się sam → kropka w warstwie LOD musi iść za kursorem
+        view = event.widget().parent() if event.widget() is not None else None
+        if isinstance(view, MapView) and view.lod_daleko:
+            view.uniewaznij_lod()
+
+    def _grupa(self) -> list:
+        """Ten obiekt + pozostałe zaznaczone (Qt przeciąga je razem)."""
+        return [self] + [i for i in (self.scene().selectedItems() if self.scene() else [])
+                         if isinstance(i, MapItem) and i is not self]
+
+    def _srodek(self):
+        """Środek ikony na scenie (to, co trafia do xy=) — z uwzględnieniem rozmiaru."""
+        pix = self.pixmap()
+        skala = self.scale() or 1.0
+        return (self.pos().x() + pix.width() * skala / 2.0,
+                self.pos().y() + pix.height() * skala / 2.0)
+
+    def _przesuniety(self) -> bool:
+        x, y = self._srodek()
+        try:
+            return abs(x - float(self.original_x)) >= 0.5 or abs(y - float(self.original_y)) >= 0.5
+        except (TypeError, ValueError):
+            return True
+
     def mouseReleaseEvent(self, event):
+        global MAIN_WINDOW_INSTANCE
         super().mouseReleaseEvent(event)
-        if event.button() == Qt.LeftButton:
-            x_center = self.pos().x() + self.pixmap().width() / 2.0
-            y_center = self.pos().y() + self.pixmap().height() / 2.0
-            matching_files = find_files_with_xy(self.original_x, self.original_y, None)
-            if not matching_files:
-                matching_files = find_files_with_xy(self.original_x, self.original_y, "")
-            if matching_files:
-                updated_count = update_xy_in_files(matching_files, x_center, y_center)
-                if updated_count > 0:
-                    log.info(f"Zaktualizowano {updated_count} plików")
-                    load_source_data()
-                    write_obraz(list(SOURCE_CACHE.values()))
-                    self.original_x, self.original_y = x_center, y_center
-                else:
-                    log.warn("Nie zaktualizowano żadnego pliku — linia z xy nieznaleziona?")
+        if event.button() != Qt.LeftButton:
+            return
+        self._dragging = False
+        # Qt przesuwa razem wszystkie zaznaczone → zapis dotyczy każdego, który faktycznie się ruszył
+        przesuniete = [i for i in self._grupa() if i._przesuniety()]
+        obsluzone = MAIN_WINDOW_INSTANCE.zglos_przesuniecie(przesuniete) if MAIN_WINDOW_INSTANCE else []
+        if self in przesuniete and self not in obsluzone:
+            self._zapisz_po_xy(*self._srodek())   # element spoza modelu → stara ścieżka (szukanie po xy)
+        if MAIN_WINDOW_INSTANCE:
+            MAIN_WINDOW_INSTANCE.koniec_przeciagania()
+            MAIN_WINDOW_INSTANCE.dragging = False
+            MAIN_WINDOW_INSTANCE.refresh()
+
+    def _zapisz_po_xy(self, x_center: float, y_center: float):
+        matching_files = find_files_with_xy(self.original_x, self.original_y, None)
+        if not matching_files:
+            matching_files = find_files_with_xy(self.original_x, self.original_y, "")
+        if matching_files:
+            updated_count = update_xy_in_files(matching_files, x_center, y_center)
+            if updated_count > 0:
+                log.info(f"Zaktualizowano {updated_count} plików")
+                if MAIN_WINDOW_INSTANCE:
+                    MAIN_WINDOW_INSTANCE.apply_source_changes({m['agent'] for m in matching_files}, set())
+                self.original_x, self.original_y = x_center, y_center
             else:
-                log.warn(f"Nie znaleziono plików z pozycją: ({self.original_x},{self.original_y})")
-            global MAIN_WINDOW_INSTANCE
-            if MAIN_WINDOW_INSTANCE:
-                MAIN_WINDOW_INSTANCE.dragging = False
-                MAIN_WINDOW_INSTANCE.refresh()
-            self._dragging = False
-        
+                log.warn("Nie zaktualizowano żadnego pliku — linia z xy nieznaleziona?")
+        else:
+            log.warn(f"Nie znaleziono plików z pozycją: ({self.original_x},{self.original_y})")
+
 class MapView(QGraphicsView):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._snap_on_hover = True
         self._hover_target_item = None
         self._temp_line_start_item = None
-        self.setDragMode(QGraphicsView.NoDrag)
+        # LP na tle → gumka zaznaczenia (obiekty ItemIsSelectable); PPM / ŚPM obsługiwane niżej
+        self.setDragMode(QGraphicsView.RubberBandDrag)
         self._panning = False
         self._pan_start = None
         self.setRenderHints(self.renderHints() | QPainter.Antialiasing | QPainter.SmoothPixmapTransform)
+        # repaint tylko zmienionych fragmentów; w trybie dalekim cały viewport (klastry zależą od wszystkich)
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.lod_daleko = False
+        self._lod_cache = None   # (zoom, linie, kropki, podpisy) — patrz _zbuduj_lod
         self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
         self.setBackgroundBrush(QBrush(Qt.NoBrush))
@@ -882,64 +1274,143 @@ class MapView(QGraphicsView):
         self._rpress_item_at_press = None
         self._drag_threshold_px = 6  # minimalny ruch, żeby uznać za „przeciąganie”
         self._pp_dragged = False  # czy był ruch PPM powyżej progu
+
+        self._init_tapeta()
         
+    # ====== TAPETA ======
+    def _init_tapeta(self):
+        self._bg_cache = None          # tapeta źródłowa (albo jej wariant z dysku)
+        self._bg_scaled = None         # ((szer, wys, klucz źródła), QPixmap) pod rozmiar viewportu
+        self._bg_path = None
+        self._bg_force_reload = True
+        self._bg_last_mtime = None
+        # zmiany tapety: powiadomienia zamiast stat() w każdej klatce
+        self._bg_watcher = QFileSystemWatcher(self)
+        if not TAPETY_DIR.exists() or self._bg_watcher.addPaths([str(TAPETY_DIR)]):
+            self._bg_watcher = None    # fallback: stat zmiana.txt przy rysowaniu (jak dawniej)
+            return
+        self._bg_watcher.directoryChanged.connect(self._on_tapeta_zmiana)
+        self._bg_watcher.fileChanged.connect(self._on_tapeta_zmiana)
+        self._obserwuj_pliki_tapety()
+
+    def _obserwuj_pliki_tapety(self):
+        if self._bg_watcher is None:
+            return
+        obecne = set(self._bg_watcher.files())
+        pliki = [TAPETY_DIR / "zmiana.txt"] + ([self._bg_path] if self._bg_path else [])
+        nowe = [str(p) for p in pliki if p.exists() and str(p) not in obecne]
+        if nowe:
+            self._bg_watcher.addPaths(nowe)
+
+    def _on_tapeta_zmiana(self, path: str):
+        # atomowy zapis zdejmuje obserwację pliku → dołóż ponownie
+        self._obserwuj_pliki_tapety()
+        self._bg_force_reload = True
+        self.viewport().update()
+
+    @staticmethod
+    def _znajdz_tapete() -> Optional[Path]:
+        for name in TAPETY_NAZWY:
+            p = TAPETY_DIR / name
+            if p.exists():
+                return p
+        return None
+
+    @staticmethod
+    def _rozmiar_ekranu():
+        """Największy ekran w pikselach urządzenia — większa tapeta to tylko koszt dekodowania."""
+        w = h = 0
+        for ekran in QApplication.screens():
+            g = ekran.geometry()
+            dpr = ekran.devicePixelRatio()
+            w, h = max(w, int(g.width() * dpr)), max(h, int(g.height() * dpr))
+        return w, h
+
+    def _wczytaj_tapete(self, bg_path: Path):
+        """
+        Tapeta przeskalowana raz do rozmiaru ekranu i zapisana w tapety/.podglad/.
+        Kolejne starty czytają mały wariant zamiast dekodować np. 4K. PLAMA_TAPETA_PODGLAD=0 wyłącza.
+        """
+        w, h = self._rozmiar_ekranu()
+        if not TAPETY_PODGLAD or w <= 0 or h <= 0:
+            pm = QPixmap(str(bg_path))
+            return None if pm.isNull() else pm
+        try:
+            st = bg_path.stat()
+        except OSError:
+            return None
+        prefiks = f"{bg_path.name}."
+        wariant = TAPETY_PODGLAD_DIR / f"{prefiks}{st.st_mtime_ns}.{st.st_size}.{w}x{h}.png"
+        if wariant.exists():
+            pm = QPixmap(str(wariant))
+            if not pm.isNull():
+                return pm
+
+        pm = QPixmap(str(bg_path))
+        if pm.isNull():
+            return None
+        if pm.width() <= w and pm.height() <= h:
+            return pm
+        pm = pm.scaled(w, h, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        try:
+            TAPETY_PODGLAD_DIR.mkdir(parents=True, exist_ok=True)
+            for stary in TAPETY_PODGLAD_DIR.iterdir():
+                if stary.name.startswith(prefiks):
+                    stary.unlink()
+            pm.save(str(wariant), "PNG")
+        except Exception as e:
+            print(f"[WARN] tapeta: wariant nie zapisany: {e}")
+        return pm
+
     def drawBackground(self, painter, rect):
         try:
             # ============================
-            # 🔥 HOT RELOAD zmiana.txt
+            # 🔥 HOT RELOAD zmiana.txt (bez watchera: stat co klatkę)
             # ============================
-            bg_watch = HERE / "tapety" / "zmiana.txt"
-            new_mtime = bg_watch.stat().st_mtime if bg_watch.exists() else None
-
-            if new_mtime != getattr(self, "_bg_last_mtime", None):
-                self._bg_last_mtime = new_mtime
-                self._bg_force_reload = True
+            if self._bg_watcher is None:
+                bg_watch = TAPETY_DIR / "zmiana.txt"
+                new_mtime = bg_watch.stat().st_mtime if bg_watch.exists() else None
+                if new_mtime != self._bg_last_mtime:
+                    self._bg_last_mtime = new_mtime
+                    self._bg_force_reload = True
 
             # ============================
-            # 🔥 ŁADOWANIE TAPETY
+            # 🔥 ŁADOWANIE TAPETY (tylko po zmianie)
             # ============================
-            if not hasattr(self, "_bg_cache") or getattr(self, "_bg_force_reload", True):
-
-                bg_dir = HERE / "tapety"
-                bg_path = None
-
-                for name in ["tło.png", "tlo.png", "tło.jpg", "tlo.jpg",
-                            "background.png", "background.jpg"]:
-                    p = bg_dir / name
-                    if p.exists():
-                        bg_path = p
-                        break
-
-                if bg_path:
-                    pm = QPixmap(str(bg_path))
-                    if not pm.isNull():
-                        self._bg_cache = pm
-
+            if self._bg_force_reload:
                 self._bg_force_reload = False
+                self._bg_path = self._znajdz_tapete()
+                self._obserwuj_pliki_tapety()
+                if self._bg_path:
+                    pm = self._wczytaj_tapete(self._bg_path)
+                    if pm is not None:
+                        self._bg_cache = pm
+                        self._bg_scaled = None
 
-            if not hasattr(self, "_bg_cache") or self._bg_cache is None:
+            if self._bg_cache is None:
                 return
 
-            pm = self._bg_cache
-
             # ============================
             # 🔥 KLUCZ: rysujemy względem VIEWPORT, nie SCENY
+            # skalowanie tylko przy zmianie rozmiaru viewportu / tapety
             # ============================
             view_w = self.viewport().width()
             view_h = self.viewport().height()
-
-            scaled = pm.scaled(
-                view_w,
-                view_h,
-                Qt.KeepAspectRatioByExpanding,
-                Qt.SmoothTransformation
-            )
+            klucz = (view_w, view_h, self._bg_cache.cacheKey())
+            if self._bg_scaled is None or self._bg_scaled[0] != klucz:
+                scaled = self._bg_cache.scaled(
+                    view_w,
+                    view_h,
+                    Qt.KeepAspectRatioByExpanding,
+                    Qt.SmoothTransformation
+                )
+                self._bg_scaled = (klucz, scaled)
 
             # Wyłącz transformacje sceny → tło jest SZTYWNE
             painter.resetTransform()
 
             # Rysujemy tapetę zawsze od (0,0) viewportu
-            painter.drawPixmap(0, 0, scaled)
+            painter.drawPixmap(0, 0, self._bg_scaled[1])
 
         except Exception as e:
             print(f"[WARN] drawBackground: {e}")
@@ -949,8 +1420,118 @@ class MapView(QGraphicsView):
         angle = event.angleDelta().y()
         factor = 1.0015 ** angle
         self.scale(factor, factor)
+        self._aktualizuj_lod()
         event.accept()
 
+    # ====== LOD ======
+    def _aktualizuj_lod(self):
+        daleko = self.transform().m11() < LOD_PROG
+        if daleko == self.lod_daleko:
+            return
+        self.lod_daleko = daleko
+        self.setViewportUpdateMode(
+            QGraphicsView.FullViewportUpdate if daleko else QGraphicsView.SmartViewportUpdate
+        )
+        self.viewport().update()
+
+    def drawForeground(self, painter, rect):
+        if not self.lod_daleko:
+            return
+        try:
+            self._rysuj_lod(painter)
+        except Exception as e:
+            print(f"[WARN] drawForeground: {e}")
+
+    def uniewaznij_lod(self):
+        """Scena się zmieniła → warstwa LOD zostanie zbudowana od nowa przy następnej klatce."""
+        self._lod_cache = None
+        if self.lod_daleko:
+            self.viewport().update()
+
+    def _zbuduj_lod(self, zoom: float):
+        """
+        Linie: jedna ścieżka na kolor. Klastry: punkty pogrupowane po (kolor, promień w px) →
+        jedno drawPoints grubym okrągłym piórem na grupę. Budowane raz na (zoom, zmianę sceny) —
+        pan i repaint tylko rysują gotowe wsady.
+        """
+        oczko = LOD_KLASTER_PX / zoom
+        linie = {}       # proces → QPainterPath
+        klastry = {}     # (kx, ky) → [suma_x, suma_y, ile, priorytet, proces]
+        for it in self.scene().items():
+            if isinstance(it, LineItem):
+                proces = (it.data.get("proces", "") or "").strip().lower()
+                path = linie.get(proces)
+                if path is None:
+                    path = linie[proces] = QPainterPath()
+                path.moveTo(it._x1, it._y1)
+                path.lineTo(it._x2, it._y2)
+            elif isinstance(it, MapItem):
+                if it._dragging:
+                    c = it.sceneBoundingRect().center()
+                    cx, cy = c.x(), c.y()
+                else:
+                    cx, cy = float(it.data.get('x', 0)), float(it.data.get('y', 0))
+                proces = (it.data.get("proces", "") or "").strip().lower()
+                prio = PRIORYTET_PROCESU.get(proces, 0)
+                k = (int(cx // oczko), int(cy // oczko))
+                kl = klastry.get(k)
+                if kl is None:
+                    klastry[k] = [cx, cy, 1, prio, proces]
+                else:
+                    kl[0] += cx; kl[1] += cy; kl[2] += 1
+                    if prio > kl[3]:
+                        kl[3], kl[4] = prio, proces
+
+        kropki = {}      # (proces, promień_px) → QPolygonF środków
+        podpisy = []     # (x, y, promień_px, ile) dla klastrów > 1
+        for sx, sy, ile, _, proces in klastry.values():
+            x, y = sx / ile, sy / ile
+            r = 3.0 + min(6, int((ile - 1) ** 0.5))
+            punkty = kropki.get((proces, r))
+            if punkty is None:
+                punkty = kropki[(proces, r)] = QPolygonF()
+            punkty.append(QPointF(x, y))
+            if ile > 1:
+                podpisy.append((x, y, r, ile))
+        return linie, kropki, podpisy
+
+    def _rysuj_lod(self, painter: QPainter):
+        """Daleki zoom: linie i kropki statusu jako kilka gotowych wsadów, podpisy tylko widocznych klastrów."""
+        zoom = self.transform().m11() or 1e-9
+        klucz = round(zoom, 9)
+        if self._lod_cache is None or self._lod_cache[0] != klucz:
+            self._lod_cache = (klucz,) + self._zbuduj_lod(zoom)
+        _, linie, kropki, podpisy = self._lod_cache
+
+        # linie: cienkie pióro kosmetyczne, bez antyaliasingu
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setBrush(Qt.NoBrush)
+        for proces, path in linie.items():
+            pen = QPen(KOLORY_PROCESU.get(proces, QColor(255, 255, 255)))
+            pen.setCosmetic(True)
+            pen.setWidthF(1.0 if proces in ("", "off", "none") else 2.0)
+            painter.setPen(pen)
+            painter.drawPath(path)
+
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        for (proces, r), punkty in kropki.items():
+            pen = QPen(KOLORY_PROCESU.get(proces, QColor(230, 230, 230)))
+            pen.setCosmetic(True)
+            pen.setWidthF(2 * r)
+            pen.setCapStyle(Qt.RoundCap)
+            painter.setPen(pen)
+            painter.drawPoints(punkty)
+
+        # liczności klastrów: tylko widoczne i tylko gdy jest ich niewiele
+        widoczne = self.mapToScene(self.viewport().rect()).boundingRect()
+        napisy = [p for p in podpisy if widoczne.contains(p[0], p[1])]
+        if napisy and len(napisy) <= 500:
+            painter.resetTransform()
+            painter.setPen(Qt.black)
+            for x, y, r, ile in napisy:
+                p = self.mapFromScene(QPointF(x, y))
+                painter.drawText(QRectF(p.x() + r, p.y() - r - 10, 60, 12), Qt.AlignLeft, str(ile))
+
     # ====== MYSZ ======
     def mousePressEvent(self, event):
         scene_pos = self.mapToScene(event.pos())
@@ -963,7 +1544,6 @@ class MapView(QGraphicsView):
             self._rpress_item_at_press = self.itemAt(event.pos())
 
             # rysować gumkę wolno TYLKO gdy start był na MapItem (obiekt)
-            from PyQt5.QtWidgets import QGraphicsItem
             self._rpress_can_draw_line = isinstance(self._rpress_item_at_press, MapItem)
 
             # log sensory (jak było)
@@ -1152,6 +1732,19 @@ class MapView(QGraphicsView):
 
         super().mouseReleaseEvent(event)
 
+    # ====== ZAZNACZENIE: Esc czyści, Delete usuwa zaznaczone obiekty (jedna paczka) ======
+    def keyPressEvent(self, event):
+        zaznaczone = [i for i in self.scene().selectedItems() if isinstance(i, MapItem)] if self.scene() else []
+        if zaznaczone and event.key() == Qt.Key_Escape:
+            self.scene().clearSelection()
+            event.accept()
+            return
+        if zaznaczone and event.key() == Qt.Key_Delete and MAIN_WINDOW_INSTANCE:
+            MAIN_WINDOW_INSTANCE.usun_obiekty(zaznaczone)
+            event.accept()
+            return
+        super().keyPressEvent(event)
+
 
     # ====== MENU OPCJI (PPM) ======
     def _show_context_menu(self, mouse_event, scene_pos: QPointF):
@@ -1181,17 +1774,13 @@ class MapView(QGraphicsView):
         menu.exec_(self.mapToGlobal(mouse_event.pos()))
 
     def _load_options(self):
-        opts = []
         try:
-            if not OPCJE_DIR.exists():
-                log.warn(f"Brak folderu opcji: {OPCJE_DIR}")
-                return opts
-            for sub in sorted([p for p in OPCJE_DIR.iterdir() if p.is_dir()]):
-                name = sub.name
-                gui_py = sub / "gui.py"
-                opts.append((name, gui_py if gui_py.exists() else None))
+            opts = rejestr_opcji().opcje(OPCJE_DIR)
         except Exception as e:
             log.error(f"Błąd ładowania opcji: {e}")
+            return []
+        if not opts and not OPCJE_DIR.exists():
+            log.warn(f"Brak folderu opcji: {OPCJE_DIR}")
         return opts
 
     def _run_option(self, opt_name: str, gui_path: Path, scene_pos: QPointF):
@@ -1203,6 +1792,10 @@ class MapView(QGraphicsView):
             log.warn(f"Opcja '{opt_name}' nie ma gui.py ({OPCJE_DIR/opt_name})")
             return
 
+        kontekst = {"base_dir": BASE_DIR, "objects_dir": OBJECTS_DIR, "agent_dir": None, "x": x, "y": y}
+        if host_wtyczek().uruchom(gui_path, kontekst):
+            return
+
         try:
             proc = QProcess(self)
             proc.setProgram(sys.executable)
@@ -1242,9 +1835,9 @@ class MapView(QGraphicsView):
         if not agent_dir:
             return ""
         try:
-            id_file = agent_dir / "id.txt"
-            if id_file.exists():
-                return (id_file.read_text(encoding="utf-8", errors="replace").strip() or "")
+            obj_id = INDEKS_ID_OBIEKTOW.id_folderu(agent_dir)
+            if obj_id:
+                return obj_id
         except Exception:
             pass
         return agent_dir.name if agent_dir else ""
@@ -1263,10 +1856,9 @@ class MapView(QGraphicsView):
         agent_dir = getattr(it, "agent_dir", None)
         if not agent_dir:
             return ""
-        from pathlib import Path
         p = agent_dir if isinstance(agent_dir, Path) else Path(agent_dir)
         try:
-            return (p.joinpath("id.txt").read_text(encoding="utf-8", errors="replace").strip() or "")
+            return INDEKS_ID_OBIEKTOW.id_folderu(p)
         except Exception:
             return ""
     def _start_temp_line(self, scene_pos: QPointF, start_item=None):
@@ -1401,7 +1993,409 @@ class MapView(QGraphicsView):
 
 HUGE = QRectF(-10_000_000, -10_000_000, 20_000_000, 20_000_000)
 
+# =========================
+# KANAŁ ZMIAN ŹRÓDEŁ (obiekty/* + linie/*)
+# =========================
+
+class ObserwatorZrodel(QObject):
+    """
+    Zgłasza, KTÓRE foldery obiektów / linii faktycznie się zmieniły.
+    - QFileSystemWatcher na obiekty/, linie/, każdym ich podfolderze i plikach danych
+    - zmiana = pojawienie się / zniknięcie folderu albo inna sygnatura (mtime, rozmiar)
+      mapa_dane.txt + ikona.png + id.txt (obiekt) lub linia_dane* + AB.txt + L_id.txt (linia) — szum
+      w log.txt itp. jest odsiewany
+    - sygnał zmiana(obiekty: set[str], linie: set[str]) po krótkim debounce
+    - status.txt ma własną sygnaturę: zmiana TYLKO statusu → sygnał zmiana_statusu(obiekty, linie)
+      (mapa przestawia kolor ramki, bez parsowania układu i bez unieważniania ikon)
+    - polling co 1 s TYLKO gdy powiadomienia nie działają albo PLAMA_POLLING=1
+    - zapisy samej mapy (wątek ładowacza): oczekuj() przed zleceniem, przyjmij(sygnatura po zapisie)
+      po wyniku — zdarzenia danych tych folderów w międzyczasie nie są zgłaszane
+    """
+    zmiana = pyqtSignal(object, object)
+    zmiana_statusu = pyqtSignal(object, object)
+
+    DEBOUNCE_MS = 50
+    POLLING_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sig = {"obj": {}, "lin": {}}
+        self._sig_st = {"obj": {}, "lin": {}}
+        self._czeka = {"obj": set(), "lin": set()}
+        self._czeka_st = {"obj": set(), "lin": set()}
+        self._wlasne = {"obj": {}, "lin": {}}   # folder → ile zapisów mapy w toku
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.timeout.connect(self._wyslij)
+
+        self._watcher = None
+        self._poll_timer = None
+        self.polling = os.environ.get("PLAMA_POLLING", "").strip() == "1"
+
+        self._sig, self._sig_st = self._skanuj_wszystko()
+
+        if not self.polling:
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._on_katalog)
+            self._watcher.fileChanged.connect(self._on_plik)
+            if not self._uzbroj():
+                log.warn("Obserwator: brak powiadomień systemu plików → polling")
+                self.polling = True
+
+        if self.polling:
+            self._poll_timer = QTimer(self)
+            self._poll_timer.timeout.connect(self._poll)
+            self._poll_timer.start(self.POLLING_MS)
+
+    # --- sygnatury ---
+    @staticmethod
+    def _sig_pliku(p: Path):
+        try:
+            st = p.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    @classmethod
+    def _sig_obiektu(cls, folder: Path):
+        dane = cls._sig_pliku(folder / "mapa_dane.txt")
+        if dane is None:
+            return None
+        # ikona.png też jest częścią wyglądu obiektu (cache ikon unieważniany po zgłoszeniu);
+        # id.txt bywa dopisany później (nadawanie id) — bez niego linie nie znajdą obiektu
+        return (dane, cls._sig_pliku(folder / "ikona.png"), cls._sig_pliku(folder / "id.txt"))
+
+    @staticmethod
+    def _sig_linii(folder: Path):
+        sig = []
+        try:
+            for f in folder.iterdir():
+                if (f.name.lower().startswith("linia_dane") or f.name in ("AB.txt", "L_id.txt")) and f.is_file():
+                    st = f.stat()
+                    sig.append((f.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            return None
+        return tuple(sorted(sig))
+
+    @staticmethod
+    def _baza(rodzaj: str) -> Path:
+        return OBJECTS_DIR if rodzaj == "obj" else LINES_DIR
+
+    @classmethod
+    def sygnatura(cls, rodzaj: str, folder: Path):
+        """Sygnatura danych folderu (bez stanu obserwatora → może ją policzyć wątek ładowacza)."""
+        return cls._sig_obiektu(folder) if rodzaj == "obj" else cls._sig_linii(folder)
+
+    def _sygnatura(self, rodzaj: str, folder: Path):
+        return self.sygnatura(rodzaj, folder)
+
+    def _skanuj(self, rodzaj: str):
+        out, statusy = {}, {}
+        baza = self._baza(rodzaj)
+        try:
+            if baza.exists():
+                for d in baza.iterdir():
+                    if d.is_dir():
+                        out[d.name] = self._sygnatura(rodzaj, d)
+                        statusy[d.name] = self._sig_pliku(d / PLIK_STATUSU)
+        except OSError:
+            pass
+        return out, statusy
+
+    def _skanuj_wszystko(self):
+        (obj, obj_st), (lin, lin_st) = self._skanuj("obj"), self._skanuj("lin")
+        return {"obj": obj, "lin": lin}, {"obj": obj_st, "lin": lin_st}
+
+    # --- watcher ---
+    def _pliki_danych(self, rodzaj: str, folder: Path):
+        if rodzaj == "obj":
+            return [f for f in (folder / "mapa_dane.txt", folder / "ikona.png", folder / "id.txt", folder / PLIK_STATUSU)
+                    if f.exists()]
+        try:
+            return [f for f in folder.iterdir()
+                    if f.is_file() and (f.name.lower().startswith("linia_dane") or f.name in (PLIK_STATUSU, "AB.txt", "L_id.txt"))]
+        except OSError:
+            return []
+
+    def _obserwuj_folder(self, rodzaj: str, folder: Path):
+        obecne = set(self._watcher.directories()) | set(self._watcher.files())
+        nowe = [str(p) for p in [folder] + self._pliki_danych(rodzaj, folder) if str(p) not in obecne]
+        if nowe:
+            self._watcher.addPaths(nowe)
+
+    def _uzbroj(self) -> bool:
+        bazy = [str(b) for b in (OBJECTS_DIR, LINES_DIR) if b.exists()]
+        if not bazy or self._watcher.addPaths(bazy):
+            return False  # addPaths zwraca listę ścieżek, których NIE udało się dodać
+        for rodzaj in ("obj", "lin"):
+            for nazwa in self._sig[rodzaj]:
+                self._obserwuj_folder(rodzaj, self._baza(rodzaj) / nazwa)
+        return True
+
+    def _rodzaj_i_nazwa(self, p: Path):
+        for rodzaj in ("obj", "lin"):
+            baza = self._baza(rodzaj)
+            if p == baza:
+                return rodzaj, None
+            if p.parent == baza:
+                return rodzaj, p.name
+            if p.parent.parent == baza:
+                return rodzaj, p.parent.name
+        return None, None
+
+    def _on_katalog(self, path: str):
+        rodzaj, nazwa = self._rodzaj_i_nazwa(Path(path))
+        if rodzaj is None:
+            return
+        if nazwa is None:
+            self._sprawdz_liste(rodzaj)
+        else:
+            self._sprawdz(rodzaj, nazwa)
+
+    def _on_plik(self, path: str):
+        rodzaj, nazwa = self._rodzaj_i_nazwa(Path(path))
+        if rodzaj is None or nazwa is None:
+            return
+        self._sprawdz(rodzaj, nazwa)
+
+    def _sprawdz_liste(self, rodzaj: str):
+        """Zmiana w obiekty/ albo linie/: nowe / usunięte podfoldery."""
+        baza = self._baza(rodzaj)
+        try:
+            teraz = {d.name for d in baza.iterdir() if d.is_dir()}
+        except OSError:
+            return
+        znane = self._sig[rodzaj]
+        for nazwa in set(znane) - teraz:
+            del znane[nazwa]
+            self._sig_st[rodzaj].pop(nazwa, None)
+            self._zglos(rodzaj, nazwa)
+        for nazwa in teraz - set(znane):
+            znane[nazwa] = self._sygnatura(rodzaj, baza / nazwa)
+            self._sig_st[rodzaj][nazwa] = self._sig_pliku(baza / nazwa / PLIK_STATUSU)
+            self._obserwuj_folder(rodzaj, baza / nazwa)
+            self._zglos(rodzaj, nazwa)
+
+    def _sprawdz(self, rodzaj: str, nazwa: str):
+        folder = self._baza(rodzaj) / nazwa
+        if not folder.is_dir():
+            self._sprawdz_liste(rodzaj)
+            return
+        # atomowy zapis (os.replace) zdejmuje obserwację pliku → dołóż ponownie
+        self._obserwuj_folder(rodzaj, folder)
+        nowy_status = self._sig_pliku(folder / PLIK_STATUSU)
+        nowa = self._sig[rodzaj].get(nazwa, ()) if nazwa in self._wlasne[rodzaj] else self._sygnatura(rodzaj, folder)
+        if self._sig[rodzaj].get(nazwa, ()) != nowa:
+            self._sig[rodzaj][nazwa] = nowa
+            self._sig_st[rodzaj][nazwa] = nowy_status   # pełne przeładowanie czyta też status.txt
+            self._zglos(rodzaj, nazwa)
+        elif self._sig_st[rodzaj].get(nazwa, ()) != nowy_status:
+            self._sig_st[rodzaj][nazwa] = nowy_status
+            self._zglos(rodzaj, nazwa, tylko_status=True)
+
+    def oczekuj(self, rodzaj: str, nazwy):
+        """Mapa zleciła zapis tych folderów → ich zmiany danych czekają na przyjmij(), nie na przeładowanie."""
+        for nazwa in nazwy:
+            self._wlasne[rodzaj][nazwa] = self._wlasne[rodzaj].get(nazwa, 0) + 1
+
+    def przyjmij(self, rodzaj: str, nazwa: str, sygnatura):
+        """Zapis mapy zakończony (model już aktualny) → sygnatura po zapisie BEZ zgłoszenia."""
+        ile = self._wlasne[rodzaj].get(nazwa, 0)
+        if ile > 1:
+            self._wlasne[rodzaj][nazwa] = ile - 1
+        else:
+            self._wlasne[rodzaj].pop(nazwa, None)
+        self._sig[rodzaj][nazwa] = sygnatura
+
+    def _zglos(self, rodzaj: str, nazwa: str, tylko_status: bool = False):
+        (self._czeka_st if tylko_status else self._czeka)[rodzaj].add(nazwa)
+        self._debounce.start(self.DEBOUNCE_MS)
+
+    def _wyslij(self):
+        obiekty, linie = self._czeka["obj"], self._czeka["lin"]
+        st_obiekty = self._czeka_st["obj"] - obiekty
+        st_linie = self._czeka_st["lin"] - linie
+        self._czeka = {"obj": set(), "lin": set()}
+        self._czeka_st = {"obj": set(), "lin": set()}
+        if obiekty or linie:
+            self.zmiana.emit(obiekty, linie)
+        if st_obiekty or st_linie:
+            self.zmiana_statusu.emit(st_obiekty, st_linie)
+
+    # --- fallback ---
+    def _poll(self):
+        nowe, nowe_st = self._skanuj_wszystko()
+        for rodzaj in ("obj", "lin"):
+            stare, stare_st = self._sig[rodzaj], self._sig_st[rodzaj]
+            for nazwa in self._wlasne[rodzaj]:
+                if nazwa in stare and nazwa in nowe[rodzaj]:
+                    nowe[rodzaj][nazwa] = stare[nazwa]   # zapis mapy w toku → czeka na przyjmij()
+            for nazwa in set(stare) | set(nowe[rodzaj]):
+                if stare.get(nazwa, ()) != nowe[rodzaj].get(nazwa, ()):
+                    self._czeka[rodzaj].add(nazwa)
+                elif stare_st.get(nazwa) != nowe_st[rodzaj].get(nazwa):
+                    self._czeka_st[rodzaj].add(nazwa)
+        self._sig, self._sig_st = nowe, nowe_st
+        self._wyslij()
+
+
+class Migawka:
+    """
+    Niezmienny wynik jednego przebiegu ładowacza: {folder: (dane, ...)} tylko do odczytu.
+    pelne_* = True → to CAŁY stan danego rodzaju (podmiana modelu), inaczej tylko podane foldery.
+    """
+    __slots__ = ("obiekty", "linie", "pelne_obiekty", "pelne_linie", "czas_ms")
+
+    def __init__(self, obiekty: dict, linie: dict, pelne_obiekty: bool, pelne_linie: bool, czas_ms: float):
+        def _zamroz(d):
+            return MappingProxyType({k: tuple(MappingProxyType(it) for it in v) for k, v in d.items()})
+        self.obiekty = _zamroz(obiekty)
+        self.linie = _zamroz(linie)
+        self.pelne_obiekty = pelne_obiekty
+        self.pelne_linie = pelne_linie
+        self.czas_ms = czas_ms
+
+
+class MigawkaStatusow:
+    """Wynik odczytu samych status.txt: {folder: proces albo None (pliku brak → pełne przeładowanie)}."""
+    __slots__ = ("obiekty", "linie")
+
+    def __init__(self, obiekty: dict, linie: dict):
+        self.obiekty = MappingProxyType(dict(obiekty))
+        self.linie = MappingProxyType(dict(linie))
+
+
+class MigawkaIkon:
+    """Wynik CacheIkon.sprawdz() z wątku ładowacza: nowa sygnatura ikony/ i nowe klucze nazw ikon."""
+    __slots__ = ("ikony_sig", "zmiany")
+
+    def __init__(self, ikony_sig, zmiany: dict):
+        self.ikony_sig = ikony_sig
+        self.zmiany = zmiany
+
+
+class ZlecenieZapisu:
+    """
+    Paczka zapisów mapy dla wątku ładowacza. Dane elementów są SPRZED zmiany (po nich szukana jest
+    linia w pliku): xy (klucz, data, x, y), usun (klucz, data), linie (klucz, data, x1, y1, x2, y2).
+    """
+    __slots__ = ("nr", "xy", "usun", "linie")
+
+    def __init__(self, nr: int, xy=(), usun=(), linie=()):
+        self.nr = nr
+        self.xy = tuple(xy)
+        self.usun = tuple(usun)
+        self.linie = tuple(linie)
+
+    def foldery(self) -> set:
+        return ({("obj", z[0][0]) for z in self.xy} | {("obj", z[0][0]) for z in self.usun}
+                | {("lin", z[0][0]) for z in self.linie})
+
+
+class WynikZapisu:
+    """Co się udało: xy {klucz: raw_line}, usuniete / linie (klucze), sygnatury folderów po zapisie."""
+    __slots__ = ("zlecenie", "xy", "usuniete", "linie", "sygnatury")
+
+    def __init__(self, zlecenie, xy: dict, usuniete: set, linie: set, sygnatury: dict):
+        self.zlecenie = zlecenie
+        self.xy = xy
+        self.usuniete = usuniete
+        self.linie = linie
+        self.sygnatury = sygnatury
+
+
+class LadowaczZrodel(QObject):
+    """
+    Całe I/O źródeł poza wątkiem GUI (żyje w QThread):
+    - wczytaj(obiekty, linie): parsuje podane foldery (None = wszystkie) → sygnał gotowe(Migawka)
+    - wczytaj_statusy(obiekty, linie): tylko status.txt podanych folderów → gotowe(MigawkaStatusow)
+    - eksportuj(obiekty, linie): zapisuje obraz.txt / polaczenie.txt (None = pomiń)
+    - zapisz(ZlecenieZapisu): przesunięcia / usunięcia z mapy i końce linii → zapisane(WynikZapisu)
+    - sprawdz_ikony(sygnatura, rozwiązania): stat ikon w użyciu → gotowe(MigawkaIkon), gdy coś się zmieniło
+    - puls(): odnawia puls mapy (zadania zlo wiedzą, że końce linii prowadzi mapa)
+    Model NIE jest tu dotykany — migawkę i wynik zapisu stosuje wątek GUI.
+    """
+    gotowe = pyqtSignal(object)
+    zapisane = pyqtSignal(object)
+
+    @pyqtSlot(object, object)
+    def wczytaj(self, obiekty, linie):
+        t0 = time.perf_counter()
+        obj, lin = {}, {}
+        try:
+            obj = read_all_agents() if obiekty is None else {n: read_agent(n) for n in obiekty}
+            lin = read_all_lines() if linie is None else {n: read_line(n) for n in linie}
+        except Exception as e:
+            log.error(f"Ładowacz: {e}")
+        self.gotowe.emit(Migawka(obj, lin, obiekty is None, linie is None,
+                                 (time.perf_counter() - t0) * 1000.0))
+
+    @pyqtSlot(object, object)
+    def wczytaj_statusy(self, obiekty, linie):
+        self.gotowe.emit(MigawkaStatusow(
+            {n: read_status(OBJECTS_DIR / n) for n in obiekty},
+            {n: read_status(LINES_DIR / n) for n in linie},
+        ))
+
+    @pyqtSlot(object, object)
+    def eksportuj(self, obiekty, linie):
+        if obiekty is not None:
+            write_obraz(obiekty)
+        if linie is not None:
+            write_polaczenie(linie)
+
+    @pyqtSlot(object)
+    def zapisz(self, z):
+        xy, usuniete, linie = {}, set(), set()
+        try:
+            if z.xy:
+                xy = update_xy_in_sources(list(z.xy))
+            if z.usun:
+                usuniete = set(remove_from_sources(list(z.usun)))
+        except Exception as e:
+            log.error(f"Zapis obiektów: {e}")
+        for key, data, x1, y1, x2, y2 in z.linie:
+            try:
+                if update_line_ends_in_source(data, x1, y1, x2, y2):
+                    linie.add(key)
+            except Exception as e:
+                log.error(f"Błąd zapisu końców linii {key[0]}: {e}")
+        sygnatury = {(rodzaj, nazwa): ObserwatorZrodel.sygnatura(rodzaj, ObserwatorZrodel._baza(rodzaj) / nazwa)
+                     for rodzaj, nazwa in z.foldery()}
+        self.zapisane.emit(WynikZapisu(z, xy, usuniete, linie, sygnatury))
+
+    @pyqtSlot(object, object)
+    def sprawdz_ikony(self, ikony_sig, rozwiazania):
+        try:
+            wynik = IKONY.sprawdz(ikony_sig, rozwiazania)
+        except Exception as e:
+            log.error(f"Sprawdzanie ikon: {e}")
+            return
+        if wynik is not None:
+            self.gotowe.emit(MigawkaIkon(*wynik))
+
+    @pyqtSlot()
+    def puls(self):
+        puls_mapy.odnow()
+
+
+# dropy zbierane do wspólnego zapisu przez tyle ms
+try:
+    _ZAPIS_MS = max(0, int(os.environ.get("PLAMA_ZAPIS_MS", "150")))
+except ValueError:
+    _ZAPIS_MS = 150
+
+
 class MainWindow(QMainWindow):
+    # zlecenia dla LadowaczZrodel (połączenia kolejkowane → wykonanie w jego wątku)
+    _zlec_wczytanie = pyqtSignal(object, object)
+    _zlec_statusy = pyqtSignal(object, object)
+    _zlec_eksport = pyqtSignal(object, object)
+    _zlec_zapis = pyqtSignal(object)
+    _zlec_puls = pyqtSignal()
+    _zlec_ikony = pyqtSignal(object, object)
+
     def refresh(self):
         # nie odświeżaj sceny, gdy aktywna „gumka” (PPM-drag)
         if getattr(self.view, "_temp_line_active", False):
@@ -1418,274 +2412,604 @@ class MainWindow(QMainWindow):
         self.view = getattr(self, 'view', MapView(self.scene))
         self.setCentralWidget(self.view)
         self.scene.setSceneRect(HUGE)
+        # elementy prawie statyczne (ruch tylko przy dragu) → indeks BSP do cullingu viewportu
+        self.scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
 
         # --- stan wewnętrzny do sterowania odświeżaniem ---
         self._bg_last_mtime = None
         self._bg_force_reload = True
         self._bg_cache = None
-        self._last_obraz_mtime = None
-        self._last_polaczenie_mtime = None  # ← DODANE: śledzenie linii
-        self._last_sources_sig = None
         self._dirty_display = False
         self.dragging = getattr(self, 'dragging', False)
 
-        # Priming: załaduj źródła i wygeneruj obraz.txt + polaczenie.txt na starcie
+        # rejestr elementów sceny: klucz modelu (folder obiektu / linii) → element
+        self._map_items = {}
+        self._line_items = {}
+
+        # eksport obraz.txt / polaczenie.txt: opcjonalny (PLAMA_EKSPORT=0 wyłącza), z debounce
+        self._eksport = os.environ.get("PLAMA_EKSPORT", "1").strip() != "0"
+        self._eksport_obraz = False
+        self._eksport_polaczenie = False
+        self._eksport_timer = QTimer(self)
+        self._eksport_timer.setSingleShot(True)
+        self._eksport_timer.timeout.connect(self._eksportuj)
+
+        # dropy (pojedyncze i grupowe) → jeden wspólny zapis plików po ZAPIS_PRZESUNIEC_MS
+        self._przesuniete = {}   # klucz modelu → (x, y) środka po dropie
+        self._zapis_timer = QTimer(self)
+        self._zapis_timer.setSingleShot(True)
+        self._zapis_timer.timeout.connect(self._zapisz_przesuniecia)
+        # zapisy plików robi wątek ładowacza; klucz → numer ostatniego zlecenia, które go zapisuje
+        self._nr_zapisu = 0
+        self._w_zapisie = {}
+        self._linie_w_zapisie = {}
+        # linie przypięte do przeciąganych obiektów: klucz linii → (element A | None, element B | None)
+        self._wiazania = None
+        self._linie_na_zywo = set()   # linie przesunięte na scenie, jeszcze nie z modelu
+
+        # --- ładowanie źródeł w osobnym wątku; GUI tylko stosuje gotowe migawki ---
+        self._wczytywanie_w_toku = False
+        self._czeka_obiekty = set()
+        self._czeka_linie = set()
+        self._czeka_pelne = False
+        self._migawki = deque()
+        # migawki częściowe → synchronizacja TYLKO tych folderów (bez przeglądania całej sceny)
+        self._do_sync_obiekty = set()
+        self._do_sync_linie = set()
+        self._watek_ladowacza = QThread(self)
+        self._ladowacz = LadowaczZrodel()
+        self._ladowacz.moveToThread(self._watek_ladowacza)
+        self._zlec_wczytanie.connect(self._ladowacz.wczytaj)
+        self._zlec_statusy.connect(self._ladowacz.wczytaj_statusy)
+        self._zlec_eksport.connect(self._ladowacz.eksportuj)
+        self._zlec_zapis.connect(self._ladowacz.zapisz)
+        self._ladowacz.zapisane.connect(self._on_zapisane)
+        self._zlec_puls.connect(self._ladowacz.puls)
+        self._zlec_ikony.connect(self._ladowacz.sprawdz_ikony)
+        self._ladowacz.gotowe.connect(self._on_migawka)
+        self._watek_ladowacza.start()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._zatrzymaj_ladowacz)
+
+        # Priming: załaduj model ze źródeł (eksport pójdzie z debounce)
         self._prime_sources_and_obraz()
 
-        # --- timery ---
-        # 1) wolny polling źródeł (I/O, ale lekki) – co 1s
-        self.sources_timer = QTimer(self)
-        self.sources_timer.timeout.connect(self._maybe_regenerate_obraz)
-        self.sources_timer.start(1000)
+        # puls mapy: „aktualizowanie liń” w zlo nie dubluje końców linii, póki mapa działa
+        self._zlec_puls.emit()
+        self._puls_timer = QTimer(self)
+        self._puls_timer.timeout.connect(self._zlec_puls.emit)
+        self._puls_timer.start(int(puls_mapy.PULS_S * 1000))
+
+        # ikony w użyciu (ikony/ i ikona.png): nadpisanie pliku w miejscu → nowa pixmapa
+        self._ikony_timer = QTimer(self)
+        self._ikony_timer.timeout.connect(lambda: self._zlec_ikony.emit(*IKONY.stan()))
+        self._ikony_timer.start(self.SPRAWDZ_IKONY_MS)
 
-        # 2) szybki repaint bez I/O – co ~0.33s
+        # --- zmiany źródeł: zdarzenia z systemu plików zamiast pollingu co 1 s ---
+        self.obserwator = ObserwatorZrodel(self)
+        self.obserwator.zmiana.connect(self._on_zmiana_zrodel)
+        self.obserwator.zmiana_statusu.connect(self._on_zmiana_statusu)
+
+        # --- timer ---
+        # szybki repaint bez I/O – co ~0.33s (tylko sprawdza flagę _dirty_display)
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.refresh)
         self.timer.start(333)
 
-        # startowy mtime obrazów i pierwsze odświeżenie
-        try:
-            self._last_obraz_mtime = OBRAZ_PATH.stat().st_mtime
-        except Exception:
-            self._last_obraz_mtime = None
-        try:
-            self._last_polaczenie_mtime = POLACZENIE_PATH.stat().st_mtime
-        except Exception:
-            self._last_polaczenie_mtime = None
-
         self._dirty_display = True
 
-    def _prime_sources_and_obraz(self):
-        try:
-            # obiekty → obraz.txt
-            load_source_data()
-            write_obraz(list(SOURCE_CACHE.values()))
-            # linie → polaczenie.txt
-            load_line_source_data()
-            write_polaczenie(list(LINE_SOURCE_CACHE.values()))
-
-            self._last_sources_sig = self._sources_signature()
-            try:
-                self._last_obraz_mtime = OBRAZ_PATH.stat().st_mtime
-            except Exception:
-                self._last_obraz_mtime = None
-            try:
-                self._last_polaczenie_mtime = POLACZENIE_PATH.stat().st_mtime
-            except Exception:
-                self._last_polaczenie_mtime = None
-
-            self._dirty_display = True
-        except Exception:
-            pass
-
-    # --- sygnatura źródeł: mtimes/rozmiary obiekty/*/mapa_dane.txt + linie/*/linia_dane.txt ---
-    def _sources_signature(self):
-        sig = []
-        try:
-            if OBJECTS_DIR and OBJECTS_DIR.exists():
-                for agent in OBJECTS_DIR.iterdir():
-                    if agent.is_dir():
-                        f = agent / 'mapa_dane.txt'
-                        if f.exists():
-                            st = f.stat()
-                            sig.append((str(f), st.st_mtime, st.st_size))
-            # --- DODANE: linie ---
-            if LINES_DIR and LINES_DIR.exists():
-                for ldir in LINES_DIR.iterdir():
-                    if ldir.is_dir():
-                        for f in ldir.iterdir():
-                            if f.is_file() and f.name.lower().startswith("linia_dane"):
-                                st = f.stat()
-                                sig.append((str(f), st.st_mtime, st.st_size))
-        except Exception:
-            # jednorazowe błędy I/O pomijamy – kolejny cykl spróbuje ponownie
-            pass
-        return tuple(sorted(sig))
+    EKSPORT_DEBOUNCE_MS = 500
+    SPRAWDZ_IKONY_MS = 2000
+    EKSPORT_STATUS_MS = 3000    # same zmiany proces= → obraz.txt rzadziej (przejścia łączone)
+    ZAPIS_PRZESUNIEC_MS = _ZAPIS_MS
 
-    # --- cykl I/O: regeneruj obraz.txt/polaczenie.txt TYLKO gdy faktycznie zmieniły się źródła ---
-    def _maybe_regenerate_obraz(self):
-        try:
-            sig = self._sources_signature()
-            if sig != self._last_sources_sig:
-                # zmiana w źródłach → przebuduj obraz.txt i polaczenie.txt
-                try:
-                    # gwarancja aktualnych danych
-                    load_source_data()
-                    write_obraz(list(SOURCE_CACHE.values()))
+    def _prime_sources_and_obraz(self):
+        self._czeka_pelne = True
+        self._wyslij_zlecenie()
 
-                    load_line_source_data()
-                    write_polaczenie(list(LINE_SOURCE_CACHE.values()))
-                except Exception:
-                    return  # nie blokujemy GUI
+    def _zatrzymaj_ladowacz(self):
+        self._watek_ladowacza.quit()
+        self._watek_ladowacza.wait(3000)
+        puls_mapy.usun()
 
-                self._last_sources_sig = sig
-                try:
-                    self._last_obraz_mtime = OBRAZ_PATH.stat().st_mtime
-                except Exception:
-                    self._last_obraz_mtime = None
-                try:
-                    self._last_polaczenie_mtime = POLACZENIE_PATH.stat().st_mtime
-                except Exception:
-                    self._last_polaczenie_mtime = None
+    # --- kolejka zleceń: jedno wczytanie naraz, kolejne zmiany się sumują ---
+    def _wyslij_zlecenie(self):
+        if self._wczytywanie_w_toku:
+            return
+        if self._czeka_pelne:
+            self._zlec_wczytanie.emit(None, None)
+        elif self._czeka_obiekty or self._czeka_linie:
+            self._zlec_wczytanie.emit(frozenset(self._czeka_obiekty), frozenset(self._czeka_linie))
+        else:
+            return
+        self._czeka_pelne = False
+        self._czeka_obiekty, self._czeka_linie = set(), set()
+        self._wczytywanie_w_toku = True
+
+    def _on_migawka(self, migawka):
+        if isinstance(migawka, MigawkaIkon):
+            if IKONY.zastosuj(migawka.ikony_sig, migawka.zmiany):
+                self._dirty_display = True   # diff sceny podmieni pixmapy obiektów z nowym kluczem
+            return
+        if isinstance(migawka, MigawkaStatusow):
+            # statusy idą poza kolejką wczytań (nie blokują jej), ale stosowane są w tej samej kolejności
+            self._migawki.append(migawka)
+            self._zastosuj_migawki()
+            return
+        self._wczytywanie_w_toku = False
+        self._migawki.append(migawka)
+        self._zastosuj_migawki()
+        self._wyslij_zlecenie()
 
-                self._dirty_display = True
-        except Exception:
-            pass
+    def _mozna_zastosowac(self) -> bool:
+        # drag obiektu albo „gumka” w toku → migawka czeka (refresh spróbuje ponownie)
+        return not getattr(self, 'dragging', False) and not getattr(self.view, "_temp_line_active", False)
 
-    # --- cykl GUI: szybki repaint bez ciężkiego I/O ---
+    def _zastosuj_migawki(self):
+        """
+        Stosuje zaległe migawki w kolejności przyjścia — wyłącznie w wątku GUI, bez I/O. Końce linii
+        za przesuniętymi obiektami idą do modelu, a ich zapis do wątku ładowacza (_linie_za_zmianami).
+        """
+        if not self._migawki or not self._mozna_zastosowac():
+            return
+        zm_obj = zm_lin = ZMIANA_BRAK
+        ruszone = set()   # id obiektów, za którymi mogą iść końce linii (None = wszystkie)
+        while self._migawki:
+            m = self._migawki.popleft()
+            if isinstance(m, MigawkaStatusow):
+                st_obj, st_lin = self._zastosuj_statusy(m)
+                if st_obj:
+                    zm_obj = max(zm_obj, ZMIANA_STATUS)
+                if st_lin:
+                    zm_lin = max(zm_lin, ZMIANA_STATUS)
+                continue
+            try:
+                if m.pelne_obiekty:
+                    replace_source_model(m.obiekty)
+                    zm_obj = ZMIANA_UKLAD
+                    self._dirty_display = True
+                    ruszone = None
+                else:
+                    for name, items in m.obiekty.items():
+                        zm_obj = max(zm_obj, apply_agent(name, list(items)))
+                        if ruszone is not None:
+                            ruszone.update(it.get('id') for it in items)
+                    # także bez zmiany danych: ikona.png mogła się zmienić
+                    self._do_sync_obiekty |= set(m.obiekty)
+                if m.pelne_linie:
+                    replace_line_model(m.linie)
+                    zm_lin = ZMIANA_UKLAD
+                    self._dirty_display = True
+                else:
+                    for name, items in m.linie.items():
+                        zm_lin = max(zm_lin, apply_line(name, list(items)))
+                        self._do_sync_linie.add(name)
+                        if ruszone is not None:
+                            for it in items:
+                                ruszone.update((it.get('a_id'), it.get('b_id')))
+            except Exception as e:
+                log.error(f"Migawka: {e}")
+        if ruszone is None or ruszone:
+            if self._linie_za_zmianami(ruszone):
+                zm_lin = ZMIANA_UKLAD
+        if zm_obj or zm_lin:
+            self._zaplanuj_eksport(bool(zm_obj), bool(zm_lin),
+                                   tylko_status=ZMIANA_UKLAD not in (zm_obj, zm_lin))
+
+    def _linie_za_zmianami(self, ids) -> list:
+        """
+        Końce linii za obiektami, które zmieniły się poza mapą (albo linie z nowym AB.txt): model od razu,
+        xy1 / xy2 zapisuje wątek ładowacza TYLKO tam, gdzie nie zgadzają się z obiektem.
+        ids=None → wszystkie obiekty. Obiekty z zapisem mapy w toku są pomijane: migawka czytana
+        przed zapisem mogła cofnąć ich xy w modelu (końce policzy _on_zapisane po przywróceniu).
+        """
+        if ids is None:
+            ids = {v.get('id') for v in SOURCE_CACHE.values()}
+        w_toku = {SOURCE_CACHE[k].get('id') for k in self._w_zapisie if k in SOURCE_CACHE}
+        linie = konce_linii(pozycje_obiektow(set(ids) - w_toku))
+        if not linie:
+            return []
+        for key, _d, x1, y1, x2, y2 in linie:
+            move_line_item(key, x1, y1, x2, y2)
+        self._zlec_zapisu(linie=linie)
+        self._do_sync_linie |= {k[0] for k, *_ in linie}
+        log.info(f"Końce linii za obiektami: {len(linie)}")
+        return linie
+
+    def _zastosuj_statusy(self, m) -> tuple:
+        """Sam proces= → model i kolor ramki zmienionych elementów; układ, ikony i indeks xy bez zmian."""
+        obj, lin = [], []
+        brak_obj = {n for n, stan in m.obiekty.items() if stan is None}
+        brak_lin = {n for n, stan in m.linie.items() if stan is None}
+        try:
+            for name, stan in m.obiekty.items():
+                if stan is not None:
+                    obj += apply_agent_status(name, stan)
+            for name, stan in m.linie.items():
+                if stan is not None:
+                    lin += apply_line_status(name, stan)
+            for key in obj:
+                if key in self._map_items:
+                    self._sync_item(key, SOURCE_CACHE[key])
+            for key in lin:
+                if key in self._line_items:
+                    self._sync_line(key, LINE_SOURCE_CACHE[key])
+        except Exception as e:
+            log.error(f"Statusy: {e}")
+        if obj or lin:
+            self.view.uniewaznij_lod()
+        if brak_obj or brak_lin:
+            # status.txt zniknął → obowiązuje znów proces= z pliku danych
+            self.apply_source_changes(brak_obj, brak_lin)
+        return obj, lin
+
+    # --- eksport migawek dla zewnętrznych czytelników (mapa ich NIE czyta) ---
+    def _zaplanuj_eksport(self, obiekty: bool, linie: bool, tylko_status: bool = False):
+        if not self._eksport:
+            return
+        self._eksport_obraz |= obiekty
+        self._eksport_polaczenie |= linie
+        if not tylko_status:
+            self._eksport_timer.start(self.EKSPORT_DEBOUNCE_MS)
+        elif not self._eksport_timer.isActive():
+            # seria przejść statusu nie przesuwa terminu → najwyżej jeden zapis na EKSPORT_STATUS_MS
+            self._eksport_timer.start(self.EKSPORT_STATUS_MS)
+
+    def _eksportuj(self):
+        # kopie list (elementy są tylko do odczytu) → zapis w wątku ładowacza
+        self._zlec_eksport.emit(
+            list(SOURCE_CACHE.values()) if self._eksport_obraz else None,
+            list(LINE_SOURCE_CACHE.values()) if self._eksport_polaczenie else None,
+        )
+        self._eksport_obraz = self._eksport_polaczenie = False
+
+    # --- zmiana źródeł zgłoszona przez ObserwatorZrodel ---
+    def _on_zmiana_zrodel(self, obiekty: set, linie: set):
+        log.info(f"Zmiana źródeł: obiekty={sorted(obiekty)} linie={sorted(linie)}")
+        self.apply_source_changes(obiekty, linie)
+
+    def _on_zmiana_statusu(self, obiekty: set, linie: set):
+        self._zlec_statusy.emit(frozenset(obiekty), frozenset(linie))
+
+    def apply_source_changes(self, obiekty: set, linie: set):
+        """Zleca przeładowanie TYLKO podanych folderów obiektów / linii (wynik przyjdzie jako migawka)."""
+        for name in obiekty:
+            # ikona.png mogła się pojawić / zmienić → rozwiąż ikonę tego obiektu od nowa
+            IKONY.uniewaznij_agenta(name)
+        self._czeka_obiekty |= set(obiekty)
+        self._czeka_linie |= set(linie)
+        self._wyslij_zlecenie()
+
+    # --- cykl GUI: szybki repaint bez I/O ---
     def refresh(self):
         if getattr(self, 'dragging', False):
             return
 
-        # jeśli obraz.txt/polaczenie.txt podmieniony przez inny proces – zaznacz brudny
-        try:
-            mtime_obraz = OBRAZ_PATH.stat().st_mtime
-        except Exception:
-            mtime_obraz = None
-        try:
-            mtime_pol = POLACZENIE_PATH.stat().st_mtime
-        except Exception:
-            mtime_pol = None
+        self._zastosuj_migawki()
 
-        if mtime_obraz != self._last_obraz_mtime or mtime_pol != self._last_polaczenie_mtime:
-            self._last_obraz_mtime = mtime_obraz
-            self._last_polaczenie_mtime = mtime_pol
-            self._dirty_display = True
+        if self._dirty_display:
+            self._render_scene()
+            self._dirty_display = False
+            self._do_sync_obiekty.clear()
+            self._do_sync_linie.clear()
+        elif self._do_sync_obiekty or self._do_sync_linie:
+            self._sync_foldery(self._do_sync_obiekty, self._do_sync_linie)
+            self._do_sync_obiekty = set()
+            self._do_sync_linie = set()
 
-        if not self._dirty_display:
-            return
-
-        self._render_scene()
-        self._dirty_display = False
-
-    # --- render: tylko rysowanie — ZERO ciężkiego I/O ---
+    # --- render: tylko rysowanie — ZERO I/O (poza ikonami nowych elementów) ---
     def _render_scene(self):
-        prev_transform = QTransform(self.view.transform())
-        self.scene.clear()
-
+        """Przyrostowa synchronizacja sceny z modelem: zmieniane są tylko elementy, których stan się różni."""
         # === LINIE ===
         try:
-            line_display = load_line_display_data()
-            self._build_lines_for_display(line_display)
-        except:
-            pass
+            self._sync_lines(LINE_SOURCE_CACHE)
+        except Exception as e:
+            log.error(f"Render linii: {e}")
 
         # === OBIEKTY ===
         try:
-            display_data_list = load_display_data()
-            self._build_items_for_display(display_data_list)
-        except:
-            pass
-
-        # === restore zoom/pos ===
-        try:
-            self.view.setTransform(prev_transform, combine=False)
-        except:
-            pass
+            self._sync_items(SOURCE_CACHE)
+        except Exception as e:
+            log.error(f"Render obiektów: {e}")
 
-    # --- nowa/uzupełniona metoda: buduje elementy sceny z listy danych (IKONY) ---
-    def _build_items_for_display(self, display_data_list):
-        if not display_data_list:
-            return
+        # warstwa LOD (daleki zoom) zbudowana na starych danych → do przebudowy
+        self.view.uniewaznij_lod()
 
-        for data in display_data_list:
-            try:
-                x = float(data.get('x', 0))
-                y = float(data.get('y', 0))
+    @staticmethod
+    def _item_state(data):
+        return (
+            round(float(data.get('x', 0)), 3), round(float(data.get('y', 0)), 3),
+            str(data.get('rozmiar', '1')),
+            data.get('agent_folder', ''), (data.get('ikona') or '').strip(),
+            (data.get('proces') or '').strip().lower(),
+            IKONY.klucz(data.get('ikona') or '', data.get('agent_folder', '')),
+        )
 
-                # priorytet: lokalna ikona.png z folderu obiektu
-                agent_folder = data.get("agent_folder", "")
-                local_icon = None
+    # --- obiekty: diff rejestru z modelem ---
+    def _sync_items(self, model: dict):
+        registry = self._map_items
 
-                if agent_folder:
-                    cand = OBJECTS_DIR / agent_folder / "ikona.png"
-                    if cand.exists():
-                        local_icon = QPixmap(str(cand))
+        for key, data in model.items():
+            self._sync_item(key, data)
 
-                # jak lokalna jest OK → użyj
-                if local_icon and not local_icon.isNull():
-                    pix = local_icon
-                else:
-                    # fallback → nazwa z obraz.txt / mapa_dane
-                    ikona = (data.get('ikona') or '').strip()
-                    pix = self._load_icon_pixmap(ikona)
-
-                scale = float(str(data.get('rozmiar', '1')).replace(',', '.')) or 1.0
-
-                # tworzymy MapItem
-                item = MapItem(
-                    pix,
-                    data,
-                    sensor_dir=getattr(self.view, '_sensor_dir', HERE / 'sensory'),
-                    sensor_lock=getattr(self.view, '_sensor_lock', threading.Lock()),
-                    sensor_write_fn=getattr(self.view, '_sensor_write', lambda *a, **k: None),
-                    base_dir=BASE_DIR,
-                    objects_dir=OBJECTS_DIR,
-                )
+        for key in set(registry) - set(model):
+            self._usun_element(registry, key)
 
-                item.setScale(scale)
-                w, h = pix.width() * scale, pix.height() * scale
-                item.setPos(x - w / 2.0, y - h / 2.0)
+    def _sync_item(self, key, data):
+        registry = self._map_items
+        try:
+            item = registry.get(key)
+            if item is None or item.scene() is not self.scene:
+                item = self._new_map_item(data)
+                registry[key] = item
                 self.scene.addItem(item)
-
-            except Exception:
+            else:
+                self._update_map_item(item, data)
+        except Exception as e:
+            log.warn(f"Obiekt {key}: {e}")
+
+    def _usun_element(self, registry: dict, key):
+        item = registry.pop(key)
+        if item.scene() is self.scene:
+            self.scene.removeItem(item)
+
+    # --- przesunięcia / usuwanie z mapy: paczka zapisów + jedna aktualizacja sceny ---
+    def zglos_przesuniecie(self, items) -> list:
+        """Dropy do wspólnego zapisu (debounce). Zwraca elementy przyjęte (te z modelu)."""
+        przyjete = []
+        for item in items:
+            key = (item.data.get('agent_folder', ''), item.data.get('line_no'))
+            data = SOURCE_CACHE.get(key)
+            if data is None or data.get('file') != item.data.get('file'):
                 continue
-
-    # --- NOWE: budowanie elementów sceny dla linii (LineItem) ---
-    def _build_lines_for_display(self, line_display):
-        if not line_display:
+            self._przesuniete[key] = item._srodek()
+            item._czeka_zapis = True
+            przyjete.append(item)
+        if przyjete:
+            self._zapis_timer.start(self.ZAPIS_PRZESUNIEC_MS)
+        return przyjete
+
+    def _zapisz_przesuniecia(self):
+        """
+        Paczka dropów: model (obiekty + końce linii dotykających ich przez AB.txt) podmieniony w miejscu,
+        jedna aktualizacja sceny i jeden eksport; pliki zapisuje wątek ładowacza (_on_zapisane).
+        """
+        zmiany, self._przesuniete = self._przesuniete, {}
+        if not zmiany:
             return
-        for d in line_display:
-            try:
-                item = LineItem(d)
-                # linie są pod ikonami
-                item.setZValue(0)
-                self.scene.addItem(item)
-            except Exception:
+        xy, pozycje = [], {}
+        for key, (x, y) in zmiany.items():
+            data = SOURCE_CACHE.get(key)
+            if data is None:
                 continue
-
-    def _load_icon_pixmap(self, ikona: str, agent_folder: str = "") -> QPixmap:
+            x, y = float(int(round(x))), float(int(round(y)))
+            xy.append((key, data, x, y))
+            new = move_source_item(key, x, y, data.get('raw_line'))
+            if new.get('id'):
+                pozycje.setdefault(new['id'], (x, y))
+        linie = konce_linii(pozycje)
+        for key, _d, x1, y1, x2, y2 in linie:
+            move_line_item(key, x1, y1, x2, y2)
+        self._zlec_zapisu(xy=xy, linie=linie)
+
+        for key in zmiany:
+            item = self._map_items.get(key)
+            data = SOURCE_CACHE.get(key)
+            if item is None or data is None:
+                continue
+            item._czeka_zapis = False   # dalej chroni go _w_zapisie (do wyniku zapisu)
+            self._update_map_item(item, data)
+        self._przywroc_linie()   # przesunięte na żywo → geometria z modelu (nowa albo sprzed dropu)
+        for key, *_ in linie:
+            self._sync_line(key, LINE_SOURCE_CACHE[key])
+        self.view.uniewaznij_lod()
+        self._zaplanuj_eksport(True, bool(linie))
+        log.info(f"Przesunięto {len(xy)} obiektów, linie: {len(linie)}")
+
+    def _zlec_zapisu(self, xy=(), usun=(), linie=()) -> int:
+        """Zapis plików w wątku ładowacza; obserwator uprzedzony, że te foldery zmienia sama mapa."""
+        self._nr_zapisu += 1
+        z = ZlecenieZapisu(self._nr_zapisu, xy, usun, linie)
+        for key, *_ in z.xy:
+            self._w_zapisie[key] = z.nr
+        for key, *_ in z.linie:
+            self._linie_w_zapisie[key] = z.nr
+        for rodzaj in ("obj", "lin"):
+            self.obserwator.oczekuj(rodzaj, {n for r, n in z.foldery() if r == rodzaj})
+        self._zlec_zapis.emit(z)
+        return z.nr
+
+    def _on_zapisane(self, w):
         """
-        1) Jeśli w obiekcie istnieje obiekty/<agent_folder>/ikona.png → użyj jej.
-        2) W innym wypadku użyj standardowej logiki (szukanie w /ikony).
+        Wynik zapisu z wątku ładowacza. Udane: model jeszcze raz podmieniony wartościami z zapisu
+        (migawka czytana przed zapisem mogła go w międzyczasie cofnąć). Nieudane: foldery do
+        przeładowania z dysku — model i scena wracają do tego, co faktycznie jest w plikach.
         """
+        z = w.zlecenie
+        for (rodzaj, nazwa), sig in w.sygnatury.items():
+            self.obserwator.przyjmij(rodzaj, nazwa, sig)
+        bledy_obj, bledy_lin = set(), set()
+        przywrocone = set()   # id obiektów, których xy wróciło do modelu → ich końce linii
+        for key, _d, x, y in z.xy:
+            ostatni = self._w_zapisie.get(key) == z.nr
+            if ostatni:
+                del self._w_zapisie[key]
+            item = self._map_items.get(key)
+            if key not in w.xy:
+                bledy_obj.add(key[0])
+            elif ostatni:
+                new = move_source_item(key, x, y, w.xy[key])
+                if new is not None and new.get('id'):
+                    przywrocone.add(new['id'])
+                if item is not None and new is not None:
+                    self._update_map_item(item, new)
+        for key, _d in z.usun:
+            if key not in w.usuniete:
+                bledy_obj.add(key[0])
+            elif remove_source_item(key) is not None and key in self._map_items:
+                self._usun_element(self._map_items, key)
+        for key, _d, x1, y1, x2, y2 in z.linie:
+            ostatni = self._linie_w_zapisie.get(key) == z.nr
+            if ostatni:
+                del self._linie_w_zapisie[key]
+            if key not in w.linie:
+                bledy_lin.add(key[0])
+            elif ostatni:
+                new = move_line_item(key, x1, y1, x2, y2)
+                if new is not None:
+                    self._sync_line(key, new)
+        # końce policzone w międzyczasie z cofniętego xy (migawka sprzed zapisu) → wyrównanie do obiektów
+        if przywrocone and self._linie_za_zmianami(przywrocone):
+            self._zaplanuj_eksport(False, True)
+        if bledy_obj or bledy_lin:
+            log.warn(f"Zapis nieudany: obiekty={sorted(bledy_obj)} linie={sorted(bledy_lin)} → przeładowanie")
+            self.apply_source_changes(bledy_obj, bledy_lin)
+        self.view.uniewaznij_lod()
+
+    def linie_za_obiektami(self, items):
+        """Drag w toku: końce linii przypiętych (AB.txt) do przeciąganych obiektów → środki ikon. Bez I/O."""
+        if self._wiazania is None:
+            po_id = {i.data.get('id'): i for i in items if i.data.get('id')}
+            self._wiazania = {}
+            for key in lines_of_objects(po_id):
+                d = LINE_SOURCE_CACHE[key]
+                self._wiazania[key] = (po_id.get(d.get('a_id')), po_id.get(d.get('b_id')))
+        for key, (a, b) in self._wiazania.items():
+            line = self._line_items.get(key)
+            if line is None:
+                continue
+            x1, y1 = a._srodek() if a is not None else (line._x1, line._y1)
+            x2, y2 = b._srodek() if b is not None else (line._x2, line._y2)
+            if line.ustaw_konce(x1, y1, x2, y2):
+                self._linie_na_zywo.add(key)
+
+    def koniec_przeciagania(self):
+        """Koniec dragu: powiązania do zbudowania od nowa; bez czekającego zapisu linie wracają do modelu."""
+        self._wiazania = None
+        if not self._przesuniete:
+            self._przywroc_linie()
+
+    def _przywroc_linie(self):
+        na_zywo, self._linie_na_zywo = self._linie_na_zywo, set()
+        for key in na_zywo:
+            if key in LINE_SOURCE_CACHE:
+                self._sync_line(key, LINE_SOURCE_CACHE[key])
+
+    def usun_obiekty(self, items):
+        """Usuwa zaznaczone obiekty z mapy (pliki źródłowe) jedną paczką — po potwierdzeniu."""
+        elementy = []
+        for item in items:
+            key = (item.data.get('agent_folder', ''), item.data.get('line_no'))
+            if key in SOURCE_CACHE:
+                elementy.append((key, SOURCE_CACHE[key]))
+        if not elementy:
+            return
+        odp = QMessageBox.question(self, "Usuń", f"Usunąć z mapy zaznaczone obiekty ({len(elementy)})?",
+                                   QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if odp != QMessageBox.Yes:
+            return
+        for key, _d in elementy:
+            self._przesuniete.pop(key, None)
+            remove_source_item(key)
+            if key in self._map_items:
+                self._usun_element(self._map_items, key)
+        self._zlec_zapisu(usun=elementy)
+        self.view.uniewaznij_lod()
+        self._zaplanuj_eksport(True, False)
+        log.info(f"Usunięto z mapy {len(elementy)} obiektów")
+
+    def _sync_foldery(self, obiekty: set, linie: set):
+        """Synchronizacja tylko zmienionych folderów (migawka częściowa) — reszta sceny nietknięta."""
+        if obiekty:
+            for key in [k for k in self._map_items if k[0] in obiekty and k not in SOURCE_CACHE]:
+                self._usun_element(self._map_items, key)
+            for key, data in list(SOURCE_CACHE.items()):
+                if key[0] in obiekty:
+                    self._sync_item(key, data)
+        if linie:
+            for key in [k for k in self._line_items if k[0] in linie and k not in LINE_SOURCE_CACHE]:
+                self._usun_element(self._line_items, key)
+            for key, d in list(LINE_SOURCE_CACHE.items()):
+                if key[0] in linie:
+                    self._sync_line(key, d)
+        self.view.uniewaznij_lod()
+
+    def _update_map_item(self, item, data):
+        old_state = getattr(item, "_state", None)
+        new_state = self._item_state(data)
+        item.data = data   # zawsze bieżący element modelu (uchwyt pliku / linii dla dropu)
+        if old_state == new_state:
+            return
+        item._state = new_state
+        item.original_x = data.get('x', 0)
+        item.original_y = data.get('y', 0)
+        agent_name = (data.get('agent_folder', '') or '').strip()
+        item.agent_dir = (OBJECTS_DIR / agent_name) if agent_name else None
+
+        nowa_ikona = old_state is None or old_state[6] != new_state[6]
+        if nowa_ikona:
+            item._ikona_klucz = new_state[6]
+            item.setPixmap(IKONY.pixmapa_dla_klucza(new_state[6]))
+        if old_state is None or old_state[:3] != new_state[:3] or nowa_ikona:
+            w_zapisie = (data.get('agent_folder', ''), data.get('line_no')) in self._w_zapisie
+            if not (item._dragging or item._czeka_zapis or w_zapisie):  # nie spod kursora / sprzed zapisu
+                self._place_item(item, data)
+        item.update()
+
+    def _place_item(self, item, data):
+        x = float(data.get('x', 0))
+        y = float(data.get('y', 0))
+        scale = float(str(data.get('rozmiar', '1')).replace(',', '.')) or 1.0
+        pix = item.pixmap()
+        item.setScale(scale)
+        w, h = pix.width() * scale, pix.height() * scale
+        item.setPos(x - w / 2.0, y - h / 2.0)
+
+    def _new_map_item(self, data):
+        state = self._item_state(data)
+        item = MapItem(
+            IKONY.pixmapa_dla_klucza(state[6]),
+            data,
+            sensor_dir=getattr(self.view, '_sensor_dir', HERE / 'sensory'),
+            sensor_lock=getattr(self.view, '_sensor_lock', threading.Lock()),
+            sensor_write_fn=getattr(self.view, '_sensor_write', lambda *a, **k: None),
+            base_dir=BASE_DIR,
+            objects_dir=OBJECTS_DIR,
+        )
+        item._state = state
+        item._ikona_klucz = state[6]
+        self._place_item(item, data)
+        return item
 
-        # --- 1) Priorytet: lokalna ikona w folderze obiektu ---
-        if agent_folder:
-            local_icon = OBJECTS_DIR / agent_folder / "ikona.png"
-            if local_icon.exists():
-                pm = QPixmap(str(local_icon))
-                if not pm.isNull():
-                    return pm
-
-        # --- 2) Stara logika globalna ---
-        candidates = []
-        if ikona:
-            p = ICONS_DIR / ikona
-            candidates.extend([
-                p,
-                p.with_suffix('.png'),
-                p.with_suffix('.jpg'),
-                p.with_suffix('.jpeg'),
-                p.with_suffix('.bmp'),
-                ICONS_DIR / (ikona + '.png'),
-            ])
-        for c in candidates:
-            if c.exists():
-                pm = QPixmap(str(c))
-                if not pm.isNull():
-                    return pm
-
-        # --- 3) Placeholder ---
-        pm = QPixmap(40, 40)
-        pm.fill(Qt.transparent)
-        painter = QPainter(pm)
-        pen = QPen(Qt.black)
-        pen.setWidth(2)
-        painter.setPen(pen)
-        painter.drawEllipse(4, 4, 32, 32)
-        painter.end()
-        return pm
+    # --- linie: diff rejestru z modelem ---
+    def _sync_lines(self, model: dict):
+        registry = self._line_items
+
+        for key, d in model.items():
+            self._sync_line(key, d)
+
+        for key in set(registry) - set(model):
+            self._usun_element(registry, key)
+
+    def _sync_line(self, key, d):
+        registry = self._line_items
+        try:
+            item = registry.get(key)
+            if key in self._linie_na_zywo and item is not None:
+                item.data = d   # geometria z dragu czeka na zapis dropu — bez cofania końców
+                item.update()
+                return
+            if item is None or item.scene() is not self.scene:
+                item = LineItem(d)
+                # linie są pod ikonami
+                item.setZValue(0)
+                registry[key] = item
+                self.scene.addItem(item)
+            else:
+                item.set_data(d)
+        except Exception as e:
+            log.warn(f"Linia {key}: {e}")
 
 MAIN_WINDOW_INSTANCE = None
 
@@ -98,6 +98,10 @@ class Notatnik(QWidget):
         self.kopia.write_text(data, encoding="utf-8")
 
 
+def otworz(kontekst=None):
+    return Notatnik()
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     okno = Notatnik()
@@ -226,5 +226,9 @@ def main():
     sys.exit(app.exec_())
 
 
+def otworz(kontekst=None):
+    return MainWindow()
+
+
 if __name__ == "__main__":
     main()
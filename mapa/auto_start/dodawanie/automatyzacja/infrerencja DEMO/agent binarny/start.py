@@ -7,6 +7,8 @@ PLAMA GEN4 — AGENT (auto-endpoint: /run -> /v1/chat/completions)
 - ../<NAZWA>/gotowe.txt: host/port/url (MINI)
 - brak gotowe.txt -> proces=lag (max 30 s)
 - błąd połączenia -> proces=lag 10 s + 1 retry
+- HTTP przez mapa/klient_http.py: keep-alive, pamięć endpointu (404 na /run raz na serwer), opóźnienia
+- stream=1 w konfiguracja.txt → /v1/chat/completions jako SSE, tokeny na bieżąco w wyjście.txt
 - logi -> log.txt
 """
 
@@ -25,6 +27,7 @@ TIMEOUT_SEC             = 60
 WAIT_GOTOWE_TOTAL_S     = 30
 RETRY_SLEEP_S           = 10
 ACCEPTED_JSON_KEYS      = ("result", "output", "response")
+STRUMIEN                = False   # stream=1 w konfiguracja.txt → SSE z /v1/chat/completions
 
 # =============== LOGI ===============
 def log(msg: str):
@@ -86,6 +89,7 @@ def parse_konfiguracja() -> dict:
         k, v = k.strip().lower(), v.strip()
         if k in ("serwer","server","srv"): cfg["serwer"] = v
         elif k == "url": cfg["url"] = v
+        elif k in ("stream","strumien","strumień"): cfg["stream"] = v.lower() in ("1","true","tak","on")
         elif k in ("temp","temperature"):
             try: cfg["temp"] = float(v)
             except: pass
@@ -137,8 +141,25 @@ def resolve_url(cfg: dict) -> str:
     raise RuntimeError("Brak 'serwer=<NAZWA>' i brak 'url=' w konfiguracja.txt.")
 
 # =============== HTTP HELPERS ===============
+def klient():
+    """mapa/klient_http.py (keep-alive + pamięć endpointów) albo None → zwykły urlopen."""
+    mapa_dir = str(ROOT.parents[1] / "mapa")
+    if mapa_dir not in sys.path:
+        sys.path.insert(0, mapa_dir)
+    try:
+        import klient_http
+        return klient_http
+    except ImportError:
+        return None
+
 def http_post(url: str, payload: dict) -> (str, dict):
     """Zwraca (body_text, headers_dict) lub rzuca wyjątek HTTP/URL/timeout."""
+    k = klient()
+    if k is not None:
+        log(f"POST → {url} (keep-alive, timeout={TIMEOUT_SEC}s)")
+        body, headers = k.post(url, payload, TIMEOUT_SEC)
+        log(f"HTTP OK, len={len(body)}")
+        return body, headers
     data = json.dumps(payload).encode("utf-8")
     req = urllib.request.Request(
         url, data=data,
@@ -177,6 +198,11 @@ def post_chat(base_url: str, instructions: str, input_text: str, temp: float, ma
         "max_tokens": int(max_token),
         # "model": "default"  # odkomentuj jeśli Twój serwer tego wymaga
     }
+    if STRUMIEN:
+        k = klient()
+        if k is not None:
+            return k.post_chat_strumien(url, payload, TIMEOUT_SEC, PATH_WYJSCIE, log)
+        log("[STRUMIEŃ] brak mapa/klient_http.py → odpowiedź w całości")
     body, _ = http_post(url, payload)
     # standard OpenAI: choices[0].message.content
     try:
@@ -202,13 +228,30 @@ def smart_call(raw_url: str, instructions: str, input_text: str, temp: float, ma
         base = base[: -len("/run")]
     base = base.rstrip("/")
 
+    # serwer już raz odpowiedział 404 na /run → od razu /v1/chat/completions (bez próby)
+    k = klient()
+    if k is not None and k.znany_endpoint(base) == k.CHAT:
+        log("[AUTO] pamięć endpointów: /v1/chat/completions (bez próby /run)")
+        try:
+            return post_chat(base, instructions, input_text, temp, max_token)
+        except urllib.error.HTTPError as e:
+            if getattr(e, "code", None) != 404:
+                raise
+            log("[AUTO] 404 na zapamiętanym endpoincie → sprawdzam od nowa")
+            k.zapomnij_endpoint(base)
+
     # 1st try: /run
     try:
         url_run = base + "/run"
-        return post_run(url_run, instructions, input_text, temp, max_token)
+        wynik = post_run(url_run, instructions, input_text, temp, max_token)
+        if k is not None:
+            k.zapamietaj_endpoint(base, k.RUN)
+        return wynik
     except urllib.error.HTTPError as e:
         if getattr(e, "code", None) == 404:
             log("[AUTO] 404 na /run → próbuję /v1/chat/completions")
+            if k is not None:
+                k.zapamietaj_endpoint(base, k.CHAT)
         else:
             log(f"[AUTO] Błąd na /run: {e} → spróbuję /v1/chat/completions")
     except (urllib.error.URLError, TimeoutError) as e:
@@ -237,10 +280,12 @@ def clean_output(txt: str) -> str:
     return txt.strip()
 
 def main():
+    global STRUMIEN
     log("=== START AGENTA ===")
     set_proces("on")
     try:
         cfg = parse_konfiguracja()
+        STRUMIEN = bool(cfg.get("stream"))
         raw_url = resolve_url(cfg)
         log(f"Finalny URL (raw): {raw_url}")
 
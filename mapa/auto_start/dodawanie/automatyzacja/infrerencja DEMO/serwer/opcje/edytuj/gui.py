@@ -797,5 +797,9 @@ def main():
     sys.exit(app.exec_())
 
 
+def otworz(kontekst=None):
+    return ServerGUI()
+
+
 if __name__ == "__main__":
     main()
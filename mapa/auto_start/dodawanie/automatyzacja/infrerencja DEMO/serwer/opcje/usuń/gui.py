@@ -6,8 +6,19 @@ current_file = Path(__file__).resolve()
 # dwa poziomy wyżej
 target = current_file.parents[2] / "mapa_dane.txt"
 
-if target.exists():
-    target.unlink()
-    print(f"🗑️ Usunięto: {target}")
-else:
-    print(f"⚠️ Nie znaleziono: {target}")
+
+
+def main():
+    if target.exists():
+        target.unlink()
+        print(f"🗑️ Usunięto: {target}")
+    else:
+        print(f"⚠️ Nie znaleziono: {target}")
+
+
+def otworz(kontekst=None):
+    main()
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,12 @@ def set_proces(state):
         content = MAPA.read_text(encoding="utf-8", errors="ignore") if MAPA.exists() else ""
         lines = [l for l in content.splitlines() if not l.strip().lower().startswith("proces=")]
         lines.append(f"proces={state}")
-        MAPA.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        nowa = "\n".join(lines) + "\n"
+        if nowa == content:
+            return
+        tmp = MAPA.with_name(MAPA.name + ".tmp")   # atomowo: mapa nie czyta pół-zapisanego pliku
+        tmp.write_text(nowa, encoding="utf-8")
+        tmp.replace(MAPA)
         log(f"→ PROCES = {state.upper()}")
     except Exception as e:
         log(f"[BŁĄD] zapis proces: {e}")
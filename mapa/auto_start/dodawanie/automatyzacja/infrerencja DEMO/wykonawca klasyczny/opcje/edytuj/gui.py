@@ -641,5 +641,9 @@ def main():
     sys.exit(app.exec_())
 
 
+def otworz(kontekst=None):
+    return MainWindow()
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -14,6 +14,8 @@ PLAMA GEN4 — AGENT (auto-endpoint: /run -> /v1/chat/completions)
     * czeka na ../<NAZWA>/wyjście.txt → przenosi treść do własnego wyjście.txt
 - brak gotowe.txt w trybie HTTP -> proces=lag (max 30 s)
 - błąd połączenia HTTP -> proces=lag 10 s + 1 retry
+- HTTP przez mapa/klient_http.py: keep-alive, pamięć endpointu (404 na /run raz na serwer), opóźnienia
+- stream=true w konfiguracja.txt → /v1/chat/completions jako SSE, tokeny na bieżąco w wyjście.txt
 - logi -> log.txt
 
 DODANE:
@@ -211,8 +213,25 @@ def resolve_url(cfg: dict) -> str:
     raise RuntimeError("Brak 'serwer=<NAZWA>' i brak 'url=' w konfiguracja.txt.")
 
 # =============== HTTP HELPERS ===============
+def klient():
+    """mapa/klient_http.py (keep-alive + pamięć endpointów) albo None → zwykły urlopen."""
+    mapa_dir = str(ROOT.parents[1] / "mapa")
+    if mapa_dir not in sys.path:
+        sys.path.insert(0, mapa_dir)
+    try:
+        import klient_http
+        return klient_http
+    except ImportError:
+        return None
+
 def http_post(url: str, payload: dict) -> (str, dict):
     """Zwraca (body_text, headers_dict) lub rzuca wyjątek HTTP/URL/timeout."""
+    k = klient()
+    if k is not None:
+        log(f"POST → {url} (keep-alive, timeout={TIMEOUT_SEC}s)")
+        body, headers = k.post(url, payload, TIMEOUT_SEC)
+        log(f"HTTP OK, len={len(body)}")
+        return body, headers
     data = json.dumps(payload).encode("utf-8")
     req = urllib.request.Request(
         url,
@@ -254,6 +273,11 @@ def post_run(url_run: str, instructions: str, input_text: str,
     except json.JSONDecodeError:
         return body
 
+def czy_strumien(extra_params: dict | None) -> bool:
+    p = extra_params or {}
+    v = p.get("stream", p.get("strumien", ""))
+    return str(v).strip().lower() in ("1", "true", "tak", "on")
+
 def post_chat(base_url: str, instructions: str, input_text: str,
               temp: float, max_token: int, extra_params: dict | None = None) -> str:
     """OpenAI/llama.cpp compatible: POST {base}/v1/chat/completions + params z konfiguracja.txt"""
@@ -271,6 +295,14 @@ def post_chat(base_url: str, instructions: str, input_text: str,
     if extra_params:
         payload.update(extra_params)
 
+    # stream=true w konfiguracja.txt → SSE: tokeny na bieżąco w wyjście.txt
+    if czy_strumien(extra_params):
+        payload.pop("strumien", None)   # przełącznik agenta, nie parametr serwera
+        k = klient()
+        if k is not None:
+            return k.post_chat_strumien(url, payload, TIMEOUT_SEC, PATH_WYJSCIE, log)
+        log("[STRUMIEŃ] brak mapa/klient_http.py → odpowiedź w całości")
+        payload["stream"] = False
     body, _ = http_post(url, payload)
     # standard OpenAI: choices[0].message.content
     try:
@@ -335,13 +367,30 @@ def smart_call(raw_url: str, instructions: str, input_text: str,
         base = base[: -len("/run")]
     base = base.rstrip("/")
 
+    # serwer już raz odpowiedział 404 na /run → od razu /v1/chat/completions (bez próby)
+    k = klient()
+    if k is not None and k.znany_endpoint(base) == k.CHAT:
+        log("[AUTO] pamięć endpointów: /v1/chat/completions (bez próby /run)")
+        try:
+            return post_chat(base, instructions, input_text, temp, max_token, extra_params)
+        except urllib.error.HTTPError as e:
+            if getattr(e, "code", None) != 404:
+                raise
+            log("[AUTO] 404 na zapamiętanym endpoincie → sprawdzam od nowa")
+            k.zapomnij_endpoint(base)
+
     # 1st try: /run
     try:
         url_run = base + "/run"
-        return post_run(url_run, instructions, input_text, temp, max_token, extra_params)
+        wynik = post_run(url_run, instructions, input_text, temp, max_token, extra_params)
+        if k is not None:
+            k.zapamietaj_endpoint(base, k.RUN)
+        return wynik
     except urllib.error.HTTPError as e:
         if getattr(e, "code", None) == 404:
             log("[AUTO] 404 na /run → próbuję /v1/chat/completions")
+            if k is not None:
+                k.zapamietaj_endpoint(base, k.CHAT)
         else:
             log(f"[AUTO] Błąd na /run: {e} → spróbuję /v1/chat/completions")
     except (urllib.error.URLError, TimeoutError) as e:
@@ -365,8 +414,8 @@ def try_run_auto(raw_url: str, instructions: str, input_text: str,
 def run_next_line_if_any():
     """
     Po wygenerowaniu odpowiedzi:
-    - czyta następny.txt (np. "2")
-    - szuka w folderze "linie" podfolderu, który ma L_id.txt o tej samej wartości
+    - czyta następny.txt (np. "2", albo kilka L_id — po jednym w linii)
+    - dla każdego szuka w folderze "linie" podfolderu, który ma L_id.txt o tej samej wartości
     - odpala start.py z tego folderu (nowy proces, po cichu)
     """
     try:
@@ -374,8 +423,8 @@ def run_next_line_if_any():
         if not next_val:
             log("[NEXT] Brak następny.txt lub pusty – nic nie odpalam.")
             return
-        target_id = next_val.strip()
-        log(f"[NEXT] następny.txt → '{target_id}'")
+        target_ids = next_val.replace(",", " ").split()
+        log(f"[NEXT] następny.txt → {target_ids}")
 
         current_file = Path(__file__).resolve()
         try:
@@ -388,7 +437,27 @@ def run_next_line_if_any():
             log(f"[NEXT] Katalog 'linie' nie istnieje: {linie_dir}")
             return
 
-        for item in linie_dir.iterdir():
+        # wspólny indeks L_id → folder (mapa/indeks_id.py); bez niego — skan linie/
+        mapa_dir = str(parent2 / "mapa")
+        if mapa_dir not in sys.path:
+            sys.path.insert(0, mapa_dir)
+        # kilka L_id (fan-out) → każda linia osobno
+        for target_id in target_ids:
+            uruchom_linie(parent2, linie_dir, target_id)
+    except Exception as e:
+        log(f"[NEXT] Wyjątek w run_next_line_if_any: {e}")
+
+
+def uruchom_linie(parent2: Path, linie_dir: Path, target_id: str):
+    try:
+        try:
+            from indeks_id import znajdz_linie
+            trafienie = znajdz_linie(parent2, target_id)
+            kandydaci = [trafienie] if trafienie else []
+        except ImportError:
+            kandydaci = list(linie_dir.iterdir())
+
+        for item in kandydaci:
             if not item.is_dir():
                 continue
             lid_file = item / "L_id.txt"
@@ -413,7 +482,7 @@ def run_next_line_if_any():
 
         log(f"[NEXT] Nie znaleziono linii z L_id={target_id} w {linie_dir}")
     except Exception as e:
-        log(f"[NEXT] Wyjątek w run_next_line_if_any: {e}")
+        log(f"[NEXT] Wyjątek przy linii L_id={target_id}: {e}")
 
 # =============== MAIN ===============
 def clean_output(txt: str) -> str:
@@ -1,73 +1,31 @@
-import tkinter as tk
 import sys
 import subprocess
 from pathlib import Path
 
-LIGHT_GREEN = "#a8ffb0"   # jasno zielony
-BRIGHT_GREEN = "#00ff00"  # start
-RED = "#ff3333"            # błąd
-BG = "#000000"
+# opcje/start/gui.py → folder obiektu (start.py) → obiekty/ → katalog główny (mapa/)
+START_PY = Path(__file__).resolve().parents[2] / "start.py"
+MAPA_DIR = str(Path(__file__).resolve().parents[4] / "mapa")
+if MAPA_DIR not in sys.path:
+    sys.path.insert(0, MAPA_DIR)
 
-class Launcher:
-    def __init__(self, root: tk.Tk):
-        self.root = root
-        self.root.configure(bg=BG)
-        self.root.resizable(False, False)
-        self.root.title("Launcher")
+# nakładka „Uruchamiam… → START”: mapa/okno_startu.py; bez niego — samo uruchomienie start.py
+try:
+    import okno_startu
+except ImportError:
+    okno_startu = None
 
-        w, h = 320, 120
-        sw = self.root.winfo_screenwidth()
-        sh = self.root.winfo_screenheight()
-        x = (sw // 2) - (w // 2)
-        y = (sh // 2) - (h // 2)
-        self.root.geometry(f"{w}x{h}+{x}+{y}")
-        self.root.attributes("-topmost", True)
 
-        self.label = tk.Label(
-            self.root,
-            text="Uruchamiam…",
-            fg=LIGHT_GREEN,
-            bg=BG,
-            font=("Segoe UI", 18, "bold")
-        )
-        self.label.pack(expand=True, fill="both")
+def uruchom_bez_nakladki():
+    if START_PY.exists():
+        subprocess.Popen([sys.executable, str(START_PY)], cwd=str(START_PY.parent))
 
-        self.root.after(200, self.try_launch)
 
-    def try_launch(self):
-        try:
-            target = Path(__file__).resolve().parents[2] / "start.py"
-            if not target.exists():
-                self.fail("Brak pliku: start.py")
-                return
+def otworz(kontekst=None):
+    return okno_startu.Launcher(START_PY) if okno_startu else uruchom_bez_nakladki()
 
-            creationflags = 0
-            if sys.platform.startswith("win"):
-                DETACHED_PROCESS = 0x00000008
-                CREATE_NEW_PROCESS_GROUP = 0x00000200
-                creationflags = DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
-
-            subprocess.Popen(
-                [sys.executable, str(target)],
-                cwd=str(target.parent),
-                creationflags=creationflags,
-                close_fds=True,
-                shell=False
-            )
-
-            self.label.config(text="START", fg=BRIGHT_GREEN)
-            self.root.after(800, self.root.destroy)
-        except Exception as e:
-            self.fail(str(e))
-
-    def fail(self, msg: str):
-        self.label.config(text=f"BŁĄD\n{msg}", fg=RED)
-        self.root.after(2500, self.root.destroy)
-
-def main():
-    root = tk.Tk()
-    Launcher(root)
-    root.mainloop()
 
 if __name__ == "__main__":
-    main()
+    if okno_startu is not None:
+        okno_startu.main(START_PY)
+    else:
+        uruchom_bez_nakladki()
@@ -145,7 +145,12 @@ class TrybyWindow(QWidget):
         print("✔ zapisano:", ",".join(selected))
 
 
-app = QApplication(sys.argv)
-window = TrybyWindow()
-window.show()
-sys.exit(app.exec_())
+def otworz(kontekst=None):
+    return TrybyWindow()
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = TrybyWindow()
+    window.show()
+    sys.exit(app.exec_())
@@ -314,5 +314,8 @@ def main():
     w.show()
     sys.exit(app.exec_())
 
+def otworz(kontekst=None):
+    return Editor()
+
 if __name__ == "__main__":
     main()
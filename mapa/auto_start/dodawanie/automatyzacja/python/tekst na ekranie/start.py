@@ -4,13 +4,15 @@ import time
 import threading
 import hashlib
 import sys
-from pathlib import Path
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 
 TIMEOUT = 30          # max czas na proces.py
 STOP_CHECK = 0.2      # co ile sekund sprawdzać stop.txt
 
+# mapa/lancuch.py rozpoznaje po tym znaczniku szablon, który umie wykonać w swoim procesie
+LANCUCH_W_PROCESIE = True
+
 LOG_PATH = os.path.join(ROOT, "log.txt")
 
 
@@ -40,77 +42,58 @@ def hash_txt(txt):
     return hashlib.sha256(txt.encode("utf-8", errors="ignore")).hexdigest()
 
 
-def ustaw_proces(stan):
-    mapa = os.path.join(ROOT, "mapa_dane.txt")
-    if not os.path.exists(mapa):
-        log("WARN: brak mapa_dane.txt (nie ustawiam proces=...)")
-        return
-
-    lines = wczytaj(mapa).split("\n")
-    out = []
-    found = False
-
-    for l in lines:
-        if l.startswith("proces="):
-            out.append(f"proces={stan}")
-            found = True
-        else:
-            out.append(l)
+# =========================
+# WSPÓLNE: mapa/start_obiektu.py (status, dziennik, pula, STOP, łańcuch)
+# bez niego tryb minimalny: status.txt, hash stop.txt, bez puli, linie osobnymi procesami
+# =========================
+MAPA_DIR = os.path.join(os.path.dirname(os.path.dirname(ROOT)), "mapa")
+if MAPA_DIR not in sys.path:
+    sys.path.insert(0, MAPA_DIR)
+try:
+    import start_obiektu
+except ImportError:
+    start_obiektu = None
 
-    if not found:
-        out.append(f"proces={stan}")
 
-    zapisz(mapa, "\n".join(out))
-    log(f"STATUS: proces={stan}")
+def ustaw_proces(stan):
+    if start_obiektu is not None:
+        start_obiektu.ustaw_proces(ROOT, stan, log)
+    elif os.path.exists(os.path.join(ROOT, "mapa_dane.txt")):
+        sciezka = os.path.join(ROOT, "status.txt")
+        zapisz(sciezka + ".tmp", f"proces={stan}\n")
+        os.replace(sciezka + ".tmp", sciezka)
+        log(f"STATUS: proces={stan}")
 
 
-def uruchom_nastepna_linie(line_id):
+def odpal_linie_osobno(nxt):
+    """Bez mapa/start_obiektu.py: start.py każdej linii z następny.txt w osobnym procesie (jak dawniej)."""
     linie_dir = os.path.join(os.path.dirname(os.path.dirname(ROOT)), "linie")
-    if not os.path.exists(linie_dir):
+    ids = set(nxt.replace(",", " ").split())
+    if not os.path.isdir(linie_dir):
         log("WARN: brak folderu linie/ (nie uruchamiam następnej linii)")
         return
-
     for d in os.listdir(linie_dir):
-        p = os.path.join(linie_dir, d)
-        if not os.path.isdir(p):
-            continue
-
-        id_path = os.path.join(p, "L_id.txt")
-        if not os.path.exists(id_path):
-            continue
-
-        if wczytaj(id_path).strip() == line_id:
-            start = os.path.join(p, "start.py")
-            if os.path.exists(start):
-                log(f"CHAIN: uruchamiam następną linię id={line_id} -> {start}")
-
-                exe = sys.executable
-                if sys.platform.startswith("win"):
-                    exe = Path(exe).with_name("pythonw.exe")
-                    subprocess.Popen(
-                        [str(exe), start],
-                        creationflags=subprocess.CREATE_NO_WINDOW,
-                    )
-                else:
-                    subprocess.Popen([exe, start])
-
-            else:
-                log(f"WARN: znaleziono linię id={line_id}, ale brak start.py w {p}")
-            return
+        folder = os.path.join(linie_dir, d)
+        start = os.path.join(folder, "start.py")
+        if wczytaj(os.path.join(folder, "L_id.txt")).strip() in ids and os.path.exists(start):
+            log(f"CHAIN: uruchamiam następną linię {d} -> {start}")
+            bez_okna = {"creationflags": subprocess.CREATE_NO_WINDOW} if hasattr(subprocess, "CREATE_NO_WINDOW") else {}
+            subprocess.Popen([sys.executable, start], cwd=folder, **bez_okna)
 
-    log(f"WARN: nie znaleziono linii o id={line_id} w linie/")
 
 def monitor_stop(proc):
     stop_path = os.path.join(ROOT, "stop.txt")
-    last_hash = hash_txt(wczytaj(stop_path))
-
-    while True:
+    if start_obiektu is not None:
+        zmieniony = start_obiektu.straznik_stop(stop_path)
+    else:
+        last_hash = hash_txt(wczytaj(stop_path))
+        zmieniony = lambda: hash_txt(wczytaj(stop_path)) != last_hash
+
+    # tylko do końca proces.py — potem ten sam proces może prowadzić dalej łańcuch
+    while proc.poll() is None:
         time.sleep(STOP_CHECK)
 
-        current = wczytaj(stop_path)
-        current_hash = hash_txt(current)
-
-        if current_hash != last_hash:
+        if zmieniony():
             # 🛑 STOP NATYCHMIAST
             log("STOP: wykryto zmianę w stop.txt -> KILL proces.py i exit")
             try:
@@ -125,6 +108,8 @@ def monitor_stop(proc):
                 os.path.join(ROOT, "wyjście.txt"),
                 "STOP: wykryto zmianę w stop.txt"
             )
+            if start_obiektu is not None:
+                start_obiektu.zapisz_zalegle()
             os._exit(0)  # twarde wyjście
 
 
@@ -142,8 +127,10 @@ def main():
             ustaw_proces("error")
             return
 
-        log(f"RUN: python {proc_path}")
-        proc = subprocess.Popen(
+        proc = start_obiektu.uruchom_w_puli(ROOT, proc_path, log) if start_obiektu else None
+        if proc is None:
+            log(f"RUN: python {proc_path}")
+            proc = subprocess.Popen(
     ["python", proc_path],
     creationflags=subprocess.CREATE_NO_WINDOW
 )
@@ -188,8 +175,11 @@ def main():
         if os.path.exists(nxt_path):
             nxt = wczytaj(nxt_path).strip()
             if nxt:
-                log(f"NEXT: w następny.txt jest id={nxt}")
-                uruchom_nastepna_linie(nxt)
+                log(f"NEXT: w następny.txt jest id={' '.join(nxt.split())}")
+                if start_obiektu is not None:
+                    start_obiektu.uruchom_nastepna_linie(ROOT, nxt, log)
+                else:
+                    odpal_linie_osobno(nxt)
             else:
                 log("NEXT: następny.txt pusty (brak chain)")
         else:
@@ -36,5 +36,9 @@ def main():
     write_stop("0")
 
 
+def otworz(kontekst=None):
+    main()
+
+
 if __name__ == "__main__":
     main()
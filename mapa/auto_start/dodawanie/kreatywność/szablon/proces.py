@@ -1,10 +1,13 @@
 import time
 import os
+import sys
 import hashlib
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 MAPA = os.path.join(ROOT, "mapa_dane.txt")
+STATUS = os.path.join(ROOT, "status.txt")
 STOP = os.path.join(ROOT, "stop.txt")
+MAPA_DIR = os.path.join(os.path.dirname(os.path.dirname(ROOT)), "mapa")
 
 STANY = ["on", "lag", "error"]
 INTERVAL = 3
@@ -25,26 +28,56 @@ def hash_txt(txt):
     return hashlib.sha256(txt.encode("utf-8", errors="ignore")).hexdigest()
 
 
+def sygnatura(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def zapisz_atomowo(path, txt):
+    # atomowo: mapa nie może złapać pół-zapisanego pliku
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(txt)
+    os.replace(tmp, path)
+
+
 def ustaw_proces(stan):
     if not os.path.exists(MAPA):
         return
 
-    lines = wczytaj(MAPA).split("\n")
-    out = []
-    found = False
-
-    for l in lines:
-        if l.startswith("proces="):
-            out.append(f"proces={stan}")
-            found = True
-        else:
-            out.append(l)
+    # mapa/status.py: ten sam zapis co start.py i łańcuch (PLAMA_STATUS_PLIK, łączenie przejść)
+    if MAPA_DIR not in sys.path:
+        sys.path.insert(0, MAPA_DIR)
+    try:
+        import status
+    except ImportError:
+        status = None
+    if status is not None:
+        status.ustaw_proces(MAPA, stan)
+        return
 
-    if not found:
-        out.append(f"proces={stan}")
+    if os.environ.get("PLAMA_STATUS_PLIK", "1").strip() == "0":
+        # stary zapis: proces= prosto w mapa_dane.txt, status.txt nie może go przesłaniać
+        try:
+            os.remove(STATUS)
+        except OSError:
+            pass
+        tekst = wczytaj(MAPA)
+        linie = [f"proces={stan}" if l.strip().lower().startswith("proces=") else l
+                 for l in tekst.splitlines()]
+        if f"proces={stan}" not in linie:
+            linie.append(f"proces={stan}")
+        nowy = "\n".join(linie) + "\n"
+        if nowy != tekst:
+            zapisz_atomowo(MAPA, nowy)
+        return
 
-    with open(MAPA, "w", encoding="utf-8") as f:
-        f.write("\n".join(out))
+    # status w osobnym status.txt: mapa przestawia tylko kolor ramki, mapa_dane.txt nietknięty
+    if wczytaj(STATUS).strip() != f"proces={stan}":
+        zapisz_atomowo(STATUS, f"proces={stan}\n")
 
 
 # =========================
@@ -52,6 +85,7 @@ def ustaw_proces(stan):
 # =========================
 
 stop_hash = hash_txt(wczytaj(STOP))
+stop_sig = sygnatura(STOP)
 idx = 0
 
 while True:
@@ -59,10 +93,12 @@ while True:
     if time.time() - START_TIME >= MAX_TIME:
         break
 
-    # 🛑 sprawdzaj STOP
-    current_hash = hash_txt(wczytaj(STOP))
-    if current_hash != stop_hash:
-        break
+    # 🛑 sprawdzaj STOP (treść czytana tylko, gdy plik się zmienił)
+    sig = sygnatura(STOP)
+    if sig != stop_sig:
+        stop_sig = sig
+        if hash_txt(wczytaj(STOP)) != stop_hash:
+            break
 
     stan = STANY[idx % len(STANY)]
     ustaw_proces(stan)
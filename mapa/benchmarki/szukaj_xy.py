@@ -0,0 +1,110 @@
+"""
+Benchmark: szukanie źródła po XY (find_files_with_xy bez znanego folderu obiektu) i utrzymanie indeksu.
+
+przed  – bez indeksu: każde zapytanie vs cały SOURCE_CACHE (O(N) na zapytanie)
+po     – SOURCE_INDEX.w_poblizu (średnio O(1) na zapytanie)
+budowa – zbuduj() przy pełnym wczytaniu źródeł, N elementów
+łatka  – usun + dodaj na każde przesunięcie obiektu (model po przeciągnięciu), 2N par
+
+Uruchom:  python mapa/benchmarki/szukaj_xy.py [N ...]   (domyślnie 100 1000 10000)
+Nie importuje PLAMA.py (import startuje zlo_menager), format danych jest ten sam.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from indeks_xy import zbuduj  # noqa: E402
+
+TOL = 0.51
+
+
+def syntetyczne_zrodla(n: int, seed: int = 2033):
+    rnd = random.Random(seed)
+    zajete = set()
+    out = []
+    while len(out) < n:
+        xy = (rnd.randint(-50 * n, 50 * n), rnd.randint(-50 * n, 50 * n))
+        if xy in zajete:
+            continue
+        zajete.add(xy)
+        out.append({
+            "x": float(xy[0]), "y": float(xy[1]), "ikona": "plik/txt", "rozmiar": "1",
+            "proces": "off", "agent_folder": f"obiekt {len(out)}",
+        })
+    return out
+
+
+def punkty_zapytan(zrodla, seed: int = 7):
+    """Połowa zapytań trafia w obiekt (przesunięty w tolerancji), połowa w puste miejsce."""
+    rnd = random.Random(seed)
+    out = []
+    for i, d in enumerate(zrodla):
+        if i % 2:
+            out.append((d["x"] + rnd.uniform(-TOL, TOL), d["y"] + rnd.uniform(-TOL, TOL)))
+        else:
+            out.append((d["x"] + 0.5 + 2 * TOL, d["y"] - 0.5 - 2 * TOL))
+    return out
+
+
+def szukaj_liniowo(zapytania, zrodla):
+    """Bez indeksu: każde zapytanie vs całe SOURCE_CACHE (pełny przegląd jak skan folderów)."""
+    wynik = []
+    for x, y in zapytania:
+        trafienia = []
+        for s in zrodla:
+            dx = abs(float(s.get('x', 0.0)) - x)
+            dy = abs(float(s.get('y', 0.0)) - y)
+            if dx <= TOL and dy <= TOL:
+                trafienia.append((dx + dy, s))
+        trafienia.sort(key=lambda t: t[0])
+        wynik.append([s for _, s in trafienia])
+    return wynik
+
+
+def szukaj_indeksem(zapytania, idx):
+    return [idx.w_poblizu(x, y, TOL) for x, y in zapytania]
+
+
+def przesun_w_indeksie(idx, zrodla):
+    """Łatka modelu po przeciągnięciu: usuń ze starego XY, dodaj pod nowym (i z powrotem)."""
+    for d in zrodla:
+        idx.usun(d, d["x"], d["y"])
+        idx.dodaj(d["x"] + 3.0, d["y"] + 3.0, d)
+    for d in zrodla:
+        idx.usun(d, d["x"] + 3.0, d["y"] + 3.0)
+        idx.dodaj(d["x"], d["y"], d)
+
+
+def zmierz(fn, *args, powtorzenia: int = 3):
+    najlepszy = float("inf")
+    wynik = None
+    for _ in range(powtorzenia):
+        t0 = time.perf_counter()
+        wynik = fn(*args)
+        najlepszy = min(najlepszy, time.perf_counter() - t0)
+    return najlepszy, wynik
+
+
+def main(argv):
+    rozmiary = [int(a) for a in argv] or [100, 1000, 10000]
+    print(f"{'N':>7} | {'przed [ms]':>12} | {'po [ms]':>10} | {'przyspieszenie':>14} | {'budowa [ms]':>11} | {'łatka [ms]':>10}")
+    print("-" * 80)
+    for n in rozmiary:
+        zrodla = syntetyczne_zrodla(n)
+        zapytania = punkty_zapytan(zrodla)
+        t_budowa, idx = zmierz(zbuduj, zrodla)
+        # O(N²) dla 10k to kilkadziesiąt sekund na przebieg – wtedy jeden pomiar
+        t_przed, a = zmierz(szukaj_liniowo, zapytania, zrodla, powtorzenia=1 if n > 2000 else 3)
+        t_po, b = zmierz(szukaj_indeksem, zapytania, idx)
+        assert [[id(x) for x in r] for r in a] == [[id(x) for x in r] for r in b], "różne wyniki!"
+        t_latka, _ = zmierz(przesun_w_indeksie, idx, zrodla)
+        print(f"{n:>7} | {t_przed * 1000:>12.2f} | {t_po * 1000:>10.2f} | {t_przed / t_po:>13.1f}x"
+              f" | {t_budowa * 1000:>11.2f} | {t_latka * 1000:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,208 @@
+"""
+Cache ikon mapy (QPixmap) z unieważnianiem.
+
+- klucz pixmapy = (rozwiązana ścieżka, mtime_ns, rozmiar) → ta sama ikona to JEDNA pixmapa
+  współdzielona przez wszystkie obiekty, podmiana pliku daje nowy klucz
+- rozwiązanie nazwy (ikona.png obiektu → ikony/<nazwa>[.png|.jpg|…]) pamiętane per
+  (ikona, folder_agenta); unieważniane per agent albo wynikiem sprawdz()
+- sprawdz() (wątek ładowacza, nie GUI): stat folderu ikony/ i KAŻDEGO rozwiązanego pliku — plik
+  nadpisany w miejscu (mtime folderu bez zmian) też daje nowy klucz; zastosuj() w wątku GUI bez I/O
+- warianty przeskalowane per kubełek zoomu (potęgi 2) → przy oddaleniu nie skalujemy
+  dużych PNG w każdej klatce
+- LRU z limitem pamięci wspólnym dla oryginałów i wariantów
+"""
+
+import math
+import stat
+from collections import OrderedDict
+from pathlib import Path
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QPainter, QPen
+
+ROZSZERZENIA = ('.png', '.jpg', '.jpeg', '.bmp')
+MIN_KUBELEK = 1.0 / 16   # poniżej tej skali i tak rysujemy kropkę
+
+
+def _bajty(pm: QPixmap) -> int:
+    return max(1, pm.width() * pm.height() * max(1, pm.depth()) // 8)
+
+
+def kubelek_skali(skala: float) -> float:
+    """Najbliższa WIĘKSZA potęga 2 (≤ 1) → wariant nigdy nie jest mniejszy niż ekran."""
+    if skala <= 0 or skala >= 1.0:
+        return 1.0
+    return max(MIN_KUBELEK, 2.0 ** math.ceil(math.log2(skala)))
+
+
+class CacheIkon:
+    def __init__(self, objects_dir: Path, icons_dir: Path, limit_bajtow: int = 128 * 1024 * 1024):
+        self.objects_dir = Path(objects_dir)
+        self.icons_dir = Path(icons_dir)
+        self.limit_bajtow = int(limit_bajtow)
+        self._sciezki = {}             # (ikona, agent) → klucz pixmapy albo None (placeholder)
+        self._lru = OrderedDict()      # klucz / (klucz, kubełek) → QPixmap
+        self._bajty = 0
+        self._placeholder = None
+        self._ikony_sig = self._sig_folderu_ikon()
+        self.trafienia = 0
+        self.dekodowania = 0
+
+    # --- rozwiązywanie nazw ---
+    @staticmethod
+    def _stat_klucz(p: Path):
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode) or st.st_size <= 0:
+            return None
+        return (str(p), st.st_mtime_ns, st.st_size)
+
+    def _kandydaci(self, ikona: str, agent_folder: str):
+        if agent_folder:
+            yield self.objects_dir / agent_folder / "ikona.png"
+        if ikona:
+            p = self.icons_dir / ikona
+            yield p
+            for ext in ROZSZERZENIA:
+                yield p.with_suffix(ext)
+            yield self.icons_dir / (ikona + '.png')
+
+    def _rozwiaz(self, ikona: str, agent_folder: str):
+        # tylko stat() i ścieżki z konstruktora → bezpieczne także poza wątkiem GUI
+        for c in self._kandydaci(ikona, agent_folder):
+            k = self._stat_klucz(c)
+            if k is not None:
+                return k
+        return None
+
+    def klucz(self, ikona: str, agent_folder: str = ""):
+        """Klucz pixmapy dla obiektu (bez dekodowania; dysk tylko przy pierwszym pytaniu)."""
+        nazwa = ((ikona or '').strip(), (agent_folder or '').strip())
+        if nazwa not in self._sciezki:
+            self._sciezki[nazwa] = self._rozwiaz(*nazwa)
+        return self._sciezki[nazwa]
+
+    # --- unieważnianie ---
+    @staticmethod
+    def _sig_folderu(p: Path):
+        try:
+            st = p.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _sig_folderu_ikon(self):
+        return self._sig_folderu(self.icons_dir)
+
+    def uniewaznij_agenta(self, agent_folder: str):
+        """Obiekt zmieniony (np. nowa / podmieniona ikona.png) → rozwiąż jego ikonę od nowa."""
+        for nazwa in [n for n in self._sciezki if n[1] == agent_folder]:
+            del self._sciezki[nazwa]
+
+    def stan(self):
+        """Kopia do sprawdz(): (sygnatura ikony/, {(ikona, agent): klucz})."""
+        return self._ikony_sig, dict(self._sciezki)
+
+    def sprawdz(self, ikony_sig, rozwiazania: dict):
+        """
+        Dysk bez dotykania cache (wątek ładowacza): (nowa sygnatura ikony/, {nazwa: nowy klucz}) albo
+        None, gdy nic się nie zmieniło. Folder ikony/ inny → od nowa wszystkie nazwy, inaczej tylko te,
+        których plik ma inny mtime / rozmiar (albo zniknął).
+        """
+        sig = self._sig_folderu_ikon()
+        wszystkie = sig != ikony_sig
+        zmiany = {}
+        for nazwa, k in rozwiazania.items():
+            if wszystkie or k is None or self._stat_klucz(Path(k[0])) != k:
+                nowy = self._rozwiaz(*nazwa)
+                if nowy != k:
+                    zmiany[nazwa] = nowy
+        if not wszystkie and not zmiany:
+            return None
+        return sig, zmiany
+
+    def zastosuj(self, ikony_sig, zmiany: dict) -> bool:
+        """Wynik sprawdz() w wątku GUI (bez I/O). True = któryś obiekt ma teraz inną ikonę."""
+        self._ikony_sig = ikony_sig
+        for nazwa, k in zmiany.items():
+            if nazwa in self._sciezki:
+                self._sciezki[nazwa] = k
+        return bool(zmiany)
+
+    def wyczysc(self):
+        self._sciezki.clear()
+        self._lru.clear()
+        self._bajty = 0
+
+    # --- LRU ---
+    def _wez(self, k):
+        pm = self._lru.get(k)
+        if pm is not None:
+            self._lru.move_to_end(k)
+            self.trafienia += 1
+        return pm
+
+    def _wloz(self, k, pm: QPixmap):
+        stary = self._lru.pop(k, None)
+        if stary is not None:
+            self._bajty -= _bajty(stary)
+        self._lru[k] = pm
+        self._bajty += _bajty(pm)
+        # element właśnie włożony zostaje nawet ponad limit (jest potrzebny teraz)
+        while self._bajty > self.limit_bajtow and len(self._lru) > 1:
+            _, wyrzucony = self._lru.popitem(last=False)
+            self._bajty -= _bajty(wyrzucony)
+
+    # --- pixmapy ---
+    def placeholder(self) -> QPixmap:
+        if self._placeholder is None:
+            pm = QPixmap(40, 40)
+            pm.fill(Qt.transparent)
+            painter = QPainter(pm)
+            pen = QPen(Qt.black)
+            pen.setWidth(2)
+            painter.setPen(pen)
+            painter.drawEllipse(4, 4, 32, 32)
+            painter.end()
+            self._placeholder = pm
+        return self._placeholder
+
+    def pixmapa_dla_klucza(self, k) -> QPixmap:
+        if k is None:
+            return self.placeholder()
+        pm = self._wez(k)
+        if pm is not None:
+            return pm
+        pm = QPixmap(k[0])
+        self.dekodowania += 1
+        if pm.isNull():
+            return self.placeholder()
+        self._wloz(k, pm)
+        return pm
+
+    def pixmapa(self, ikona: str, agent_folder: str = "") -> QPixmap:
+        return self.pixmapa_dla_klucza(self.klucz(ikona, agent_folder))
+
+    def skalowana(self, k, skala: float):
+        """Wariant pixmapy dla kubełka zoomu albo None, gdy wystarczy oryginał."""
+        kub = kubelek_skali(skala)
+        if k is None or kub >= 1.0:
+            return None
+        kk = (k, kub)
+        pm = self._wez(kk)
+        if pm is not None:
+            return pm
+        oryginal = self.pixmapa_dla_klucza(k)
+        w = max(1, int(math.ceil(oryginal.width() * kub)))
+        h = max(1, int(math.ceil(oryginal.height() * kub)))
+        pm = oryginal.scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        self._wloz(kk, pm)
+        return pm
+
+    def statystyki(self) -> dict:
+        return {
+            "pixmapy": len(self._lru), "bajty": self._bajty, "limit": self.limit_bajtow,
+            "trafienia": self.trafienia, "dekodowania": self.dekodowania,
+        }
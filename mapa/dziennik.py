@@ -0,0 +1,282 @@
+"""
+Wspólny dziennik zdarzeń (JSON lines, tylko dopisywanie): start / koniec / status obiektów i linii.
+
+- jeden plik dla całego systemu: mapa/dziennik/zdarzenia.jsonl — jedna linia = jedno zdarzenie
+    {"t": 1760781234.123, "pid": 4242, "rodzaj": "obiekt", "nazwa": "a", "zdarzenie": "koniec",
+     "stan": "old", "ms": 37.5}
+- zdarzenia: start, koniec (stan końcowy + ms od startu), status (proces= zapisany przez status.py)
+- wiele procesów naraz: każde zdarzenie to JEDEN zapis w trybie append (plik otwierany na chwilę,
+  więc rotacja działa też na Windows)
+- rotacja: plik > PLAMA_DZIENNIK_MB (domyślnie 5) → zdarzenia.1.jsonl, .2, ... najwyżej
+  PLAMA_DZIENNIK_PLIKI (domyślnie 3) starych plików; najstarszy przepada
+- PLAMA_DZIENNIK=0 wyłącza zapis (czytanie dalej działa)
+
+Zapis:
+    bieg = dziennik.Bieg("obiekt", "a")      # zdarzenie start
+    ...
+    bieg.koniec("old")                       # zdarzenie koniec z czasem trwania
+
+Śledzenie (mapa, narzędzia) — bez ponownego czytania całego pliku:
+    czytnik = dziennik.Czytnik()             # od bieżącego końca
+    for z in czytnik.nowe(): ...             # tylko to, co doszło od ostatniego wywołania
+
+    python dziennik.py                 # ostatnie 20 zdarzeń
+    python dziennik.py --sledz         # jak tail -f
+    python dziennik.py --statystyki 10 # przepustowość i czasy z ostatnich 10 minut
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+KATALOG = HERE / "dziennik"
+PLIK = KATALOG / "zdarzenia.jsonl"
+ZAMEK = KATALOG / ".rotacja"
+
+WLACZONY = os.environ.get("PLAMA_DZIENNIK", "1").strip() != "0"
+try:
+    MAX_BAJTOW = max(1, int(float(os.environ.get("PLAMA_DZIENNIK_MB", "5")) * 1024 * 1024))
+except ValueError:
+    MAX_BAJTOW = 5 * 1024 * 1024
+try:
+    STARYCH_PLIKOW = max(1, int(os.environ.get("PLAMA_DZIENNIK_PLIKI", "3")))
+except ValueError:
+    STARYCH_PLIKOW = 3
+ZAMEK_NIEAKTUALNY_S = 10.0   # zamek rotacji po padniętym procesie
+
+_lock = threading.Lock()
+
+
+def plik_rotowany(n: int) -> Path:
+    return KATALOG / f"zdarzenia.{n}.jsonl"
+
+
+def rodzaj_i_nazwa(path):
+    """("obiekt" | "linia", folder) dla pliku / folderu obiektu albo linii."""
+    folder = Path(path)
+    if folder.suffix:
+        folder = folder.parent
+    rodzaj = {"obiekty": "obiekt", "linie": "linia"}.get(folder.parent.name, folder.parent.name)
+    return rodzaj, folder.name
+
+
+# =========================
+# ZAPIS
+# =========================
+def _rotuj():
+    """Przesuwa zdarzenia.jsonl → .1 → .2 ...; robi to jeden proces naraz (zamek O_EXCL)."""
+    try:
+        fd = os.open(str(ZAMEK), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - ZAMEK.stat().st_mtime > ZAMEK_NIEAKTUALNY_S:
+                ZAMEK.unlink()
+        except OSError:
+            pass
+        return   # rotuje ktoś inny — dopisujemy dalej do bieżącego pliku
+    except OSError:
+        return
+    try:
+        os.close(fd)
+        try:
+            if PLIK.stat().st_size < MAX_BAJTOW:
+                return   # inny proces zdążył już zrotować
+        except OSError:
+            return
+        for n in range(STARYCH_PLIKOW, 1, -1):
+            if plik_rotowany(n - 1).exists():
+                os.replace(str(plik_rotowany(n - 1)), str(plik_rotowany(n)))
+        os.replace(str(PLIK), str(plik_rotowany(1)))
+    except OSError as e:
+        print(f"[dziennik] rotacja nieudana: {e}")
+    finally:
+        try:
+            ZAMEK.unlink()
+        except OSError:
+            pass
+
+
+def zdarzenie(rodzaj: str, nazwa: str, zdarzenie: str, **pola):
+    """Dopisuje jedno zdarzenie. Nigdy nie rzuca — dziennik nie może zatrzymać obiektu ani linii."""
+    if not WLACZONY:
+        return
+    wpis = {"t": round(time.time(), 3), "pid": os.getpid(), "rodzaj": rodzaj, "nazwa": nazwa,
+            "zdarzenie": zdarzenie}
+    wpis.update({k: v for k, v in pola.items() if v is not None})
+    linia = (json.dumps(wpis, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        with _lock:
+            KATALOG.mkdir(parents=True, exist_ok=True)
+            try:
+                if PLIK.stat().st_size >= MAX_BAJTOW:
+                    _rotuj()
+            except OSError:
+                pass
+            fd = os.open(str(PLIK), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, linia)
+            finally:
+                os.close(fd)
+    except OSError as e:
+        print(f"[dziennik] nie zapisano zdarzenia: {e}")
+
+
+class Bieg:
+    """Jeden przebieg obiektu / linii: start przy tworzeniu, koniec (stan + ms) raz."""
+
+    def __init__(self, rodzaj: str, nazwa: str, **pola):
+        self.rodzaj = rodzaj
+        self.nazwa = nazwa
+        self._t0 = time.perf_counter()
+        self._koniec = False
+        zdarzenie(rodzaj, nazwa, "start", **pola)
+
+    def koniec(self, stan: str, **pola):
+        if self._koniec:
+            return
+        self._koniec = True
+        ms = round((time.perf_counter() - self._t0) * 1000.0, 1)
+        zdarzenie(self.rodzaj, self.nazwa, "koniec", stan=stan, ms=ms, **pola)
+
+
+# =========================
+# ODCZYT
+# =========================
+def _parsuj(linie) -> list:
+    out = []
+    for raw in linie:
+        try:
+            out.append(json.loads(raw))
+        except ValueError:
+            pass   # urwana / uszkodzona linia (np. po twardym wyłączeniu) — pomijamy
+    return out
+
+
+class Czytnik:
+    """
+    Przyrostowe śledzenie dziennika: nowe() zwraca tylko zdarzenia dopisane od poprzedniego wywołania.
+    Pamięta (inode, pozycję); po rotacji dokańcza stary plik (teraz zdarzenia.1.jsonl), potem nowy od 0.
+    """
+
+    def __init__(self, od_poczatku: bool = False):
+        self._ino = None
+        self._poz = 0
+        self._reszta = b""
+        if not od_poczatku:
+            try:
+                st = PLIK.stat()
+                self._ino, self._poz = st.st_ino, st.st_size
+            except OSError:
+                pass
+
+    def _czytaj(self, path: Path) -> list:
+        try:
+            with open(path, "rb") as f:
+                f.seek(self._poz)
+                blok = f.read()
+        except OSError:
+            return []
+        self._poz += len(blok)
+        blok = self._reszta + blok
+        *pelne, self._reszta = blok.split(b"\n")   # ostatni kawałek bez \n czeka na dopisanie
+        return _parsuj(raw.decode("utf-8", errors="replace") for raw in pelne if raw.strip())
+
+    def nowe(self) -> list:
+        try:
+            st = PLIK.stat()
+        except OSError:
+            return []
+        out = []
+        if self._ino is not None and st.st_ino != self._ino:
+            # stary plik jest teraz zdarzenia.k.jsonl (k > 1, gdy rotacji było kilka) → jego reszta,
+            # potem w całości młodsze rotowane pliki, na końcu bieżący
+            rotowane = []
+            for n in range(1, STARYCH_PLIKOW + 1):
+                try:
+                    rotowane.append((plik_rotowany(n), plik_rotowany(n).stat().st_ino))
+                except OSError:
+                    break
+            k = next((i for i, (_, ino) in enumerate(rotowane) if ino == self._ino), None)
+            if k is not None:
+                out += self._czytaj(rotowane[k][0])
+                for path, _ in reversed(rotowane[:k]):
+                    self._poz, self._reszta = 0, b""
+                    out += self._czytaj(path)
+            self._poz, self._reszta = 0, b""
+        elif st.st_size < self._poz:
+            self._poz, self._reszta = 0, b""   # plik wyczyszczony ręcznie
+        self._ino = st.st_ino
+        out += self._czytaj(PLIK)
+        return out
+
+
+def ogon(n: int = 100) -> list:
+    """Ostatnie n zdarzeń (z bieżącego pliku, w razie potrzeby także z ostatnio zrotowanego)."""
+    wynik = deque(maxlen=n)
+    for path in (plik_rotowany(1), PLIK):
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                wynik.extend(_parsuj(f))
+        except OSError:
+            pass
+    return list(wynik)
+
+
+def statystyki(zdarzenia: list) -> dict:
+    """{(rodzaj, nazwa): {"biegi", "bledy", "sr_ms", "max_ms"}} z zdarzeń koniec."""
+    out = {}
+    for z in zdarzenia:
+        if z.get("zdarzenie") != "koniec":
+            continue
+        s = out.setdefault((z.get("rodzaj", ""), z.get("nazwa", "")),
+                           {"biegi": 0, "bledy": 0, "suma_ms": 0.0, "max_ms": 0.0})
+        ms = float(z.get("ms") or 0.0)
+        s["biegi"] += 1
+        s["bledy"] += z.get("stan") in ("error", "lag")
+        s["suma_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+    for s in out.values():
+        s["sr_ms"] = round(s.pop("suma_ms") / s["biegi"], 1)
+    return out
+
+
+def opis(z: dict) -> str:
+    ts = time.strftime("%H:%M:%S", time.localtime(z.get("t", 0)))
+    reszta = " ".join(f"{k}={v}" for k, v in z.items() if k not in ("t", "pid", "rodzaj", "nazwa", "zdarzenie"))
+    return f"[{ts}] {z.get('rodzaj', '')}/{z.get('nazwa', '')} {z.get('zdarzenie', '')} {reszta}".rstrip()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--sledz" in args:
+        czytnik = Czytnik()
+        try:
+            while True:
+                for z in czytnik.nowe():
+                    print(opis(z), flush=True)
+                time.sleep(0.25)
+        except KeyboardInterrupt:
+            pass
+    elif "--statystyki" in args:
+        i = args.index("--statystyki")
+        try:
+            minuty = float(args[i + 1]) if len(args) > i + 1 else 10.0
+        except ValueError:
+            minuty = 10.0
+        od = time.time() - minuty * 60.0
+        zd = [z for z in ogon(1_000_000) if z.get("t", 0) >= od] if minuty > 0 else []
+        biegi = sum(1 for z in zd if z.get("zdarzenie") == "koniec")
+        if not zd:
+            print(f"ostatnie {minuty:g} min: brak danych")
+        else:
+            print(f"ostatnie {minuty:g} min: {len(zd)} zdarzeń, {biegi} przebiegów ({biegi / minuty:.1f}/min)")
+        for (rodzaj, nazwa), s in sorted(statystyki(zd).items(), key=lambda kv: -kv[1]["biegi"]):
+            print(f"  {rodzaj}/{nazwa}: {s['biegi']}× śr. {s['sr_ms']} ms, max {s['max_ms']} ms, błędy {s['bledy']}")
+    else:
+        for z in ogon(20):
+            print(opis(z))
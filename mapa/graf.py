@@ -0,0 +1,332 @@
+"""
+Harmonogram całej mapy jako DAG:
+    węzły = obiekty/<folder> (id.txt), krawędzie = linie/<folder> (AB.txt: obiekt_A → obiekt_B, L_id.txt)
+
+- wykrywanie cykli (przebieg z cyklem nie startuje, raport pokazuje pętlę)
+- przebieg od wybranych korzeni (domyślnie: obiekty bez linii wejściowych) po wszystkim, co osiągalne
+- węzeł startuje, gdy skończą się WSZYSTKIE jego poprzedniki w przebiegu; wejście.txt = wyjścia
+  poprzedników sklejone w kolejności L_id (jeden poprzednik → zwykła kopia jak w linii)
+- niezależne gałęzie naraz (PLAMA_GRAF_ROWNOLEGLE); każdy proces.py to osobny proces
+  (albo ciepły robotnik z pula.py) — wątki tutaj tylko pilnują procesów
+- błąd / lag / stop węzła → jego potomkowie pominięci, reszta grafu leci dalej
+- stan na mapie bez zmian w PLAMA: proces=on/old/error/lag w mapa_dane.txt i linia_dane.txt
+- raport: id przebiegu, czasy węzłów, ścieżka krytyczna → mapa/przebiegi/<id>.json + lancuch_log.txt
+
+    python graf.py                  # cały graf od obiektów bez wejść
+    python graf.py 3 7              # od obiektów o id 3 i 7
+    python graf.py --sprawdz        # tylko budowa grafu + cykle, bez uruchamiania
+"""
+
+import os
+import sys
+import json
+import time
+import secrets
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Optional
+
+HERE = Path(__file__).resolve().parent
+if str(HERE) not in sys.path:
+    sys.path.insert(0, str(HERE))
+
+import lancuch
+from indeks_id import indeks_obiektow, indeks_linii
+
+try:
+    ROWNOLEGLE = max(0, int(os.environ.get("PLAMA_GRAF_ROWNOLEGLE", "0")))
+except ValueError:
+    ROWNOLEGLE = 0
+ROWNOLEGLE = ROWNOLEGLE or max(4, os.cpu_count() or 1)   # 0 / brak → wg liczby rdzeni
+PRZEBIEGI_DIR = HERE / "przebiegi"
+
+# stany węzła w raporcie (poza proces=... z wykonaj_obiekt)
+POMINIETY = "pominięty"
+ZEWNETRZNY = "zewnętrzny"   # własny start.py (agent) — odpalony po staremu, łańcuch dalej prowadzi sam
+
+
+class Krawedz:
+    __slots__ = ("l_id", "linia", "a", "b")
+
+    def __init__(self, l_id: str, linia: Path, a: str, b: str):
+        self.l_id = l_id
+        self.linia = linia
+        self.a = a
+        self.b = b
+
+
+# =========================
+# GRAF
+# =========================
+class Graf:
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self.obiekty = {k: v for k, v in indeks_obiektow(self.root).wszystkie().items()}
+        self.krawedzie = []
+        self.nast = {}      # id → [Krawedz] wychodzące
+        self.poprz = {}     # id → [Krawedz] wchodzące
+        self.ostrzezenia = []
+
+        for l_id, linia in indeks_linii(self.root).wszystkie().items():
+            try:
+                a, b = lancuch.parse_ab(linia / "AB.txt")
+            except RuntimeError:
+                self.ostrzezenia.append(f"{linia.name}: AB.txt niepoprawny")
+                continue
+            brak = [x for x in (a, b) if x not in self.obiekty]
+            if brak:
+                self.ostrzezenia.append(f"{linia.name}: brak obiektu id={', '.join(brak)}")
+                continue
+            k = Krawedz(l_id, linia, a, b)
+            self.krawedzie.append(k)
+            self.nast.setdefault(a, []).append(k)
+            self.poprz.setdefault(b, []).append(k)
+
+        for lista in list(self.nast.values()) + list(self.poprz.values()):
+            lista.sort(key=lambda k: lancuch._klucz_id(k.l_id))
+
+    def nazwa(self, v: str) -> str:
+        p = self.obiekty.get(v)
+        return p.name if p else f"id={v}"
+
+    def korzenie(self) -> list:
+        """Obiekty bez linii wejściowych, ale z co najmniej jedną wychodzącą."""
+        return sorted((v for v in self.nast if v not in self.poprz), key=lancuch._klucz_id)
+
+    def osiagalne(self, korzenie) -> set:
+        out, stos = set(), list(korzenie)
+        while stos:
+            v = stos.pop()
+            if v in out or v not in self.obiekty:
+                continue
+            out.add(v)
+            stos.extend(k.b for k in self.nast.get(v, ()))
+        return out
+
+    def cykl(self, wezly: set) -> Optional[list]:
+        """Pierwszy znaleziony cykl (lista id, pierwszy == ostatni) albo None. DFS bez rekurencji."""
+        BIALY, SZARY, CZARNY = 0, 1, 2
+        kolor = {v: BIALY for v in wezly}
+        for start in sorted(wezly, key=lancuch._klucz_id):
+            if kolor[start] != BIALY:
+                continue
+            sciezka = [start]
+            iteratory = [iter(self.nast.get(start, ()))]
+            kolor[start] = SZARY
+            while iteratory:
+                k = next(iteratory[-1], None)
+                if k is None:
+                    kolor[sciezka.pop()] = CZARNY
+                    iteratory.pop()
+                    continue
+                if k.b not in kolor:
+                    continue
+                if kolor[k.b] == SZARY:
+                    return sciezka[sciezka.index(k.b):] + [k.b]
+                if kolor[k.b] == BIALY:
+                    kolor[k.b] = SZARY
+                    sciezka.append(k.b)
+                    iteratory.append(iter(self.nast.get(k.b, ())))
+        return None
+
+    def wejscia(self, v: str, wezly: set) -> list:
+        return [k for k in self.poprz.get(v, ()) if k.a in wezly]
+
+    def porzadek(self, wezly: set) -> list:
+        """Kolejność topologiczna (Kahn) — do ścieżki krytycznej."""
+        stopien = {v: len(self.wejscia(v, wezly)) for v in wezly}
+        gotowe = sorted((v for v, s in stopien.items() if s == 0), key=lancuch._klucz_id)
+        out = []
+        while gotowe:
+            v = gotowe.pop(0)
+            out.append(v)
+            for k in self.nast.get(v, ()):
+                if k.b in stopien:
+                    stopien[k.b] -= 1
+                    if stopien[k.b] == 0:
+                        gotowe.append(k.b)
+        return out
+
+
+# =========================
+# PRZEBIEG
+# =========================
+def nowy_id_przebiegu() -> str:
+    return datetime.datetime.now().strftime("%Y%m%d-%H%M%S-") + secrets.token_hex(2)
+
+
+class PrzebiegGrafu:
+    def __init__(self, graf: Graf, korzenie=None, rownolegle: int = ROWNOLEGLE):
+        self.graf = graf
+        self.id = nowy_id_przebiegu()
+        self.korzenie = [str(v) for v in (korzenie or graf.korzenie())]
+        self.wezly = graf.osiagalne(self.korzenie)
+        self.rownolegle = rownolegle
+        self.stany = {}     # id → stan końcowy
+        self.czasy = {}     # id → (start_s, koniec_s) względem startu przebiegu
+        self.t0 = None
+
+    def _log(self, txt: str):
+        lancuch.log_lancucha(f"[graf {self.id}] {txt}")
+
+    def _wejscie(self, v: str) -> bool:
+        """Wyjścia poprzedników → wejście v (linie świecą proces=on, potem off). False = brak wejście.txt."""
+        wejscia = self.graf.wejscia(v, self.wezly)
+        if not wejscia:
+            return True   # korzeń przebiegu: bierze to, co ma w wejście.txt
+        for k in wejscia:
+            lancuch.ustaw_proces(k.linia / "linia_dane.txt", "on")
+        data = "\n".join(
+            lancuch.wczytaj(self.graf.obiekty[k.a] / "wyjście.txt").strip() for k in wejscia
+        )
+        opis = lancuch.wpisz_wejscie(self.graf.obiekty[v], data)
+        for k in wejscia:
+            lancuch.log_linii(k.linia, f"[GRAF {self.id}] {opis or '[LINIA ERROR] B nie ma wejście.txt — STOP'}")
+            threading.Timer(lancuch.LINIA_WIDOCZNA_S, lancuch.ustaw_proces,
+                            args=(k.linia / "linia_dane.txt", "off")).start()
+        return opis is not None
+
+    def _wykonaj(self, v: str):
+        start = time.perf_counter() - self.t0
+        obj = self.graf.obiekty[v]
+        try:
+            if not self._wejscie(v):
+                stan = "error"
+            elif lancuch.wezel_z_szablonu(obj):
+                stan = lancuch.wykonaj_obiekt(obj)
+            else:
+                lancuch.odpal_start(obj)
+                stan = ZEWNETRZNY
+        except Exception as e:
+            # błąd jednego węzła (np. OSError przy wejście.txt / starcie) = jego "error", nie koniec przebiegu
+            self._log(f"{self.graf.nazwa(v)}: wyjątek {e!r}")
+            lancuch.log_obiektu(obj, f"ERROR: {e}")
+            try:
+                lancuch.ustaw_proces(obj / "mapa_dane.txt", "error", natychmiast=True)
+            except OSError:
+                pass
+            stan = "error"
+        return v, stan, start, time.perf_counter() - self.t0
+
+    def uruchom(self) -> dict:
+        cykl = self.graf.cykl(self.wezly)
+        if cykl:
+            opis = " → ".join(self.graf.nazwa(v) for v in cykl)
+            self._log(f"CYKL: {opis} — przebieg nie startuje")
+            return self.raport(cykl=cykl)
+
+        self.t0 = time.perf_counter()
+        self._log(f"start: korzenie {self.korzenie}, {len(self.wezly)} węzłów, do {self.rownolegle} naraz")
+        czeka = {v: len(self.graf.wejscia(v, self.wezly)) for v in self.wezly}
+        nieudane_poprz = {v: False for v in self.wezly}
+
+        with ThreadPoolExecutor(max_workers=self.rownolegle, thread_name_prefix="graf") as pula:
+            w_toku = {pula.submit(self._wykonaj, v) for v in self.wezly if czeka[v] == 0}
+            while w_toku:
+                gotowe, w_toku = wait(w_toku, return_when=FIRST_COMPLETED)
+                do_sprawdzenia = []
+                for f in gotowe:
+                    v, stan, start, koniec = f.result()
+                    self.stany[v] = stan
+                    self.czasy[v] = (start, koniec)
+                    self._log(f"{self.graf.nazwa(v)}: {stan} ({(koniec - start) * 1000.0:.1f} ms)")
+                    do_sprawdzenia.append(v)
+
+                # zwolnij następników; pominięcie idzie w dół grafu bez uruchamiania
+                while do_sprawdzenia:
+                    v = do_sprawdzenia.pop()
+                    dalej = self.stany[v] == "old"
+                    for k in self.graf.nast.get(v, ()):
+                        if k.b not in czeka:
+                            continue
+                        if not dalej:
+                            nieudane_poprz[k.b] = True
+                        czeka[k.b] -= 1
+                        if czeka[k.b] > 0:
+                            continue
+                        if nieudane_poprz[k.b]:
+                            self.stany[k.b] = POMINIETY
+                            do_sprawdzenia.append(k.b)
+                        else:
+                            w_toku.add(pula.submit(self._wykonaj, k.b))
+
+        raport = self.raport()
+        sciezka = " → ".join(f"{self.graf.nazwa(v)}" for v in raport["sciezka_krytyczna"])
+        self._log(f"koniec: {raport['czas_ms']:.1f} ms, ścieżka krytyczna {sciezka} "
+                  f"({raport['sciezka_krytyczna_ms']:.1f} ms)")
+        return raport
+
+    def sciezka_krytyczna(self):
+        """Najdłuższa (po czasie węzłów) ścieżka wśród wykonanych węzłów."""
+        najlepsze = {}   # v → (czas ścieżki kończącej się w v, poprzednik)
+        for v in self.graf.porzadek(self.wezly):
+            if v not in self.czasy:
+                continue
+            start, koniec = self.czasy[v]
+            przed = max(((najlepsze[k.a][0], k.a) for k in self.graf.wejscia(v, self.wezly) if k.a in najlepsze),
+                        default=(0.0, None))
+            najlepsze[v] = (przed[0] + (koniec - start), przed[1])
+        if not najlepsze:
+            return [], 0.0
+        v = max(najlepsze, key=lambda x: najlepsze[x][0])
+        razem = najlepsze[v][0]
+        sciezka = []
+        while v is not None:
+            sciezka.append(v)
+            v = najlepsze[v][1]
+        return sciezka[::-1], razem
+
+    def raport(self, cykl=None) -> dict:
+        sciezka, sciezka_s = self.sciezka_krytyczna()
+        koniec = max((k for _, k in self.czasy.values()), default=0.0)
+        raport = {
+            "id": self.id,
+            "korzenie": self.korzenie,
+            "cykl": cykl,
+            "czas_ms": koniec * 1000.0,
+            "wezly": {
+                v: {
+                    "folder": self.graf.nazwa(v),
+                    "stan": self.stany.get(v),
+                    "start_ms": self.czasy[v][0] * 1000.0 if v in self.czasy else None,
+                    "czas_ms": (self.czasy[v][1] - self.czasy[v][0]) * 1000.0 if v in self.czasy else None,
+                }
+                for v in sorted(self.wezly, key=lancuch._klucz_id)
+            },
+            "sciezka_krytyczna": sciezka,
+            "sciezka_krytyczna_ms": sciezka_s * 1000.0,
+            "ostrzezenia": self.graf.ostrzezenia,
+        }
+        try:
+            lancuch.zapisz_atomowo(PRZEBIEGI_DIR / f"{self.id}.json", json.dumps(raport, ensure_ascii=False, indent=2))
+        except OSError as e:
+            self._log(f"nie zapisano raportu: {e}")
+        return raport
+
+
+def uruchom_graf(root: Path, korzenie=None) -> dict:
+    return PrzebiegGrafu(Graf(root), korzenie).uruchom()
+
+
+if __name__ == "__main__":
+    argumenty = [a for a in sys.argv[1:] if not a.startswith("--")]
+    graf = Graf(HERE.parent)
+    for o in graf.ostrzezenia:
+        print(f"[graf] UWAGA: {o}")
+
+    if "--sprawdz" in sys.argv[1:]:
+        wezly = graf.osiagalne(argumenty or graf.korzenie())
+        cykl = graf.cykl(wezly)
+        print(f"[graf] {len(graf.obiekty)} obiektów, {len(graf.krawedzie)} linii, korzenie {graf.korzenie()}")
+        print(f"[graf] cykl: {' → '.join(graf.nazwa(v) for v in cykl)}" if cykl else "[graf] brak cykli")
+        sys.exit(1 if cykl else 0)
+
+    raport = PrzebiegGrafu(graf, argumenty or None).uruchom()
+    print(f"[graf] przebieg {raport['id']}: " + ("CYKL" if raport["cykl"] else f"{raport['czas_ms']:.1f} ms"))
+    for v, w in raport["wezly"].items():
+        czas = f"{w['czas_ms']:.1f} ms" if w["czas_ms"] is not None else "-"
+        print(f"  {w['folder']:<30} {str(w['stan']):<12} {czas}")
+    print("  ścieżka krytyczna: " + " → ".join(graf.nazwa(v) for v in raport["sciezka_krytyczna"]))
+    sys.exit(1 if raport["cykl"] else 0)
@@ -0,0 +1,192 @@
+"""
+Wspólny indeks ID → folder:
+- obiekty/<folder>/id.txt   → indeks_obiektow(root)
+- linie/<folder>/L_id.txt   → indeks_linii(root)
+
+Zamiast przy każdym skoku łańcucha czytać id.txt WSZYSTKICH obiektów:
+- trafienie = 1 stat (sprawdzenie, że id.txt nie zmienił się od zapisu w indeksie)
+- skład folderów walidowany mtime katalogu bazowego (nowy / usunięty folder → listdir)
+- chybienie / nieaktualny wpis → przebieg samych stat() i odczyt TYLKO zmienionych plików
+- stan zapisywany atomowo w mapa/.indeks_id/*.json → kolejne procesy (linie, start.py)
+  startują z gotowym indeksem zamiast skanować
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Optional
+
+WERSJA = 1
+
+
+BRAK = [None, None]   # sygnatura nieistniejącego pliku id (folder bez id też jest w indeksie)
+
+
+def _sig(p: Path):
+    try:
+        st = p.stat()
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return BRAK
+
+
+def _czytaj_id(p: Path) -> str:
+    try:
+        return p.read_text(encoding="utf-8", errors="replace").strip()
+    except OSError:
+        return ""
+
+
+class IndeksId:
+    def __init__(self, baza: Path, plik_id: str, plik_cache: Optional[Path] = None):
+        self.baza = Path(baza)
+        self.plik_id = plik_id
+        self.plik_cache = Path(plik_cache) if plik_cache else None
+        self._lock = threading.Lock()
+        self._baza_mtime = None
+        self._wpisy = {}        # folder → [id, mtime_ns, rozmiar] pliku id ("" + BRAK, gdy go nie ma)
+        self._po_id = None      # id → folder (budowane leniwie z _wpisy)
+        self._zmieniony = False
+        self._wczytaj_cache()
+
+    # --- cache na dysku ---
+    def _wczytaj_cache(self):
+        if self.plik_cache is None:
+            return
+        try:
+            d = json.loads(self.plik_cache.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if d.get("wersja") != WERSJA or d.get("baza") != str(self.baza):
+            return
+        self._baza_mtime = d.get("baza_mtime")
+        self._wpisy = {k: v for k, v in d.get("wpisy", {}).items() if isinstance(v, list) and len(v) == 3}
+
+    def _zapisz_cache(self):
+        if self.plik_cache is None or not self._zmieniony:
+            return
+        dane = {"wersja": WERSJA, "baza": str(self.baza), "baza_mtime": self._baza_mtime, "wpisy": self._wpisy}
+        try:
+            self.plik_cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.plik_cache.with_name(f".{self.plik_cache.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(dane, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.plik_cache)
+            self._zmieniony = False
+        except OSError:
+            pass
+
+    # --- walidacja ---
+    def _ustaw(self, nazwa: str, wpis):
+        if self._wpisy.get(nazwa) != wpis:
+            if wpis is None:
+                self._wpisy.pop(nazwa, None)
+            else:
+                self._wpisy[nazwa] = wpis
+            self._po_id = None
+            self._zmieniony = True
+
+    def _wpis_z_dysku(self, nazwa: str):
+        p = self.baza / nazwa / self.plik_id
+        sig = _sig(p)
+        stary = self._wpisy.get(nazwa)
+        if stary is not None and stary[1:] == sig:
+            return stary
+        return [_czytaj_id(p) if sig != BRAK else ""] + sig
+
+    def _aktualny(self, nazwa: str) -> bool:
+        wpis = self._wpisy.get(nazwa)
+        return wpis is not None and wpis[1:] == _sig(self.baza / nazwa / self.plik_id)
+
+    def odswiez(self):
+        """Pełna walidacja: listdir tylko gdy zmienił się mtime bazy, dalej same stat()."""
+        baza_mtime = _sig(self.baza)[0]
+        if baza_mtime != self._baza_mtime or not self._wpisy:
+            try:
+                nazwy = {d.name for d in self.baza.iterdir() if d.is_dir()}
+            except OSError:
+                nazwy = set()
+            for nazwa in set(self._wpisy) - nazwy:
+                self._ustaw(nazwa, None)
+            self._baza_mtime = baza_mtime
+            self._zmieniony = True
+        else:
+            nazwy = set(self._wpisy)
+        for nazwa in nazwy:
+            self._ustaw(nazwa, self._wpis_z_dysku(nazwa))
+
+    def _mapa_id(self) -> dict:
+        if self._po_id is None:
+            po_id = {}
+            # kilka folderów z tym samym id → wygrywa pierwszy alfabetycznie (deterministycznie)
+            for nazwa in sorted(self._wpisy, reverse=True):
+                wartosc = self._wpisy[nazwa][0]
+                if wartosc:
+                    po_id[wartosc] = nazwa
+            self._po_id = po_id
+        return self._po_id
+
+    # --- API ---
+    def znajdz(self, wartosc: str) -> Optional[Path]:
+        """Folder o danym id (albo None). Trafienie w aktualny wpis = 1 stat."""
+        wartosc = (wartosc or "").strip()
+        if not wartosc:
+            return None
+        with self._lock:
+            nazwa = self._mapa_id().get(wartosc)
+            if nazwa is None or not self._aktualny(nazwa):
+                self.odswiez()
+                nazwa = self._mapa_id().get(wartosc)
+            self._zapisz_cache()
+            return (self.baza / nazwa) if nazwa else None
+
+    def id_folderu(self, folder: Path) -> str:
+        """Id zapisane w folderze (pusty string gdy brak) — bez ponownego odczytu, gdy plik się nie zmienił."""
+        nazwa = Path(folder).name
+        with self._lock:
+            if not self._aktualny(nazwa):
+                self._ustaw(nazwa, self._wpis_z_dysku(nazwa))
+                self._zapisz_cache()
+            wpis = self._wpisy.get(nazwa)
+            return wpis[0] if wpis else ""
+
+    def wszystkie(self) -> dict:
+        """Aktualna mapa id → folder (po pełnej walidacji)."""
+        with self._lock:
+            self.odswiez()
+            self._zapisz_cache()
+            return {k: self.baza / v for k, v in self._mapa_id().items()}
+
+
+# =========================
+# instancje per katalog główny (jedna na proces)
+# =========================
+_INSTANCJE = {}
+_INSTANCJE_LOCK = threading.Lock()
+
+
+def _indeks(root: Path, podfolder: str, plik_id: str) -> IndeksId:
+    root = Path(root).resolve()
+    klucz = (str(root), podfolder)
+    with _INSTANCJE_LOCK:
+        idx = _INSTANCJE.get(klucz)
+        if idx is None:
+            cache = root / "mapa" / ".indeks_id" / f"{podfolder}.json"
+            idx = _INSTANCJE[klucz] = IndeksId(root / podfolder, plik_id, cache)
+        return idx
+
+
+def indeks_obiektow(root: Path) -> IndeksId:
+    return _indeks(root, "obiekty", "id.txt")
+
+
+def indeks_linii(root: Path) -> IndeksId:
+    return _indeks(root, "linie", "L_id.txt")
+
+
+def znajdz_obiekt(root: Path, obj_id: str) -> Optional[Path]:
+    return indeks_obiektow(root).znajdz(obj_id)
+
+
+def znajdz_linie(root: Path, l_id: str) -> Optional[Path]:
+    return indeks_linii(root).znajdz(l_id)
@@ -0,0 +1,83 @@
+"""
+Indeks przestrzenny (siatka kubełków) dla dopasowań po XY.
+
+Zamiast porównywać punkt z każdym źródłem (O(N) na zapytanie), punkty trafiają
+do kubełków siatki o boku `krok`. Zapytanie z tolerancją `tol <= krok` sprawdza
+tylko kubełek punktu i jego sąsiadów → średnio O(1).
+"""
+
+import math
+
+
+class IndeksXY:
+    def __init__(self, krok: float = 1.0):
+        self.krok = float(krok)
+        self._kubelki = {}
+        self._ile = 0
+
+    def __len__(self):
+        return self._ile
+
+    def _klucz(self, x: float, y: float):
+        return (math.floor(x / self.krok), math.floor(y / self.krok))
+
+    def wyczysc(self):
+        self._kubelki = {}
+        self._ile = 0
+
+    def dodaj(self, x: float, y: float, obj):
+        self._kubelki.setdefault(self._klucz(x, y), []).append((float(x), float(y), obj))
+        self._ile += 1
+
+    def usun(self, obj, x: float = None, y: float = None) -> bool:
+        """Usuwa obiekt; ze znanym XY sprawdza tylko jeden kubełek."""
+        if x is not None and y is not None:
+            klucz = self._klucz(x, y)
+            lista = self._kubelki.get(klucz, [])
+            for i, (_, _, o) in enumerate(lista):
+                if o is obj:
+                    del lista[i]
+                    if not lista:
+                        del self._kubelki[klucz]
+                    self._ile -= 1
+                    return True
+        for klucz, lista in self._kubelki.items():
+            for i, (_, _, o) in enumerate(lista):
+                if o is obj:
+                    del lista[i]
+                    if not lista:
+                        del self._kubelki[klucz]
+                    self._ile -= 1
+                    return True
+        return False
+
+    def w_poblizu(self, x: float, y: float, tol: float):
+        """Wszystkie obiekty z |dx| <= tol i |dy| <= tol, posortowane od najbliższego (dx+dy)."""
+        zasieg = max(1, math.ceil(tol / self.krok))
+        kx, ky = self._klucz(x, y)
+        out = []
+        for ix in range(kx - zasieg, kx + zasieg + 1):
+            for iy in range(ky - zasieg, ky + zasieg + 1):
+                for sx, sy, obj in self._kubelki.get((ix, iy), ()):
+                    dx = abs(sx - x)
+                    dy = abs(sy - y)
+                    if dx <= tol and dy <= tol:
+                        out.append((dx + dy, obj))
+        out.sort(key=lambda t: t[0])
+        return [obj for _, obj in out]
+
+    def najblizszy(self, x: float, y: float, tol: float):
+        """Najbliższy obiekt w tolerancji albo None."""
+        wynik = self.w_poblizu(x, y, tol)
+        return wynik[0] if wynik else None
+
+
+def zbuduj(elementy, krok: float = 1.0) -> IndeksXY:
+    """Indeks z elementów typu dict z polami 'x' i 'y' (format SOURCE_CACHE)."""
+    idx = IndeksXY(krok)
+    for el in elementy:
+        try:
+            idx.dodaj(float(el.get('x', 0.0)), float(el.get('y', 0.0)), el)
+        except (TypeError, ValueError):
+            continue
+    return idx
@@ -0,0 +1,394 @@
+"""
+Wspólny klient HTTP agentów (agent binarny, wykonawca klasyczny): keep-alive + pamięć endpointów.
+
+- połączenia http.client trzymane otwarte per (schemat, host, port) — kolejne zapytania w tym samym
+  procesie (próba /run → fallback, retry po lagu) idą tym samym gniazdem; zerwane keep-alive
+  (serwer zamknął bezczynne połączenie) → jedno ponowienie na świeżym
+- błędy jak z urllib: HTTPError (kod >= 400), URLError (sieć), TimeoutError — agenci łapią to co dotąd
+- pamięć endpointów per serwer w mapa/.http_endpointy.json (wspólna dla procesów): który endpoint
+  odpowiada (/run albo /v1/chat/completions) — następne wywołanie w łańcuchu pomija próbę /run
+  i jej 404; wpis starszy niż PLAMA_HTTP_PAMIEC_S (domyślnie 3600 s) → próba od nowa
+- opóźnienie per endpoint (ile zapytań, średnia, ostatnie, max ms) zbierane w pamięci procesu,
+  dopisywane do tego samego pliku raz, przy wyjściu (atexit) — nie przy każdym zapytaniu
+- strumień (SSE, "stream": true): strumien() oddaje kawałki na bieżąco, ZapisStrumienia dopisuje
+  je do pliku z ograniczoną częstotliwością zapisu, post_chat_strumien() łączy jedno z drugim;
+  strumień zerwany w połowie → plik wraca do treści sprzed zapytania
+
+    body, headers = klient_http.post(url, payload, timeout)
+    for kawalek in klient_http.strumien(url, payload, timeout): tekst += tresc_kawalka(kawalek)
+    tekst = klient_http.post_chat_strumien(url, payload, timeout, PATH_WYJSCIE, log)
+    endpoint = klient_http.znany_endpoint(base)        # None → trzeba sprawdzić
+    klient_http.zapamietaj_endpoint(base, "/v1/chat/completions")
+"""
+
+import os
+import json
+import atexit
+import time
+import socket
+import tempfile
+import threading
+import http.client
+import urllib.error
+from urllib.parse import urlsplit
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+PLIK_PAMIECI = HERE / ".http_endpointy.json"
+try:
+    PAMIEC_S = float(os.environ.get("PLAMA_HTTP_PAMIEC_S", "3600"))
+except ValueError:
+    PAMIEC_S = 3600.0
+
+RUN = "/run"
+CHAT = "/v1/chat/completions"
+
+# błędy świadczące o tym, że serwer zamknął bezczynne połączenie keep-alive
+_ZERWANE = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError,
+            ConnectionAbortedError, BrokenPipeError)
+
+
+# =========================
+# POŁĄCZENIA
+# =========================
+class PulaPolaczen:
+    """Wolne połączenia per (schemat, host, port); jedno połączenie = jedno zapytanie naraz."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wolne = {}
+
+    def wez(self, klucz, timeout: float):
+        with self._lock:
+            lista = self._wolne.get(klucz)
+            if lista:
+                conn = lista.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        schemat, host, port = klucz
+        cls = http.client.HTTPSConnection if schemat == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def oddaj(self, klucz, conn):
+        with self._lock:
+            self._wolne.setdefault(klucz, []).append(conn)
+
+    def zamknij(self):
+        with self._lock:
+            wolne, self._wolne = self._wolne, {}
+        for lista in wolne.values():
+            for conn in lista:
+                conn.close()
+
+
+_PULA = PulaPolaczen()
+
+
+def _bez_nagle(conn):
+    try:
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except (AttributeError, OSError):
+        pass
+
+
+def _wyslij(url: str, payload: dict, timeout: float, naglowki: dict):
+    """POST na połączeniu z puli → (conn, resp, klucz, t0). Status NIE jest tu sprawdzany."""
+    u = urlsplit(url)
+    schemat = (u.scheme or "http").lower()
+    klucz = (schemat, u.hostname or "localhost", u.port or (443 if schemat == "https" else 80))
+    sciezka = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    dane = json.dumps(payload).encode("utf-8")
+    naglowki = dict({"Content-Type": "application/json; charset=utf-8", "Connection": "keep-alive"}, **naglowki)
+
+    for proba in (1, 2):
+        conn, uzywane = _PULA.wez(klucz, timeout)
+        t0 = time.perf_counter()
+        try:
+            if conn.sock is None:
+                conn.connect()
+                _bez_nagle(conn)   # nagłówki i treść to osobne send() → bez NODELAY ~40 ms na ACK
+            conn.request("POST", sciezka, body=dane, headers=naglowki)
+            return conn, conn.getresponse(), klucz, t0
+        except _ZERWANE as e:
+            conn.close()
+            if uzywane and proba == 1:
+                continue   # stare połączenie z puli już nie żyło → raz na świeżym
+            raise urllib.error.URLError(e)
+        except socket.timeout:
+            conn.close()
+            raise TimeoutError(f"timeout {timeout}s: {url}")
+        except OSError as e:
+            conn.close()
+            raise urllib.error.URLError(e)
+    raise urllib.error.URLError("połączenie zerwane")
+
+
+def _zakoncz(url: str, conn, resp, klucz, t0: float):
+    """Odpowiedź przeczytana do końca → połączenie wraca do puli, opóźnienie zapisane."""
+    ms = (time.perf_counter() - t0) * 1000.0
+    if resp.will_close:
+        conn.close()
+    else:
+        _PULA.oddaj(klucz, conn)
+    u = urlsplit(url)
+    zapisz_opoznienie(f"{klucz[0]}://{u.netloc}", u.path or "/", ms)
+
+
+def _czytaj(conn, resp, url: str, timeout: float, linia: bool = False) -> bytes:
+    try:
+        return resp.readline() if linia else resp.read()
+    except socket.timeout:
+        conn.close()
+        raise TimeoutError(f"timeout {timeout}s: {url}")
+    except (OSError, http.client.HTTPException) as e:
+        conn.close()
+        raise urllib.error.URLError(e)
+
+
+def post(url: str, payload: dict, timeout: float = 60):
+    """POST JSON → (body_text, headers_dict). Rzuca HTTPError / URLError / TimeoutError jak urlopen."""
+    conn, resp, klucz, t0 = _wyslij(url, payload, timeout, {})
+    body = _czytaj(conn, resp, url, timeout)
+    _zakoncz(url, conn, resp, klucz, t0)
+    if resp.status >= 400:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.msg, None)
+    return body.decode("utf-8", errors="replace"), dict(resp.getheaders())
+
+
+def strumien(url: str, payload: dict, timeout: float = 60):
+    """
+    POST ze "stream": true → kolejne obiekty JSON z linii `data: ...` (SSE), do `data: [DONE]`.
+    Serwer bez SSE (zwykły JSON) → jeden obiekt z całą odpowiedzią. timeout = cisza między kawałkami.
+    Połączenie zamknięte przed [DONE] → URLError (odpowiedź niepełna). Strumień porzucony przez
+    wołającego (break, wyjątek) → połączenie zamknięte, nie wraca do puli.
+    """
+    payload = dict(payload, stream=True)
+    conn, resp, klucz, t0 = _wyslij(url, payload, timeout, {"Accept": "text/event-stream"})
+    if resp.status >= 400:
+        _czytaj(conn, resp, url, timeout)
+        _zakoncz(url, conn, resp, klucz, t0)
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.msg, None)
+
+    if "text/event-stream" not in (resp.getheader("Content-Type") or "").lower():
+        body = _czytaj(conn, resp, url, timeout)
+        _zakoncz(url, conn, resp, klucz, t0)
+        try:
+            yield json.loads(body.decode("utf-8", errors="replace"))
+        except ValueError:
+            yield {"tekst": body.decode("utf-8", errors="replace")}
+        return
+
+    oddane = False
+    try:
+        koniec = False
+        while not koniec:
+            raw = _czytaj(conn, resp, url, timeout, linia=True)
+            if not raw:
+                raise urllib.error.URLError("strumień urwany przed [DONE]")
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line.startswith("data:"):
+                continue   # komentarze SSE, event:, puste separatory
+            dane = line[5:].strip()
+            if dane == "[DONE]":
+                koniec = True
+                continue
+            try:
+                yield json.loads(dane)
+            except ValueError:
+                pass
+        _czytaj(conn, resp, url, timeout)   # reszta (pusta linia po [DONE]) → połączenie do ponownego użycia
+        _zakoncz(url, conn, resp, klucz, t0)
+        oddane = True
+    finally:
+        if not oddane:
+            conn.close()   # przerwane w połowie (błąd, GeneratorExit) → nie do puli, z resztą strumienia
+
+
+def tresc_kawalka(kawalek: dict) -> str:
+    """Tekst z kawałka strumienia: choices[0].delta.content (albo message.content / tekst bez SSE)."""
+    try:
+        wybor = (kawalek.get("choices") or [{}])[0]
+        return ((wybor.get("delta") or {}).get("content")
+                or (wybor.get("message") or {}).get("content")
+                or wybor.get("text") or kawalek.get("content") or kawalek.get("tekst") or "")
+    except (AttributeError, IndexError, TypeError):
+        return ""
+
+
+class ZapisStrumienia:
+    """
+    Dopisywanie tokenów do pliku (np. wyjście.txt) w trakcie generowania: plik czyszczony na starcie,
+    zapis na dysk najwyżej co PLAMA_STRUMIEN_MS (domyślnie 200 ms) — nie przy każdym tokenie.
+    porzuc() zamyka i przywraca treść sprzed startu (albo pusty plik, jeśli go nie było).
+    """
+    try:
+        ODSTEP = max(0, int(os.environ.get("PLAMA_STRUMIEN_MS", "200"))) / 1000.0
+    except ValueError:
+        ODSTEP = 0.2
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            self._poprzednie = self.path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            self._poprzednie = ""
+        self._f = open(self.path, "w", encoding="utf-8", errors="replace")
+        self._bufor = []
+        self._ostatni = time.monotonic()
+
+    def dopisz(self, tekst: str):
+        if not tekst:
+            return
+        self._bufor.append(tekst)
+        if time.monotonic() - self._ostatni >= self.ODSTEP:
+            self.wypchnij()
+
+    def wypchnij(self):
+        if self._bufor:
+            self._f.write("".join(self._bufor))
+            self._f.flush()
+            self._bufor = []
+        self._ostatni = time.monotonic()
+
+    def zamknij(self):
+        try:
+            self.wypchnij()
+        finally:
+            self._f.close()
+
+    def porzuc(self):
+        self._bufor = []
+        self._f.close()
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=str(self.path.parent))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self._poprzednie)
+            os.replace(tmp, str(self.path))
+        except OSError:
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+
+def post_chat_strumien(url: str, payload: dict, timeout: float, path, log=print) -> str:
+    """SSE (stream): tokeny dopisywane do path w trakcie generowania, zapis co PLAMA_STRUMIEN_MS."""
+    log(f"POST → {url} (strumień, timeout={timeout}s)")
+    zapis = ZapisStrumienia(path)
+    tekst = []
+    try:
+        for kawalek in strumien(url, payload, timeout):
+            t = tresc_kawalka(kawalek)
+            if not t:
+                continue
+            if not tekst:
+                log("[STRUMIEŃ] pierwszy kawałek odpowiedzi")
+            tekst.append(t)
+            zapis.dopisz(t)
+    except BaseException:
+        zapis.porzuc()   # zerwane w połowie → bez uciętej odpowiedzi w pliku
+        raise
+    zapis.zamknij()
+    wynik = "".join(tekst)
+    log(f"[STRUMIEŃ] koniec, len={len(wynik)}")
+    return wynik
+
+
+# =========================
+# PAMIĘĆ ENDPOINTÓW
+# =========================
+_pamiec_lock = threading.Lock()
+
+
+def _wczytaj_pamiec() -> dict:
+    try:
+        dane = json.loads(PLIK_PAMIECI.read_text(encoding="utf-8"))
+        return dane if isinstance(dane, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _zmien_pamiec(zmiana):
+    """Odczyt → zmiana(dict) → zapis atomowy. Wyścig między procesami gubi co najwyżej wpis pamięci."""
+    with _pamiec_lock:
+        dane = _wczytaj_pamiec()
+        zmiana(dane)
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=str(HERE))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dane, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, str(PLIK_PAMIECI))
+        except (OSError, TypeError, ValueError):
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+
+def _klucz_serwera(base: str) -> str:
+    return base.rstrip("/").lower()
+
+
+def znany_endpoint(base: str):
+    """Endpoint, który ostatnio odpowiadał na tym serwerze (RUN / CHAT), albo None."""
+    wpis = _wczytaj_pamiec().get(_klucz_serwera(base)) or {}
+    if wpis.get("endpoint") and time.time() - float(wpis.get("czas", 0)) < PAMIEC_S:
+        return wpis["endpoint"]
+    return None
+
+
+def zapamietaj_endpoint(base: str, endpoint: str):
+    def _z(dane):
+        wpis = dane.setdefault(_klucz_serwera(base), {})
+        wpis["endpoint"], wpis["czas"] = endpoint, round(time.time(), 3)
+    _zmien_pamiec(_z)
+
+
+def zapomnij_endpoint(base: str):
+    def _z(dane):
+        wpis = dane.get(_klucz_serwera(base))
+        if wpis:
+            wpis.pop("endpoint", None)
+    _zmien_pamiec(_z)
+
+
+# (serwer, ścieżka) → {"n", "suma_ms", "ost_ms", "max_ms"} — tylko ten proces, do pliku przy wyjściu
+_opoznienia = {}
+
+
+def zapisz_opoznienie(base: str, sciezka: str, ms: float):
+    with _pamiec_lock:
+        s = _opoznienia.setdefault((_klucz_serwera(base), sciezka), {"n": 0, "suma_ms": 0.0, "max_ms": 0.0})
+        s["n"] += 1
+        s["suma_ms"] += ms
+        s["ost_ms"] = ms
+        s["max_ms"] = max(s["max_ms"], ms)
+
+
+def wypchnij_opoznienia():
+    """Zebrane opóźnienia → plik pamięci (scalone z wpisami innych procesów). Woła atexit."""
+    global _opoznienia
+    with _pamiec_lock:
+        zebrane, _opoznienia = _opoznienia, {}
+    if not zebrane:
+        return
+
+    def _z(dane):
+        for (serwer, sciezka), nowe in zebrane.items():
+            lat = dane.setdefault(serwer, {}).setdefault("opoznienie", {})
+            s = lat.setdefault(sciezka, {"n": 0, "sr_ms": 0.0, "max_ms": 0.0})
+            n = s["n"] + nowe["n"]
+            s["sr_ms"] = round((s["sr_ms"] * s["n"] + nowe["suma_ms"]) / n, 1)
+            s["n"] = n
+            s["ost_ms"] = round(nowe["ost_ms"], 1)
+            s["max_ms"] = round(max(s["max_ms"], nowe["max_ms"]), 1)
+    _zmien_pamiec(_z)
+
+
+atexit.register(wypchnij_opoznienia)
@@ -0,0 +1,440 @@
+"""
+Wykonawca łańcucha w JEDNYM procesie:
+    obiekt A → następny.txt → linia (L_id.txt) → AB.txt → obiekt B → następny.txt → ...
+
+- linia i obiekt z szablonu (znacznik LANCUCH_W_PROCESIE = True w ich start.py) obsługiwane
+  tutaj: kopiowanie wyjście.txt → wejście.txt, statusy proces=..., szukanie po ID (indeks_id)
+- osobny interpreter TYLKO dla proces.py użytkownika (albo ciepły robotnik z pula.py, gdy pula=1)
+- obiekt / linia z własnym start.py (np. agenci) → stary tryb: subprocess ich start.py
+- następny.txt z kilkoma L_id → wszystkie linie naraz (PLAMA_LANCUCH_ROWNOLEGLE, domyślnie 4)
+- czekaj=wszystkie w mapa_dane.txt B → B startuje dopiero z wejściami ze WSZYSTKICH linii do niego
+- opóźnienie każdego skoku: linia_log.txt linii, log.txt obiektu B i mapa/lancuch_log.txt
+- start / koniec (stan, ms) każdego obiektu i linii → wspólny dziennik zdarzeń (dziennik.py)
+
+Wołane z start.py obiektu po udanym proces.py (zamiast odpalania linie/<n>/start.py) albo ręcznie:
+    python lancuch.py <folder obiektu>      # start łańcucha od obiektu
+"""
+
+import os
+import sys
+import time
+import shutil
+import datetime
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+HERE = Path(__file__).resolve().parent
+if str(HERE) not in sys.path:
+    sys.path.insert(0, str(HERE))
+
+import pula
+import dziennik
+import sygnal_stop
+from status import ustaw_proces, zapisz_atomowo
+from indeks_id import znajdz_obiekt, znajdz_linie, indeks_linii
+
+ZNACZNIK = "LANCUCH_W_PROCESIE = True"
+TIMEOUT = 30              # max czas na proces.py (jak w start.py obiektu)
+LINIA_WIDOCZNA_S = 1.0    # tyle linia świeci „on” na mapie — bez wstrzymywania łańcucha
+LOG_LANCUCHA = HERE / "lancuch_log.txt"
+try:
+    ROWNOLEGLE = max(1, int(os.environ.get("PLAMA_LANCUCH_ROWNOLEGLE", "4")))   # gałęzie fan-out naraz
+except ValueError:
+    ROWNOLEGLE = 4
+BARIERA = ".bariera"      # B/.bariera/<L_id>.txt — wejścia czekające na komplet (czekaj=wszystkie)
+
+
+# =========================
+# UTILS
+# =========================
+def wczytaj(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except Exception:
+        return ""
+
+
+def _ts() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _dopisz(path: Path, txt: str):
+    try:
+        with open(path, "a", encoding="utf-8", errors="replace") as f:
+            f.write(txt)
+    except Exception:
+        pass
+
+
+def log_obiektu(obj: Path, txt: str):
+    _dopisz(obj / "log.txt", f"[{_ts()}] {txt}\n")
+
+
+def log_linii(linia: Path, txt: str):
+    _dopisz(linia / "linia_log.txt", f"[{_ts()}] {txt}\n")
+    sys.stdout.write(f"[{_ts()}] {txt}\n")   # jeden zapis → równoległe gałęzie nie sklejają linii
+
+
+def log_lancucha(txt: str):
+    _dopisz(LOG_LANCUCHA, f"[{_ts()}] {txt}\n")
+
+
+def w_procesie(start_py: Path) -> bool:
+    """Czy start.py to szablon, który łańcuch umie wykonać sam (znacznik w pliku)."""
+    return ZNACZNIK in wczytaj(start_py)
+
+
+def wezel_z_szablonu(obj: Path) -> bool:
+    """Obiekt, który łańcuch / graf wykonuje sam: start.py z szablonu + proces.py."""
+    return w_procesie(obj / "start.py") and (obj / "proces.py").exists()
+
+
+def _interpreter() -> str:
+    # pythonw (bez konsoli) nie nadaje się dla proces.py — tak jak start.py: zwykły python
+    exe = Path(sys.executable)
+    if exe.name.lower() == "pythonw.exe":
+        return str(exe.with_name("python.exe"))
+    return str(exe)
+
+
+def _bez_okna() -> dict:
+    if hasattr(subprocess, "CREATE_NO_WINDOW"):
+        return {"creationflags": subprocess.CREATE_NO_WINDOW}
+    return {}
+
+
+def odpal_start(folder: Path):
+    """Stary tryb: osobny proces start.py (obiekt / linia spoza szablonu)."""
+    subprocess.Popen([sys.executable, str(folder / "start.py")], cwd=str(folder), **_bez_okna())
+
+
+# =========================
+# OBIEKT
+# =========================
+def wykonaj_obiekt(obj: Path) -> str:
+    """
+    To samo co start.py obiektu, bez jego interpretera:
+    proces=on → proces.py (subprocess, limit czasu, stop.txt) → old / error / lag / off.
+    Zwraca stan końcowy ("old" = sukces).
+    """
+    bieg = dziennik.Bieg("obiekt", obj.name)
+    stan = "error"
+    try:
+        stan = _wykonaj_obiekt(obj)
+        return stan
+    finally:
+        bieg.koniec(stan)
+
+
+def _wykonaj_obiekt(obj: Path) -> str:
+    mapa = obj / "mapa_dane.txt"
+    zapisz_atomowo(obj / "log.txt", "=== START SESJI ===\n")
+    log_obiektu(obj, "start (łańcuch w procesie)")
+    ustaw_proces(mapa, "on")
+
+    proc_path = obj / "proces.py"
+    if not proc_path.exists():
+        log_obiektu(obj, "ERROR: brak proces.py")
+        ustaw_proces(mapa, "error", natychmiast=True)
+        return "error"
+
+    proc = pula.uruchom(proc_path, obj) if pula.obiekt_w_puli(mapa) else None
+    if proc is not None:
+        log_obiektu(obj, f"RUN (pula): python {proc_path}, robotnik pid={proc.pid}")
+    else:
+        log_obiektu(obj, f"RUN: python {proc_path}")
+        proc = subprocess.Popen([_interpreter(), str(proc_path)], cwd=str(obj), **_bez_okna())
+
+    # STOP: wspólny wątek sygnal_stop (os.stat zamiast czytania + hashowania co 0.2 s)
+    zatrzymany = threading.Event()
+
+    def _na_stop():
+        zatrzymany.set()
+        proc.kill()
+
+    uchwyt = sygnal_stop.obserwuj(obj / "stop.txt", _na_stop)
+    try:
+        proc.wait(timeout=TIMEOUT)
+    except subprocess.TimeoutExpired:
+        log_obiektu(obj, f"LAG: proces.py nie zakończył się w {TIMEOUT}s -> KILL")
+        ustaw_proces(mapa, "lag", natychmiast=True)
+        proc.kill()
+        zapisz_atomowo(obj / "wyjście.txt", f"LAG: proces.py nie zakończył się w {TIMEOUT}s")
+        return "lag"
+    finally:
+        sygnal_stop.przestan(uchwyt)
+
+    if zatrzymany.is_set():
+        log_obiektu(obj, "STOP: wykryto zmianę w stop.txt -> KILL proces.py")
+        ustaw_proces(mapa, "off", natychmiast=True)
+        zapisz_atomowo(obj / "wyjście.txt", "STOP: wykryto zmianę w stop.txt")
+        return "off"
+
+    rc = proc.returncode
+    log_obiektu(obj, f"EXIT: proces.py returncode={rc}")
+    if rc != 0:
+        ustaw_proces(mapa, "error", natychmiast=True)
+        zapisz_atomowo(obj / "wyjście.txt", f"BŁĄD: proces.py returncode={rc}")
+        return "error"
+
+    ustaw_proces(mapa, "old", natychmiast=True)
+    log_obiektu(obj, "SUKCES: proces.py zakończony poprawnie")
+    return "old"
+
+
+# =========================
+# LINIA
+# =========================
+def parse_ab(path: Path):
+    id_a = id_b = None
+    for raw in wczytaj(path).splitlines():
+        if "=" not in raw:
+            continue
+        k, v = raw.split("=", 1)
+        if k.strip().lower() == "obiekt_a":
+            id_a = v.strip()
+        elif k.strip().lower() == "obiekt_b":
+            id_b = v.strip()
+    if not id_a or not id_b:
+        raise RuntimeError("AB.txt niepoprawny")
+    return id_a, id_b
+
+
+def _klucz_id(v: str):
+    return (0, int(v), "") if v.isdigit() else (1, 0, v)
+
+
+def parsuj_nastepny(txt: str) -> list:
+    """następny.txt: L_id linii wychodzących — po jednym w linii (albo po przecinku / spacji)."""
+    out = []
+    for cz in (txt or "").replace(",", " ").split():
+        if cz not in out:
+            out.append(cz)
+    return out
+
+
+# =========================
+# BARIERA (fan-in): czekaj=wszystkie w mapa_dane.txt obiektu B
+# =========================
+def czeka_na_wszystkie(obj: Path) -> bool:
+    for line in wczytaj(obj / "mapa_dane.txt").splitlines():
+        k, _, v = line.partition("=")
+        if k.strip().lower() == "czekaj":
+            return v.strip().lower() == "wszystkie"
+    return False
+
+
+def linie_wejsciowe(root: Path, id_b: str) -> list:
+    """L_id wszystkich linii, które kończą się w obiekcie o id_b (AB.txt: obiekt_B)."""
+    out = []
+    for l_id, folder in indeks_linii(root).wszystkie().items():
+        try:
+            _, b = parse_ab(folder / "AB.txt")
+        except RuntimeError:
+            continue
+        if b == id_b:
+            out.append(l_id)
+    return sorted(out, key=_klucz_id)
+
+
+def dolacz_do_bariery(root: Path, linia: Path, obj_b: Path, id_b: str, l_id: str, data: str) -> Optional[str]:
+    """
+    Wejście z linii l_id odkładane w B/.bariera/<L_id>.txt (zapis atomowy, bez wspólnego pliku).
+    Gdy są wejścia ze WSZYSTKICH linii do B → zwraca je sklejone (kolejność L_id), inaczej None.
+    Wiele procesów / wątków naraz: start dostaje ten, komu uda się os.rename katalogu bariery.
+    """
+    katalog = obj_b / BARIERA
+    zapisz_atomowo(katalog / f"{l_id}.txt", data)
+    wymagane = linie_wejsciowe(root, id_b)
+    obecne = {p.stem for p in katalog.glob("*.txt")}
+    if not obecne:
+        log_linii(linia, "[LINIA] JOIN: komplet wejść B zebrała równoległa linia")
+        return None
+    brak = [x for x in wymagane if x not in obecne]
+    if brak:
+        log_linii(linia, f"[LINIA] JOIN: B czeka jeszcze na linie L_id={', '.join(brak)}")
+        return None
+
+    zajety = obj_b / f"{BARIERA}_{os.getpid()}_{threading.get_ident()}"
+    try:
+        os.rename(katalog, zajety)
+    except OSError:
+        return None   # ktoś inny właśnie zamknął tę barierę
+    try:
+        return "\n".join(wczytaj(zajety / f"{x}.txt").strip() for x in wymagane)
+    finally:
+        shutil.rmtree(zajety, ignore_errors=True)
+
+
+def wpisz_wejscie(obj_b: Path, data: str) -> Optional[str]:
+    """Dane do B jak w linie/<n>/start.py. Zwraca wpis do linia_log.txt albo None (B bez wejście.txt)."""
+    if (obj_b / "all.txt").exists():
+        # TRYB STANOWY (all.txt tylko w B)
+        zapisz_atomowo(obj_b / "all.txt", data)
+        zapisz_atomowo(obj_b / "wejście.txt", data)
+        zapisz_atomowo(obj_b / "wyjście.txt", data)
+        return "[LINIA] all.txt w B — przeniesiono STAN A→B"
+    if not (obj_b / "wejście.txt").exists():
+        return None
+    zapisz_atomowo(obj_b / "wejście.txt", data)
+    return "[LINIA] Dane A→B"
+
+
+def przejdz_linie(root: Path, linia: Path, l_id: str = "") -> Optional[Path]:
+    """
+    To samo co linie/<n>/start.py: A.wyjście → B (tryb stanowy all.txt albo klasyczny wejście.txt).
+    Zwraca folder B do uruchomienia albo None (STOP / błąd / bariera B jeszcze niepełna).
+    proces=off linii po LINIA_WIDOCZNA_S w tle.
+    """
+    dane = linia / "linia_dane.txt"
+    log_linii(linia, "=== START LINII (w procesie) ===")
+    bieg = dziennik.Bieg("linia", linia.name, l_id=l_id or None)
+    ustaw_proces(dane, "on")
+    try:
+        id_a, id_b = parse_ab(linia / "AB.txt")
+        obj_a = znajdz_obiekt(root, id_a)
+        obj_b = znajdz_obiekt(root, id_b)
+        if obj_a is None or obj_b is None:
+            raise RuntimeError(f"Brak obiektu id={id_a if obj_a is None else id_b}")
+
+        wynik = None
+        path_out_a = obj_a / "wyjście.txt"
+        if not path_out_a.exists():
+            log_linii(linia, "[LINIA ERROR] Brak wyjście.txt u A — STOP")
+        else:
+            data = wczytaj(path_out_a).strip()
+            if czeka_na_wszystkie(obj_b):
+                data = dolacz_do_bariery(root, linia, obj_b, id_b, l_id or id_a, data)
+            if data is not None:
+                opis = wpisz_wejscie(obj_b, data)
+                if opis is None:
+                    log_linii(linia, "[LINIA ERROR] B nie ma wejście.txt — STOP")
+                else:
+                    log_linii(linia, opis)
+                    wynik = obj_b
+
+        t = threading.Timer(LINIA_WIDOCZNA_S, ustaw_proces, args=(dane, "off", True))
+        t.start()
+        bieg.koniec("off", b=wynik.name if wynik is not None else None)
+        return wynik
+    except Exception as e:
+        log_linii(linia, f"[LINIA ERROR] {e}")
+        ustaw_proces(dane, "error", natychmiast=True)
+        bieg.koniec("error")
+        return None
+
+
+# =========================
+# ŁAŃCUCH
+# =========================
+class Przebieg:
+    """
+    Jedno uruchomienie łańcucha. Każdy skok (linia → B → proces.py B) to zadanie w puli wątków;
+    B z kilkoma L_id w następny.txt zleca wszystkie naraz (fan-out), najwyżej ROWNOLEGLE jednocześnie.
+    """
+
+    def __init__(self, root: Path, rownolegle: int = ROWNOLEGLE):
+        self.root = Path(root)
+        self._pula = ThreadPoolExecutor(max_workers=max(1, rownolegle), thread_name_prefix="lancuch")
+        self._lock = threading.Lock()
+        self._koniec = threading.Condition(self._lock)
+        self._otwarte = 0
+        self.skoki = []
+        self.t_start = time.perf_counter()
+
+    def zlec(self, l_ids):
+        for l_id in l_ids:
+            with self._lock:
+                self._otwarte += 1
+            self._pula.submit(self._galaz, l_id)
+
+    def _galaz(self, l_id: str):
+        try:
+            self._skok(l_id)
+        except Exception as e:
+            log_lancucha(f"L_id={l_id}: wyjątek {type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._otwarte -= 1
+                if self._otwarte == 0:
+                    self._koniec.notify_all()
+
+    def _skok(self, l_id: str):
+        t0 = time.perf_counter()
+        linia = znajdz_linie(self.root, l_id)
+        if linia is None:
+            log_lancucha(f"nie znaleziono linii o L_id={l_id}")
+            return
+        if not w_procesie(linia / "start.py"):
+            log_lancucha(f"{linia.name}: własny start.py → osobny proces")
+            odpal_start(linia)
+            return
+
+        obj_b = przejdz_linie(self.root, linia, l_id)
+        if obj_b is None:
+            return
+        if not wezel_z_szablonu(obj_b):
+            log_lancucha(f"{obj_b.name}: własny start.py → osobny proces")
+            odpal_start(obj_b)
+            return
+
+        skok_ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self.skoki.append(skok_ms)
+        opis = f"HOP L_id={l_id} {linia.name} → {obj_b.name}: {skok_ms:.1f} ms"
+        log_linii(linia, opis)
+        log_lancucha(opis)
+
+        t1 = time.perf_counter()
+        stan = wykonaj_obiekt(obj_b)
+        log_obiektu(obj_b, f"CHAIN: skok {skok_ms:.1f} ms, proces.py {(time.perf_counter() - t1) * 1000.0:.1f} ms")
+        if stan != "old":
+            return
+
+        nastepne = parsuj_nastepny(wczytaj(obj_b / "następny.txt"))
+        if not nastepne:
+            log_obiektu(obj_b, "NEXT: brak następny.txt (koniec łańcucha)")
+            return
+        if len(nastepne) > 1:
+            log_obiektu(obj_b, f"FAN-OUT: {len(nastepne)} linii naraz (L_id={', '.join(nastepne)})")
+        self.zlec(nastepne)
+
+    def czekaj(self):
+        with self._lock:
+            while self._otwarte:
+                self._koniec.wait()
+        self._pula.shutdown(wait=True)
+        if self.skoki:
+            log_lancucha(
+                f"koniec: {len(self.skoki)} skoków, narzut śr. {sum(self.skoki) / len(self.skoki):.1f} ms / "
+                f"max {max(self.skoki):.1f} ms, całość {(time.perf_counter() - self.t_start) * 1000.0:.1f} ms"
+            )
+
+
+def wykonaj_od_linii(root: Path, l_ids):
+    """Łańcuch od linii (L_id albo treść następny.txt z kilkoma L_id); wraca, gdy skończą się wszystkie gałęzie."""
+    if isinstance(l_ids, str):
+        l_ids = parsuj_nastepny(l_ids)
+    przebieg = Przebieg(root)
+    przebieg.zlec(l_ids)
+    przebieg.czekaj()
+
+
+def wykonaj_od_obiektu(obj: Path):
+    """Start łańcucha od obiektu: jego proces.py, potem dalej po następny.txt."""
+    obj = Path(obj).resolve()
+    if wykonaj_obiekt(obj) != "old":
+        return
+    l_ids = parsuj_nastepny(wczytaj(obj / "następny.txt"))
+    if l_ids:
+        wykonaj_od_linii(obj.parents[1], l_ids)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("użycie: python lancuch.py <folder obiektu>")
+        sys.exit(2)
+    wykonaj_od_obiektu(Path(sys.argv[1]))
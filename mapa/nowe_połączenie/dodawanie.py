@@ -31,6 +31,15 @@ def parse_ab(ab_path: Path):
     return A, B
 
 def find_object_dir_by_id(obiekty_dir: Path, wanted_id: str):
+    # wspólny indeks id → folder (mapa/indeks_id.py) zamiast czytania id.txt każdego obiektu
+    mapa_dir = obiekty_dir.parent / "mapa"
+    if str(mapa_dir) not in sys.path:
+        sys.path.insert(0, str(mapa_dir))
+    try:
+        from indeks_id import znajdz_obiekt
+        return znajdz_obiekt(obiekty_dir.parent, wanted_id)
+    except ImportError:
+        pass
     for obj_dir in obiekty_dir.iterdir():
         if not obj_dir.is_dir():
             continue
@@ -16,8 +16,12 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent
 PATH_AB = ROOT / "AB.txt"
 PATH_LINIA_DANE = ROOT / "linia_dane.txt"
+PATH_STATUS = ROOT / "status.txt"   # proces= osobno od linia_dane.txt (jak mapa/status.py)
 PATH_LOG = ROOT / "linia_log.txt"
 
+# mapa/lancuch.py przechodzi tę linię w swoim procesie (bez odpalania tego pliku)
+LANCUCH_W_PROCESIE = True
+
 
 # ===== LOG =====
 def log(msg: str):
@@ -50,17 +54,33 @@ def atomic_write(path: Path, data: str):
 
 
 def set_proces(status: str):
-    lines = read_text(PATH_LINIA_DANE).splitlines() if PATH_LINIA_DANE.exists() else []
-    out, hit = [], False
-    for line in lines:
-        if line.strip().lower().startswith("proces="):
-            out.append(f"proces={status}")
-            hit = True
-        else:
-            out.append(line)
-    if not hit:
-        out.append(f"proces={status}")
-    atomic_write(PATH_LINIA_DANE, "\n".join(out) + "\n")
+    if not PATH_LINIA_DANE.exists():
+        return
+    # mapa/status.py: ten sam zapis co łańcuch i szablony (PLAMA_STATUS_PLIK, łączenie przejść)
+    mapa_dir = ROOT.parents[1] / "mapa"
+    if str(mapa_dir) not in sys.path:
+        sys.path.insert(0, str(mapa_dir))
+    try:
+        import status as status_mapy
+    except ImportError:
+        status_mapy = None
+    if status_mapy is not None:
+        status_mapy.ustaw_proces(PATH_LINIA_DANE, status, natychmiast=status != "on")
+    elif os.environ.get("PLAMA_STATUS_PLIK", "1").strip() == "0":
+        # stary zapis: proces= prosto w linia_dane.txt, status.txt nie może go przesłaniać
+        try:
+            PATH_STATUS.unlink()
+        except OSError:
+            pass
+        tekst = read_text(PATH_LINIA_DANE)
+        linie = [f"proces={status}" if l.strip().lower().startswith("proces=") else l
+                 for l in tekst.splitlines()]
+        if f"proces={status}" not in linie:
+            linie.append(f"proces={status}")
+        if linie != tekst.splitlines():
+            atomic_write(PATH_LINIA_DANE, "\n".join(linie) + "\n")
+    elif read_text(PATH_STATUS) != f"proces={status}":
+        atomic_write(PATH_STATUS, f"proces={status}\n")
     log(f"[LINIA] proces={status}")
 
 
@@ -81,11 +101,38 @@ def parse_AB(path: Path):
     return id_a, id_b
 
 
+def bieg_w_dzienniku():
+    """Start przebiegu linii we wspólnym dzienniku (mapa/dziennik.py); None, gdy go brak."""
+    mapa_dir = ROOT.parents[1] / "mapa"
+    if str(mapa_dir) not in sys.path:
+        sys.path.insert(0, str(mapa_dir))
+    try:
+        import dziennik
+    except ImportError:
+        return None
+    return dziennik.Bieg("linia", ROOT.name, l_id=read_text(ROOT / "L_id.txt") or None)
+
+
 def find_object_dir_by_id(script_path: Path, target_id: str) -> Path:
     try:
         root = script_path.parents[2]
     except IndexError:
         root = script_path.parent
+
+    # wspólny indeks id → folder (mapa/indeks_id.py); skan tylko gdy go brak
+    mapa_dir = root / "mapa"
+    if str(mapa_dir) not in sys.path:
+        sys.path.insert(0, str(mapa_dir))
+    try:
+        from indeks_id import znajdz_obiekt
+    except ImportError:
+        znajdz_obiekt = None
+    if znajdz_obiekt is not None:
+        obj = znajdz_obiekt(root, target_id)
+        if obj is not None:
+            return obj
+        raise RuntimeError(f"Brak obiektu id={target_id}")
+
     obiekty = root / "obiekty"
     for obj in obiekty.iterdir():
         if obj.is_dir() and (obj / "id.txt").exists():
@@ -143,12 +190,15 @@ def copy_and_route(obj_a: Path, obj_b: Path):
 def main():
     log("=== START LINII ===")
     set_proces("on")
+    bieg = bieg_w_dzienniku()
     try:
         id_a, id_b = parse_AB(PATH_AB)
         obj_a = find_object_dir_by_id(Path(__file__).resolve(), id_a)
         obj_b = find_object_dir_by_id(Path(__file__).resolve(), id_b)
 
         copy_and_route(obj_a, obj_b)
+        if bieg is not None:
+            bieg.koniec("off", b=obj_b.name)
 
         time.sleep(1)
         set_proces("off")
@@ -158,6 +208,8 @@ def main():
     except Exception as e:
         log(f"[LINIA ERROR] {e}")
         set_proces("error")
+        if bieg is not None:
+            bieg.koniec("error")
         return 1
 
 
@@ -0,0 +1,126 @@
+"""
+Nakładka „Uruchamiam… → START” opcji start obiektu (opcje/start/gui.py) — jedna dla wszystkich szablonów.
+
+- gui.py szablonu to tylko ścieżka do start.py + import tego modułu
+- w procesie mapy (wtyczki_opcji.py): otworz → Launcher(start_py), zamknięcie nie kończy mapy
+- samodzielnie (python gui.py): main(start_py) z własną QApplication
+- start.py obiektu zawsze w osobnym procesie bez konsoli (pythonw / CREATE_NO_WINDOW na Windows)
+
+    def otworz(kontekst=None):
+        return okno_startu.Launcher(START_PY)
+"""
+
+import sys
+import subprocess
+from pathlib import Path
+
+from PyQt5.QtWidgets import QApplication, QLabel, QWidget
+from PyQt5.QtCore import Qt, QPropertyAnimation, QTimer
+
+
+# kolory
+LIGHT_GREEN = "#a8ffb0"
+BRIGHT_GREEN = "#00ff00"
+RED = "#ff3333"
+
+
+def odpal(start_py: Path):
+    """start.py obiektu w osobnym procesie, cwd = folder obiektu."""
+    start_py = Path(start_py)
+    if sys.platform.startswith("win"):
+        # pythonw = zero konsoli
+        pythonw = Path(sys.executable).with_name("pythonw.exe")
+        return subprocess.Popen([str(pythonw), str(start_py)], cwd=str(start_py.parent),
+                                creationflags=subprocess.CREATE_NO_WINDOW)
+    return subprocess.Popen([sys.executable, str(start_py)], cwd=str(start_py.parent),
+                            start_new_session=True)
+
+
+class Launcher(QWidget):
+    def __init__(self, start_py, app: QApplication = None):
+        super().__init__()
+        self.start_py = Path(start_py)
+        self.app = app   # None → okno w procesie mapy (wtyczka), zamknięcie nie kończy aplikacji
+
+        # === OKNO OVERLAY ===
+        self.setWindowFlags(
+            Qt.FramelessWindowHint |
+            Qt.Tool |
+            Qt.WindowStaysOnTopHint |
+            Qt.WindowDoesNotAcceptFocus
+        )
+        self.setAttribute(Qt.WA_TranslucentBackground)
+
+        self.resize(320, 120)
+        screen = QApplication.primaryScreen().geometry()
+        self.move(
+            screen.center().x() - self.width() // 2,
+            screen.center().y() - self.height() // 2
+        )
+
+        # === LABEL ===
+        self.label = QLabel("Uruchamiam…", self)
+        self.label.setAlignment(Qt.AlignCenter)
+        self.label.resize(self.size())
+        self._styl(LIGHT_GREEN, 28)
+
+        # === FADE IN ===
+        self.setWindowOpacity(0.0)
+        self.anim_in = QPropertyAnimation(self, b"windowOpacity")
+        self.anim_in.setDuration(400)
+        self.anim_in.setStartValue(0.0)
+        self.anim_in.setEndValue(1.0)
+
+        self.show()
+        self.anim_in.start()
+
+        QTimer.singleShot(200, self.try_launch)
+
+    def _styl(self, kolor: str, rozmiar: int):
+        self.label.setStyleSheet(f"""
+            QLabel {{
+                color: {kolor};
+                font-size: {rozmiar}px;
+                font-weight: bold;
+            }}
+        """)
+
+    def try_launch(self):
+        if not self.start_py.exists():
+            self.fail("Brak start.py")
+            return
+        try:
+            odpal(self.start_py)
+        except Exception as e:
+            self.fail(str(e))
+            return
+
+        # zmiana napisu
+        self.label.setText("START")
+        self._styl(BRIGHT_GREEN, 36)
+
+        # === ZNIKA PO 1s ===
+        QTimer.singleShot(1000, self.fade_out)
+
+    def fade_out(self):
+        self.anim_out = QPropertyAnimation(self, b"windowOpacity")
+        self.anim_out.setDuration(400)
+        self.anim_out.setStartValue(1.0)
+        self.anim_out.setEndValue(0.0)
+        self.anim_out.finished.connect(self.close)
+        self.anim_out.start()
+
+    def closeEvent(self, event):
+        if self.app is not None:
+            self.app.quit()
+
+    def fail(self, msg: str):
+        self.label.setText(f"BŁĄD\n{msg}")
+        self._styl(RED, 18)
+        QTimer.singleShot(2000, self.close)
+
+
+def main(start_py):
+    app = QApplication(sys.argv)
+    Launcher(start_py, app)
+    sys.exit(app.exec_())
@@ -0,0 +1,340 @@
+"""
+Pula „ciepłych” interpreterów dla proces.py (tryb opcjonalny).
+
+- serwer puli żyje w zlo_menager (PLAMA_PULA=1) albo osobno: python pula.py
+- robotnik = interpreter z już zaimportowanymi modułami (PLAMA_PULA_MODULY), czeka na JEDNO zadanie,
+  wykonuje proces.py jak `python proces.py` (cwd, sys.argv, __main__) i kończy się → kod wyjścia
+  ten sam co przy zwykłym uruchomieniu, a stan jednego proces.py nie przecieka do następnego
+- po wydaniu robotnika od razu startuje zastępca (PLAMA_PULA_ROZMIAR gotowych)
+- obiekt sam deklaruje, że się nadaje: pula=1 w mapa_dane.txt
+
+Klient (start.py obiektu, lancuch.py):
+    proc = pula.uruchom(proces_py, folder_obiektu)   # None → brak puli, zwykły Popen
+proc ma poll() / wait(timeout) / kill() / returncode jak subprocess.Popen, więc TIMEOUT,
+stop.txt i mapowanie returncode → proces=old/error/lag działają bez zmian.
+"""
+
+import os
+import sys
+import json
+import time
+import runpy
+import signal
+import socket
+import secrets
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from multiprocessing.connection import Listener, Client
+
+HERE = Path(__file__).resolve().parent
+PLIK_ADRESU = HERE / ".pula.json"
+
+try:
+    ROZMIAR = max(1, int(os.environ.get("PLAMA_PULA_ROZMIAR", "2")))
+except ValueError:
+    ROZMIAR = 2
+MODULY = [m.strip() for m in os.environ.get(
+    "PLAMA_PULA_MODULY", "json,re,datetime,pathlib,subprocess,PyQt5.QtWidgets,pyttsx3"
+).split(",") if m.strip()]
+KROK = 0.1   # s – kawałek czekania klienta na wynik (poll() z drugiego wątku nie czeka dłużej)
+
+
+def wlaczona() -> bool:
+    return os.environ.get("PLAMA_PULA", "0").strip().lower() in ("1", "true", "tak", "on")
+
+
+def obiekt_w_puli(mapa_dane) -> bool:
+    """pula=1 (tak/true/on) w mapa_dane.txt obiektu."""
+    try:
+        with open(mapa_dane, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                k, _, v = line.partition("=")
+                if k.strip().lower() == "pula":
+                    return v.strip().lower() in ("1", "true", "tak", "on")
+    except OSError:
+        pass
+    return False
+
+
+def _interpreter() -> str:
+    exe = Path(sys.executable)
+    if exe.name.lower() == "pythonw.exe":
+        return str(exe.with_name("python.exe"))
+    return str(exe)
+
+
+def _bez_okna() -> dict:
+    if hasattr(subprocess, "CREATE_NO_WINDOW"):
+        return {"creationflags": subprocess.CREATE_NO_WINDOW}
+    return {}
+
+
+# =========================
+# ROBOTNIK
+# =========================
+def robotnik():
+    """Proces-robotnik: import modułów, potem JEDNO zadanie z stdin i koniec."""
+    for m in MODULY:
+        try:
+            __import__(m)
+        except Exception:
+            pass
+
+    line = sys.stdin.readline()
+    if not line.strip():
+        return  # pula zamknięta, zanim dostaliśmy zadanie
+    zadanie = json.loads(line)
+    proces_py = zadanie["proces"]
+    cwd = zadanie.get("cwd") or os.path.dirname(proces_py)
+
+    os.chdir(cwd)
+    sys.argv = [proces_py]
+    sys.path[0] = os.path.dirname(os.path.abspath(proces_py))
+    # wyjątek / sys.exit(n) kończą interpreter dokładnie jak `python proces.py`
+    runpy.run_path(proces_py, run_name="__main__")
+
+
+# =========================
+# SERWER
+# =========================
+class PulaRobotnikow:
+    def __init__(self, rozmiar: int = ROZMIAR):
+        self.rozmiar = rozmiar
+        self._gotowi = deque()
+        self._lock = threading.Lock()
+        self._zamknieta = False
+
+    def _nowy(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [_interpreter(), str(Path(__file__).resolve()), "--robotnik"],
+            stdin=subprocess.PIPE, cwd=str(HERE), **_bez_okna()
+        )
+
+    def uzupelnij(self):
+        with self._lock:
+            while not self._zamknieta and len(self._gotowi) < self.rozmiar:
+                self._gotowi.append(self._nowy())
+
+    def wez(self) -> subprocess.Popen:
+        with self._lock:
+            while self._gotowi:
+                r = self._gotowi.popleft()
+                if r.poll() is None:
+                    break
+            else:
+                r = self._nowy()   # pula pusta → zimny start, dalej działa
+        threading.Thread(target=self.uzupelnij, daemon=True).start()
+        return r
+
+    def zamknij(self):
+        with self._lock:
+            self._zamknieta = True
+            while self._gotowi:
+                r = self._gotowi.popleft()
+                try:
+                    r.stdin.close()   # pusta linia → robotnik kończy bez zadania
+                    r.wait(timeout=1)
+                except Exception:
+                    r.kill()
+
+
+def _bez_nagle(conn):
+    """Krótkie wiadomości zaraz po uwierzytelnieniu → bez TCP_NODELAY czekają ~40 ms na ACK."""
+    try:
+        s = socket.socket(fileno=os.dup(conn.fileno()))
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        s.close()
+    except OSError:
+        pass
+
+
+def _obsluz(conn, pula: PulaRobotnikow):
+    r = None
+    wysylka = threading.Lock()
+    try:
+        _bez_nagle(conn)
+        zadanie = conn.recv()
+        proces_py = str(zadanie["proces"])
+        if not os.path.isfile(proces_py):
+            conn.send({"rc": 2, "blad": f"brak {proces_py}"})
+            return
+        r = pula.wez()
+        r.stdin.write((json.dumps({"proces": proces_py, "cwd": zadanie.get("cwd")}) + "\n").encode("utf-8"))
+        r.stdin.close()
+        conn.send({"pid": r.pid})
+
+        def _czekaj_na_koniec():
+            r.wait()   # blokująco → wynik bez opóźnienia pętli sprawdzającej
+            with wysylka:
+                try:
+                    conn.send({"rc": r.returncode})
+                except (OSError, ValueError):
+                    pass
+
+        threading.Thread(target=_czekaj_na_koniec, daemon=True).start()
+        while True:
+            if conn.recv().get("kill") and r.poll() is None:
+                r.kill()
+    except (EOFError, OSError):
+        # koniec rozmowy: klient odebrał wynik albo zniknął (start.py zabity / os._exit)
+        # → proces.py nie może zostać sierotą
+        if r is not None and r.poll() is None:
+            r.kill()
+    except Exception as e:
+        print(f"[pula] błąd obsługi zadania: {e}")
+        if r is not None and r.poll() is None:
+            r.kill()
+    finally:
+        with wysylka:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _zapisz_adres(adres, klucz: bytes):
+    dane = {"adres": list(adres), "klucz": klucz.hex(), "pid": os.getpid()}
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=str(HERE))
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(dane, f)
+    os.replace(tmp, str(PLIK_ADRESU))
+
+
+def serwer(stop: threading.Event = None):
+    """Pętla serwera puli (blokuje). Adres i klucz w mapa/.pula.json."""
+    stop = stop or threading.Event()
+    klucz = secrets.token_bytes(16)
+    listener = Listener(("127.0.0.1", 0), authkey=klucz)
+    pula = PulaRobotnikow()
+    pula.uzupelnij()
+    _zapisz_adres(listener.address, klucz)
+    print(f"[pula] {pula.rozmiar} robotników gotowych, adres {listener.address}")
+
+    def _zamknij_przy_stopie():
+        stop.wait()
+        try:
+            Client(listener.address, authkey=klucz).close()   # budzi accept()
+        except Exception:
+            pass
+
+    threading.Thread(target=_zamknij_przy_stopie, daemon=True).start()
+    try:
+        while not stop.is_set():
+            try:
+                conn = listener.accept()
+            except OSError:
+                break      # listener zamknięty
+            except Exception as e:
+                print(f"[pula] odrzucone połączenie: {e}")
+                continue
+            if stop.is_set():
+                conn.close()
+                break
+            threading.Thread(target=_obsluz, args=(conn, pula), daemon=True).start()
+    finally:
+        stop.set()
+        listener.close()
+        pula.zamknij()
+        try:
+            PLIK_ADRESU.unlink()
+        except OSError:
+            pass
+        print("[pula] zamknięta")
+
+
+def start_w_tle(stop: threading.Event) -> threading.Thread:
+    t = threading.Thread(target=serwer, args=(stop,), name="pula", daemon=True)
+    t.start()
+    return t
+
+
+# =========================
+# KLIENT
+# =========================
+class ZadaniePuli:
+    """proces.py wykonywany przez robotnika puli — interfejs jak subprocess.Popen."""
+
+    def __init__(self, conn, pid: int, args):
+        self._conn = conn
+        self._odbior = threading.Lock()
+        self._wysylka = threading.Lock()
+        self.pid = pid
+        self.args = args
+        self.returncode = None
+
+    def _odbierz(self, czekaj: float, blokuj: bool = True):
+        if self.returncode is not None:
+            return
+        if not self._odbior.acquire(blocking=blokuj):
+            return      # drugi wątek właśnie czeka na wynik
+        try:
+            if self.returncode is None and self._conn.poll(czekaj):
+                msg = self._conn.recv()
+                if "rc" in msg:
+                    self.returncode = msg["rc"]
+                    self._conn.close()
+        except (EOFError, OSError):
+            self.returncode = 1   # serwer puli padł razem z robotnikiem
+        finally:
+            self._odbior.release()
+
+    def poll(self):
+        self._odbierz(0, blokuj=False)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        koniec = None if timeout is None else time.monotonic() + timeout
+        while self.returncode is None:
+            if koniec is not None and time.monotonic() >= koniec:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            self._odbierz(KROK)
+        return self.returncode
+
+    def kill(self):
+        with self._wysylka:
+            try:
+                self._conn.send({"kill": True})
+            except (OSError, ValueError):
+                pass
+
+    terminate = kill
+
+
+def uruchom(proces_py, cwd=None):
+    """ZadaniePuli albo None (pula nie działa → wołający robi zwykły Popen)."""
+    try:
+        dane = json.loads(PLIK_ADRESU.read_text(encoding="utf-8"))
+        conn = Client(tuple(dane["adres"]), authkey=bytes.fromhex(dane["klucz"]))
+    except Exception:
+        return None
+    _bez_nagle(conn)
+    try:
+        proces_py = os.path.abspath(str(proces_py))
+        conn.send({"proces": proces_py, "cwd": os.path.abspath(str(cwd or os.path.dirname(proces_py)))})
+        odp = conn.recv()
+    except Exception:
+        conn.close()
+        return None
+    zadanie = ZadaniePuli(conn, odp.get("pid"), [proces_py])
+    if "rc" in odp:
+        zadanie.returncode = odp["rc"]
+        conn.close()
+    return zadanie
+
+
+if __name__ == "__main__":
+    if "--robotnik" in sys.argv[1:]:
+        robotnik()
+    else:
+        _stop = threading.Event()
+        try:
+            signal.signal(signal.SIGTERM, lambda signum, frame: _stop.set())
+        except (ValueError, OSError):
+            pass
+        try:
+            serwer(_stop)
+        except KeyboardInterrupt:
+            _stop.set()
@@ -0,0 +1,40 @@
+"""
+Puls mapy: znak dla zadań zlo, że PLAMA działa i sama prowadzi końce linii.
+
+- mapa odnawia mapa/.puls_mapy co PULS_S (zapis w wątku ładowacza, nie GUI), przy wyjściu go usuwa
+- puls starszy niż WAZNOSC_S (mapa padła bez sprzątania) = mapy nie ma
+- zadanie zlo, które dubluje pracę mapy, sprawdza mapa_dziala() na początku main() i pomija przebieg
+
+    if puls_mapy.mapa_dziala():
+        return 0
+"""
+
+import os
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+PLIK = HERE / ".puls_mapy"
+PULS_S = 5.0
+WAZNOSC_S = 3 * PULS_S
+
+
+def odnow():
+    try:
+        PLIK.write_text(str(os.getpid()), encoding="utf-8")
+    except OSError as e:
+        print(f"[puls] nie zapisano pulsu mapy: {e}")
+
+
+def usun():
+    try:
+        PLIK.unlink()
+    except OSError:
+        pass
+
+
+def mapa_dziala() -> bool:
+    try:
+        return time.time() - PLIK.stat().st_mtime < WAZNOSC_S
+    except OSError:
+        return False
@@ -0,0 +1,93 @@
+"""
+Rejestr opcji menu PPM (<folder>/opcje/*) trzymany w pamięci.
+
+- lista [(nazwa, gui.py | None)] budowana RAZ na folder opcji (przy pierwszym menu) — kolejne
+  menu otwiera się bez iterdir / exists na dysku
+- QFileSystemWatcher na opcje/ i każdym jej podfolderze: nowa / usunięta / przemianowana opcja
+  albo gui.py → wpis unieważniony, następne menu zbuduje go od nowa
+- bez powiadomień (PLAMA_POLLING=1, watcher odmówił, brak folderu opcje/) wpis sprawdzany
+  sygnaturą: os.stat opcje/ i znanych podfolderów, bez listowania
+- obiekty z tego samego szablonu mają osobne kopie opcje/ → klucz to ścieżka folderu opcji
+
+    rejestr = RejestrOpcji(parent)
+    for nazwa, gui_py in rejestr.opcje(agent_dir / "opcje"): ...
+"""
+
+import os
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher
+
+
+def _sygnatura(sciezki) -> tuple:
+    out = []
+    for p in sciezki:
+        try:
+            st = os.stat(p)
+            out.append((st.st_mtime_ns, st.st_ino))
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+
+class RejestrOpcji(QObject):
+    def __init__(self, parent=None, obserwuj: bool = True):
+        super().__init__(parent)
+        self._wpisy = {}   # str(opcje/) → (opcje, podfoldery, sygnatura | None gdy obserwowany)
+        self._watcher = None
+        if obserwuj:
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._on_zmiana)
+
+    def opcje(self, opts_dir) -> list:
+        """[(nazwa, ścieżka_do_gui.py | None)] dla folderu opcji; pusta lista, gdy go nie ma."""
+        if opts_dir is None:
+            return []
+        opts_dir = Path(opts_dir)
+        wpis = self._wpisy.get(str(opts_dir))
+        if wpis is not None:
+            opts, podfoldery, sig = wpis
+            if sig is None or sig == _sygnatura([opts_dir] + podfoldery):
+                return opts
+        return self._zbuduj(opts_dir)
+
+    def _zbuduj(self, opts_dir: Path) -> list:
+        klucz = str(opts_dir)
+        obserwowany = False
+        if self._watcher is not None and opts_dir.is_dir():
+            # obserwacja PRZED listowaniem → zmiana w trakcie budowania i tak unieważni wpis
+            obserwowany = klucz in self._watcher.directories() or not self._watcher.addPaths([klucz])
+
+        opts, podfoldery = [], []
+        try:
+            if opts_dir.is_dir():
+                podfoldery = sorted(p for p in opts_dir.iterdir() if p.is_dir())
+                for sub in podfoldery:
+                    gui_py = sub / "gui.py"
+                    opts.append((sub.name, gui_py if gui_py.exists() else None))
+        except OSError as e:
+            print(f"[opcje] błąd czytania {opts_dir}: {e}")
+            obserwowany = False
+
+        if obserwowany and podfoldery:
+            znane = set(self._watcher.directories())
+            nowe = [str(p) for p in podfoldery if str(p) not in znane]
+            obserwowany = not (nowe and self._watcher.addPaths(nowe))
+
+        sig = None if obserwowany else _sygnatura([opts_dir] + podfoldery)
+        self._wpisy[klucz] = (opts, podfoldery, sig)
+        return opts
+
+    def uniewaznij(self, opts_dir):
+        """Wpis folderu opcji wylatuje z pamięci (razem z obserwacją); następne menu czyta dysk."""
+        wpis = self._wpisy.pop(str(opts_dir), None)
+        if wpis is None or self._watcher is None:
+            return
+        znane = set(self._watcher.directories())
+        stare = [s for s in [str(opts_dir)] + [str(p) for p in wpis[1]] if s in znane]
+        if stare:
+            self._watcher.removePaths(stare)
+
+    def _on_zmiana(self, path: str):
+        p = Path(path)
+        self.uniewaznij(p if str(p) in self._wpisy else p.parent)
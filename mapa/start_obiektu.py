@@ -0,0 +1,77 @@
+"""
+Wspólna logika start.py obiektów z szablonu (notatnik, szablon, obróbka tekstu, syntezator mowy,
+tekst na ekranie, nuta test).
+
+start.py szablonu trzyma tylko main() / monitor_stop() i jeden import tego modułu (bez niego działa
+w trybie minimalnym); tutaj to, co wcześniej było wklejone w każdy szablon:
+- ustaw_proces: zapis przez status.py + przebieg w dzienniku (on → start, stan końcowy → koniec)
+- zapisz_zalegle: odłożone statusy na dysk przed os._exit
+- uruchom_w_puli: pula=1 w mapa_dane.txt → proces.py w ciepłym robotniku (pula.py)
+- straznik_stop: „czy stop.txt się zmienił” przez os.stat (sygnal_stop.py)
+- uruchom_nastepna_linie: łańcuch dalej w tym samym procesie (lancuch.py)
+
+    start_obiektu.ustaw_proces(ROOT, "on", log)
+    proc = start_obiektu.uruchom_w_puli(ROOT, proc_path, log)
+"""
+
+import os
+
+import pula
+import status
+import dziennik
+import lancuch
+from sygnal_stop import StraznikStop
+
+_BIEGI = {}   # folder obiektu → otwarty dziennik.Bieg
+
+
+def _bieg(root: str, stan: str):
+    if stan == "on":
+        _BIEGI[root] = dziennik.Bieg("obiekt", os.path.basename(root))
+        return
+    bieg = _BIEGI.pop(root, None)
+    if bieg is not None:
+        bieg.koniec(stan)
+
+
+def ustaw_proces(root: str, stan: str, log=print):
+    """proces=<stan> obiektu; stan końcowy (wszystko poza "on") od razu, bez łączenia przejść."""
+    mapa = os.path.join(root, "mapa_dane.txt")
+    if not os.path.exists(mapa):
+        log("WARN: brak mapa_dane.txt (nie ustawiam proces=...)")
+        return
+    status.ustaw_proces(mapa, stan, natychmiast=stan != "on")
+    log(f"STATUS: proces={stan}")
+    _bieg(root, stan)
+
+
+def zapisz_zalegle():
+    """Przed os._exit: odłożony (połączony) status musi trafić na dysk."""
+    status.zapisz_zalegle()
+
+
+def uruchom_w_puli(root: str, proc_path: str, log=print):
+    """Proces z puli albo None (obiekt bez pula=1 / pula nie działa → zwykły subprocess)."""
+    if not pula.obiekt_w_puli(os.path.join(root, "mapa_dane.txt")):
+        return None
+    proc = pula.uruchom(proc_path, root)
+    if proc is None:
+        log("POOL: pula nie działa -> zwykły proces")
+    else:
+        log(f"RUN (pula): python {proc_path}, robotnik pid={proc.pid}")
+    return proc
+
+
+def straznik_stop(stop_path: str):
+    """Funkcja bez argumentów: True, gdy treść stop.txt zmieniła się od startu."""
+    return StraznikStop(stop_path).zmieniony
+
+
+def uruchom_nastepna_linie(root: str, line_id: str, log=print):
+    """Linie z następny.txt (jedno id albo kilka) → łańcuch w tym procesie, proces.py osobno."""
+    korzen = os.path.dirname(os.path.dirname(root))
+    if not os.path.isdir(os.path.join(korzen, "linie")):
+        log("WARN: brak folderu linie/ (nie uruchamiam następnej linii)")
+        return
+    log(f"CHAIN: linia id={line_id} → łańcuch w procesie (mapa/lancuch.py)")
+    lancuch.wykonaj_od_linii(korzen, line_id)
@@ -0,0 +1,192 @@
+"""
+Wspólny zapis statusu proces=... obiektu / linii.
+
+- status trafia do osobnego, małego status.txt obok mapa_dane.txt / linia_dane.txt — przejścia
+  on/old/off nie dotykają danych układu (mapa przestawia tylko kolor ramki, bez ponownego
+  parsowania xy / ikony); gdy status.txt istnieje, jego proces= wygrywa z tym w pliku danych
+- PLAMA_STATUS_PLIK=0 → stary zapis proces= prosto do mapa_dane.txt / linia_dane.txt
+  (status.txt jest wtedy usuwany, żeby nie przesłaniał nowej wartości)
+- zapis atomowy (plik tymczasowy w tym samym folderze + os.replace) → mapa nigdy nie czyta
+  pół-zapisanego pliku (obiekt nie znika i nie skacze na 0,0)
+- ta sama wartość co w pliku → brak zapisu (mtime bez zmian, mapa nic nie przeładowuje)
+- szybkie przejścia łączone: najwyżej jeden zapis na MIN_ODSTEP (PLAMA_STATUS_MS, domyślnie 100 ms)
+  na plik; wartości pośrednie przepadają, OSTATNIA zawsze trafia na dysk (timer nie-daemon,
+  a przed os._exit trzeba zawołać zapisz_zalegle())
+- stan ustawiony z natychmiast=True (koniec przebiegu: old / error / lag / off) omija łączenie
+  i kasuje zaległy zapis
+- błąd zapisu w wątku timera → komunikat na wyjściu (nie ginie w wątku)
+- każdy faktyczny zapis → zdarzenie "status" w dzienniku (dziennik.py)
+"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import dziennik
+
+try:
+    MIN_ODSTEP = max(0, int(os.environ.get("PLAMA_STATUS_MS", "100"))) / 1000.0
+except ValueError:
+    MIN_ODSTEP = 0.1
+PLIK_STATUSU = "status.txt"
+OSOBNY_PLIK = os.environ.get("PLAMA_STATUS_PLIK", "1").strip() != "0"
+
+
+def wczytaj(path: Path) -> str:
+    try:
+        return Path(path).read_text(encoding="utf-8", errors="replace")
+    except Exception:
+        return ""
+
+
+def zapisz_atomowo(path: Path, txt: str):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", errors="replace") as f:
+            f.write(txt)
+        os.replace(tmp, str(path))
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def plik_statusu(path) -> Path:
+    """status.txt obok pliku danych (mapa_dane.txt / linia_dane.txt) albo w podanym folderze."""
+    path = Path(path)
+    return path / PLIK_STATUSU if path.is_dir() else path.parent / PLIK_STATUSU
+
+
+def proces_z_tekstu(tekst: str):
+    """Wartość proces= z treści pliku; None, gdy pola nie ma."""
+    for line in tekst.splitlines():
+        k, _, v = line.partition("=")
+        if k.strip().lower() == "proces":
+            return v.strip().lower()
+    return None
+
+
+def odczytaj_proces(path: Path) -> str:
+    """Obowiązujący proces= dla pliku danych: status.txt, jeśli jest, inaczej sam plik danych."""
+    path = Path(path)
+    stan = proces_z_tekstu(wczytaj(plik_statusu(path)))
+    if stan is None:
+        stan = proces_z_tekstu(wczytaj(path))
+    return stan or ""
+
+
+def podmien_proces(tekst: str, stan: str) -> str:
+    """Treść pliku z proces=<stan> (pozostałe linie bez zmian, brak pola → dopisane)."""
+    out, hit = [], False
+    for line in tekst.splitlines():
+        if line.strip().lower().startswith("proces="):
+            out.append(f"proces={stan}")
+            hit = True
+        else:
+            out.append(line)
+    if not hit:
+        out.append(f"proces={stan}")
+    return "\n".join(out) + ("\n" if tekst.endswith("\n") or not tekst else "")
+
+
+def _zapisz(path: Path, stan: str) -> bool:
+    if OSOBNY_PLIK:
+        if odczytaj_proces(path) == stan:
+            return False
+        zapisz_atomowo(plik_statusu(path), f"proces={stan}\n")
+    else:
+        try:
+            plik_statusu(path).unlink()
+        except OSError:
+            pass
+        tekst = wczytaj(path)
+        nowy = podmien_proces(tekst, stan)
+        if nowy == tekst:
+            return False
+        zapisz_atomowo(path, nowy)
+    dziennik.zdarzenie(*dziennik.rodzaj_i_nazwa(path), "status", stan=stan)
+    return True
+
+
+class _StanPliku:
+    __slots__ = ("lock", "ostatni", "zalegly", "timer")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ostatni = 0.0       # monotonic ostatniego zapisu
+        self.zalegly = None      # stan czekający na timer
+        self.timer = None
+
+
+_PLIKI = {}
+_PLIKI_LOCK = threading.Lock()
+
+
+def _stan_pliku(path: Path) -> _StanPliku:
+    klucz = os.path.abspath(str(path))
+    with _PLIKI_LOCK:
+        s = _PLIKI.get(klucz)
+        if s is None:
+            s = _PLIKI[klucz] = _StanPliku()
+        return s
+
+
+def _zapisz_zalegly(path: Path, s: _StanPliku):
+    with s.lock:
+        stan, s.zalegly, s.timer = s.zalegly, None, None
+        if stan is not None:
+            _zapisz(path, stan)
+            s.ostatni = time.monotonic()
+
+
+def _zapisz_zalegly_w_tle(path: Path, s: _StanPliku):
+    """Cel timera: wyjątek w jego wątku przepadłby bez śladu."""
+    try:
+        _zapisz_zalegly(path, s)
+    except Exception as e:
+        print(f"[status] nie zapisano odłożonego statusu ({path}): {e}")
+
+
+def ustaw_proces(path, stan: str, natychmiast: bool = False) -> bool:
+    """
+    proces=<stan> dla pliku danych path (zapis do status.txt obok). False, gdy pliku danych
+    nie ma (obiekt / linia nie istnieje → nic nie tworzymy).
+    Zapis od razu, jeśli od poprzedniego minęło MIN_ODSTEP (albo natychmiast=True),
+    inaczej stan czeka na timer — kolejne wywołania w tym czasie tylko go podmieniają.
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    s = _stan_pliku(path)
+    with s.lock:
+        teraz = time.monotonic()
+        if not natychmiast and (s.timer is not None or teraz - s.ostatni < MIN_ODSTEP):
+            s.zalegly = stan
+            if s.timer is None:
+                s.timer = threading.Timer(MIN_ODSTEP - (teraz - s.ostatni), _zapisz_zalegly_w_tle, args=(path, s))
+                s.timer.start()
+            return True
+        if s.timer is not None:
+            s.timer.cancel()
+            s.timer, s.zalegly = None, None
+        _zapisz(path, stan)
+        s.ostatni = time.monotonic()
+    return True
+
+
+def zapisz_zalegle():
+    """Zapisuje wszystkie odłożone stany od razu (np. przed os._exit)."""
+    with _PLIKI_LOCK:
+        pliki = list(_PLIKI.items())
+    for klucz, s in pliki:
+        with s.lock:
+            if s.timer is not None:
+                s.timer.cancel()
+                s.timer = None
+        _zapisz_zalegly(Path(klucz), s)
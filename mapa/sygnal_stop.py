@@ -0,0 +1,115 @@
+"""
+Wspólny sygnał STOP obiektu (stop.txt).
+
+Użytkownik dalej przełącza stop.txt przez opcje/stop/gui.py (0 ↔ 1) — zmiana treści = STOP.
+Zamiast czytać i hashować plik co 0.2 s przez całe życie procesu:
+- sprawdzenie = jeden os.stat (mtime_ns, rozmiar, inode)
+- treść czytana i hashowana TYLKO, gdy sygnatura się zmieniła (dotknięcie bez zmiany treści ≠ STOP)
+- ObserwatorStop: jeden wątek na proces dla wszystkich obserwowanych stop.txt (lancuch / graf
+  z wieloma obiektami naraz), wywołuje callback przy zmianie
+
+    straznik = StraznikStop(obj / "stop.txt")
+    if straznik.zmieniony(): ...
+
+    uchwyt = obserwuj(obj / "stop.txt", lambda: proc.kill())
+    ...
+    przestan(uchwyt)
+"""
+
+import os
+import time
+import hashlib
+import threading
+
+STOP_CHECK = 0.2   # s – co ile sprawdzać (jak w start.py obiektu)
+
+
+def _sig(path: str):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        return None
+
+
+def _hash(path: str) -> str:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            txt = f.read()
+    except Exception:
+        txt = ""
+    return hashlib.sha256(txt.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class StraznikStop:
+    def __init__(self, path):
+        self.path = str(path)
+        self._sig = _sig(self.path)
+        self._hash = _hash(self.path)
+
+    def zmieniony(self) -> bool:
+        """True, gdy treść stop.txt różni się od tej z chwili startu (albo ostatniej zgłoszonej zmiany)."""
+        sig = _sig(self.path)
+        if sig == self._sig:
+            return False
+        self._sig = sig
+        h = _hash(self.path)
+        if h == self._hash:
+            return False
+        self._hash = h
+        return True
+
+
+class ObserwatorStop:
+    """Jeden wątek sprawdzający wszystkie zarejestrowane stop.txt; śpi, gdy nie ma czego pilnować."""
+
+    def __init__(self, krok: float = STOP_CHECK):
+        self.krok = krok
+        self._lock = threading.Lock()
+        self._wpisy = {}           # uchwyt → (StraznikStop, callback)
+        self._nastepny = 0
+        self._jest_praca = threading.Event()
+        self._watek = None
+
+    def dodaj(self, path, callback) -> int:
+        with self._lock:
+            self._nastepny += 1
+            uchwyt = self._nastepny
+            self._wpisy[uchwyt] = (StraznikStop(path), callback)
+            if self._watek is None:
+                self._watek = threading.Thread(target=self._petla, name="stop", daemon=True)
+                self._watek.start()
+            self._jest_praca.set()
+        return uchwyt
+
+    def usun(self, uchwyt: int):
+        with self._lock:
+            self._wpisy.pop(uchwyt, None)
+            if not self._wpisy:
+                self._jest_praca.clear()
+
+    def _petla(self):
+        while True:
+            self._jest_praca.wait()
+            time.sleep(self.krok)
+            with self._lock:
+                wpisy = list(self._wpisy.items())
+            for uchwyt, (straznik, callback) in wpisy:
+                if not straznik.zmieniony():
+                    continue
+                self.usun(uchwyt)   # STOP zgłaszany raz
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[stop] błąd reakcji na STOP ({straznik.path}): {e}")
+
+
+_OBSERWATOR = ObserwatorStop()
+
+
+def obserwuj(path, callback) -> int:
+    return _OBSERWATOR.dodaj(path, callback)
+
+
+def przestan(uchwyt: int):
+    _OBSERWATOR.usun(uchwyt)
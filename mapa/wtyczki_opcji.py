@@ -0,0 +1,124 @@
+"""
+Host wtyczek opcji (opcje/*/gui.py) w procesie mapy.
+
+- opcja „świadoma wtyczek” ma na najwyższym poziomie funkcję otworz(kontekst) — mapa importuje
+  gui.py do swojego procesu i woła ją od razu: okno pokazuje się bez startu nowego Pythona,
+  importu PyQt5 i budowania QApplication (0.5–1.5 s na każde kliknięcie)
+- otworz zwraca okno (QWidget) albo None (opcja bez okna, np. stop / usuń); okno trzymane przez
+  host do zamknięcia
+- wykrywanie BEZ importu (ast) — stare opcje wykonują swoją robotę już przy imporcie
+  (np. usuń/gui.py kasuje plik), więc importowane są tylko te z otworz
+- moduł ładowany raz na ścieżkę, ponownie po zmianie pliku (mtime / rozmiar)
+- wyjątek w slocie okna wtyczki nie zamyka mapy: przy pierwszej wtyczce host ustawia
+  sys.excepthook wypisujący traceback (domyślnie PyQt5 robi wtedy qFatal → abort)
+- opcja bez otworz, błąd importu albo PLAMA_WTYCZKI=0 → uruchom() zwraca False i mapa odpala
+  gui.py jak dotąd (QProcess.startDetached)
+
+kontekst (dict): base_dir, objects_dir, agent_dir (Path | None), x, y (int | None)
+
+    def otworz(kontekst):
+        okno = Edytor()
+        okno.show()
+        return okno
+"""
+
+import os
+import sys
+import ast
+import traceback
+import importlib.util
+import itertools
+from pathlib import Path
+
+from PyQt5.QtCore import QObject, Qt
+from PyQt5.QtWidgets import QWidget
+
+WLACZONY = os.environ.get("PLAMA_WTYCZKI", "1").strip() != "0"
+PUNKT_WEJSCIA = "otworz"
+
+
+def _sig(path: Path):
+    try:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def ma_punkt_wejscia(zrodlo: str) -> bool:
+    """Czy w kodzie jest funkcja otworz(...) na najwyższym poziomie (bez wykonywania go)."""
+    try:
+        drzewo = ast.parse(zrodlo)
+    except (SyntaxError, ValueError):
+        return False
+    return any(isinstance(w, ast.FunctionDef) and w.name == PUNKT_WEJSCIA for w in drzewo.body)
+
+
+def _wyjatek_w_slocie(typ, wartosc, tb):
+    print("[wtyczki] nieobsłużony wyjątek (mapa działa dalej):")
+    traceback.print_exception(typ, wartosc, tb)
+
+
+class HostWtyczek(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._wykryte = {}    # str(gui.py) → (sygnatura, bool)
+        self._moduly = {}     # str(gui.py) → (sygnatura, moduł)
+        self._okna = set()    # otwarte okna wtyczek (bez referencji GC zamknąłby je od razu)
+        self._numer = itertools.count(1)
+
+    def czy_wtyczka(self, gui_path: Path) -> bool:
+        gui_path = Path(gui_path)
+        sig = _sig(gui_path)
+        wpis = self._wykryte.get(str(gui_path))
+        if wpis is not None and wpis[0] == sig:
+            return wpis[1]
+        try:
+            tak = sig is not None and ma_punkt_wejscia(gui_path.read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            tak = False
+        self._wykryte[str(gui_path)] = (sig, tak)
+        return tak
+
+    def _modul(self, gui_path: Path):
+        sig = _sig(gui_path)
+        wpis = self._moduly.get(str(gui_path))
+        if wpis is not None and wpis[0] == sig:
+            return wpis[1]
+        if sys.excepthook is sys.__excepthook__:
+            sys.excepthook = _wyjatek_w_slocie
+        spec = importlib.util.spec_from_file_location(f"plama_opcja_{next(self._numer)}", str(gui_path))
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        self._moduly[str(gui_path)] = (sig, mod)
+        return mod
+
+    def uruchom(self, gui_path: Path, kontekst: dict) -> bool:
+        """True = opcję obsłużył host (także gdy otworz rzuciło); False = trzeba osobnego procesu."""
+        if not WLACZONY or gui_path is None or not self.czy_wtyczka(gui_path):
+            return False
+        try:
+            mod = self._modul(Path(gui_path))
+        except Exception as e:
+            print(f"[wtyczki] import {gui_path} nieudany ({e}) → osobny proces")
+            return False
+        try:
+            okno = getattr(mod, PUNKT_WEJSCIA)(dict(kontekst))
+        except Exception as e:
+            print(f"[wtyczki] błąd opcji {gui_path}: {e}")
+            return True
+        if isinstance(okno, QWidget):
+            self._zatrzymaj(okno)
+        return True
+
+    def _zatrzymaj(self, okno: QWidget):
+        okno.setAttribute(Qt.WA_DeleteOnClose, True)
+        self._okna.add(okno)
+        okno.destroyed.connect(lambda *_a, o=okno: self._okna.discard(o))
+        if not okno.isVisible():
+            okno.show()
+        okno.raise_()
+        okno.activateWindow()
+
+    def otwarte(self) -> int:
+        return len(self._okna)
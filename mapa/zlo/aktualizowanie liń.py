@@ -3,8 +3,16 @@ from pathlib import Path
 import re
 import sys
 
+_MAPA_DIR = str(Path(__file__).resolve().parents[1])  # mapa/ → indeks_id
+if _MAPA_DIR not in sys.path:
+    sys.path.insert(0, _MAPA_DIR)
+from indeks_id import indeks_obiektow
+from status import zapisz_atomowo
+import puls_mapy
+
 # sync_linie_no_backup.py
 # Bez backupów, bez duplikowania linii. Uruchamiany z poziomu pliku (używa __file__).
+# Gdy działa mapa (puls_mapy), końce linii prowadzi ona sama — przebieg jest pomijany.
 
 def parse_kv_file(path: Path):
     data = {}
@@ -29,7 +37,54 @@ def set_xy_in_lines_replace_once(lines, key, x, y):
     new_lines.append(f"{key}={x} {y}")
     return new_lines
 
+def read_obj_xy(md: Path):
+    mapa_txt = md.read_text(encoding='utf-8')
+    mx = re.search(r'\bX\s*=\s*(-?\d+)', mapa_txt)
+    my = re.search(r'\bY\s*=\s*(-?\d+)', mapa_txt)
+    if mx and my:
+        return (int(mx.group(1)), int(my.group(1)))
+    mxy = re.search(r'\bxy\s*=\s*(-?\d+)\s+(-?\d+)', mapa_txt, re.IGNORECASE)
+    if mxy:
+        return (int(mxy.group(1)), int(mxy.group(2)))
+    p = re.search(r'(-?\d+)\s+(-?\d+)', mapa_txt)
+    if p:
+        return (int(p.group(1)), int(p.group(2)))
+    return None
+
+# stan między przebiegami (zlo_menager ładuje plik raz jako moduł i woła main() co interwał):
+# linia sprawdzana TYLKO gdy od ostatniego przebiegu zmienił się jej AB.txt / linia_dane.txt albo
+# mapa_dane.txt któregoś z jej obiektów — reszta przebiegu to same stat()
+_foldery_linii = {"mtime": None, "pary": []}
+_ostatnie = {}   # str(linia_dane.txt) → {"ab": sygnatura AB.txt, "ids": (A, B), "sig": sygnatury całości}
+
+
+def _sig(p):
+    if p is None:
+        return None
+    try:
+        st = p.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def pary_linii(linie_dir: Path):
+    """(AB.txt, linia_dane.txt) z folderów linie/<folder>/ — listdir tylko po zmianie mtime linie/."""
+    sig = _sig(linie_dir)
+    if sig != _foldery_linii["mtime"]:
+        pary = []
+        for d in sorted(linie_dir.iterdir()):
+            if d.is_dir():
+                pary.append((d / "AB.txt", d / "linia_dane.txt"))
+        _foldery_linii["mtime"], _foldery_linii["pary"] = sig, pary
+    return [(ab, ld) for ab, ld in _foldery_linii["pary"] if ab.exists() and ld.exists()]
+
+
 def main():
+    if puls_mapy.mapa_dziala():
+        _ostatnie.clear()   # po zamknięciu mapy pierwszy przebieg sprawdza wszystkie linie
+        return 0
+
     try:
         current_file = Path(__file__).resolve()
     except NameError:
@@ -47,43 +102,46 @@ def main():
         print("Brakuje folderu 'linie' lub 'obiekty' w parent2. Sprawdź strukturę.")
         return 1
 
-    pairs = []
-    for ab in linie_dir.rglob('AB.txt'):
-        ld = ab.parent / "linia_dane.txt"
-        if ld.exists():
-            pairs.append((ab, ld))
+    pairs = pary_linii(linie_dir)
 
     if not pairs:
+        _ostatnie.clear()
         print("Brak plików AB.txt + linia_dane.txt w 'linie'.")
         return 0
 
-    # index objects
-    id_index = {}
-    for obj_folder in obiekty_dir.rglob('*'):
-        if not obj_folder.is_dir():
-            continue
-        idf = obj_folder / "id.txt"
-        md = obj_folder / "mapa_dane.txt"
-        if idf.exists() and md.exists():
-            id_val = idf.read_text(encoding='utf-8').strip()
-            mapa_txt = md.read_text(encoding='utf-8')
-            mx = re.search(r'\bX\s*=\s*(-?\d+)', mapa_txt)
-            my = re.search(r'\bY\s*=\s*(-?\d+)', mapa_txt)
-            xy = None
-            if mx and my:
-                xy = (int(mx.group(1)), int(my.group(1)))
-            else:
-                mxy = re.search(r'\bxy\s*=\s*(-?\d+)\s+(-?\d+)', mapa_txt, re.IGNORECASE)
-                if mxy:
-                    xy = (int(mxy.group(1)), int(mxy.group(2)))
-                else:
-                    p = re.search(r'(-?\d+)\s+(-?\d+)', mapa_txt)
-                    if p:
-                        xy = (int(p.group(1)), int(p.group(2)))
-            id_index[id_val] = {"folder": obj_folder, "xy": xy, "mapa_path": md}
+    # id → folder ze wspólnego indeksu (trafienie = 1 stat), xy czytane tylko dla zmienionych obiektów
+    indeks = indeks_obiektow(parent2)
+    xy_cache = {}
+
+    def obj_md(obj_id):
+        folder = indeks.znajdz(obj_id) if obj_id else None
+        return folder / "mapa_dane.txt" if folder else None
+
+    def obj_xy(md):
+        if md not in xy_cache:
+            xy_cache[md] = read_obj_xy(md) if md and md.exists() else None
+        return xy_cache[md]
+
+    poprzednie = dict(_ostatnie)
+    _ostatnie.clear()
+    zapisane = pominiete = 0
 
     for ab_path, ld_path in pairs:
-        ab_kv, _ = parse_kv_file(ab_path)
+        klucz = str(ld_path)
+        wpis = poprzednie.get(klucz)
+        sig_ab = _sig(ab_path)
+        if wpis is not None and wpis["ab"] == sig_ab:
+            a_id, b_id = wpis["ids"]
+        else:
+            ab_kv, _ = parse_kv_file(ab_path)
+            a_id, b_id = ab_kv.get('obiekt_A'), ab_kv.get('obiekt_B')
+        md_a, md_b = obj_md(a_id), obj_md(b_id)
+        sig = (sig_ab, _sig(ld_path), md_a, _sig(md_a), md_b, _sig(md_b))
+        if wpis is not None and wpis["sig"] == sig:
+            _ostatnie[klucz] = wpis
+            pominiete += 1
+            continue
+
         _, ld_lines = parse_kv_file(ld_path)
 
         xy1 = None
@@ -94,34 +152,33 @@ def main():
             if ln.strip().lower().startswith('xy2='):
                 xy2 = find_two_ints(ln)
 
-        a_id = ab_kv.get('obiekt_A')
-        b_id = ab_kv.get('obiekt_B')
         modified = False
 
         # process A
-        if a_id and a_id in id_index:
-            obj_xy = id_index[a_id]["xy"]
-            if obj_xy is not None:
-                if xy1 is None or (xy1[0], xy1[1]) != (obj_xy[0], obj_xy[1]):
-                    ld_lines = set_xy_in_lines_replace_once(ld_lines, 'xy1', obj_xy[0], obj_xy[1])
+        if a_id:
+            xy = obj_xy(md_a)
+            if xy is not None:
+                if xy1 is None or (xy1[0], xy1[1]) != (xy[0], xy[1]):
+                    ld_lines = set_xy_in_lines_replace_once(ld_lines, 'xy1', xy[0], xy[1])
                     modified = True
 
         # process B
-        if b_id and b_id in id_index:
-            obj_xy = id_index[b_id]["xy"]
-            if obj_xy is not None:
-                if xy2 is None or (xy2[0], xy2[1]) != (obj_xy[0], obj_xy[1]):
-                    ld_lines = set_xy_in_lines_replace_once(ld_lines, 'xy2', obj_xy[0], obj_xy[1])
+        if b_id:
+            xy = obj_xy(md_b)
+            if xy is not None:
+                if xy2 is None or (xy2[0], xy2[1]) != (xy[0], xy[1]):
+                    ld_lines = set_xy_in_lines_replace_once(ld_lines, 'xy2', xy[0], xy[1])
                     modified = True
 
         if modified:
             # zapis bez backupu, bez duplikatów
-            ld_path.write_text("\n".join(ld_lines) + "\n", encoding='utf-8')
+            zapisz_atomowo(ld_path, "\n".join(ld_lines) + "\n")
+            zapisane += 1
             print(f"Zapisano {ld_path} (bez backupu).")
-        else:
-            print(f"Brak zmian w {ld_path}.")
+            sig = (sig_ab, _sig(ld_path)) + sig[2:]   # własny zapis nie jest zmianą do sprawdzenia
+        _ostatnie[klucz] = {"ab": sig_ab, "ids": (a_id, b_id), "sig": sig}
 
-    print("Done.")
+    print(f"Done. Linie: {len(pairs)}, zapisane: {zapisane}, bez zmian od ostatniego przebiegu: {pominiete}.")
     return 0
 
 if __name__ == "__main__":
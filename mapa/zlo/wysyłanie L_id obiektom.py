@@ -1,4 +1,10 @@
 from pathlib import Path
+import sys
+
+_MAPA_DIR = str(Path(__file__).resolve().parents[1])  # mapa/ → indeks_id
+if _MAPA_DIR not in sys.path:
+    sys.path.insert(0, _MAPA_DIR)
+from indeks_id import indeks_obiektow, indeks_linii
 
 def resolve_base_dirs():
     # standard opcji "zlo"
@@ -18,27 +24,10 @@ def resolve_base_dirs():
 
 
 def load_obiekty_by_id(obiekty_dir: Path):
-    obiekty_by_id = {}
+    # wspólny indeks id → folder (mapa/indeks_id.py): id.txt czytane tylko gdy się zmieniły
     if not obiekty_dir.is_dir():
-        return obiekty_by_id
-
-    for obj_folder in obiekty_dir.iterdir():
-        if not obj_folder.is_dir():
-            continue
-
-        id_file = obj_folder / "id.txt"
-        if not id_file.is_file():
-            continue
-
-        try:
-            obj_id = id_file.read_text(encoding="utf-8").strip()
-        except Exception:
-            continue
-
-        if obj_id:
-            obiekty_by_id[obj_id] = obj_folder
-
-    return obiekty_by_id
+        return {}
+    return indeks_obiektow(obiekty_dir.parent).wszystkie()
 
 
 def get_obiekt_A_from_ab(ab_file: Path):
@@ -65,6 +54,9 @@ def main():
 
     obiekty_by_id = load_obiekty_by_id(obiekty_dir)
 
+    # obiekt_A → wszystkie jego linie wychodzące (fan-out: kilka L_id w następny.txt)
+    wychodzace = {}
+
     for linia_folder in linie_dir.iterdir():
         if not linia_folder.is_dir():
             continue
@@ -81,28 +73,30 @@ def main():
         # if obiekt_A != "1":
         #     continue
 
-        l_id_file = linia_folder / "L_id.txt"
-        if not l_id_file.is_file():
+        # L_id z indeksu linii (odczyt pliku tylko gdy się zmienił)
+        l_content = indeks_linii(linie_dir.parent).id_folderu(linia_folder)
+        if not l_content:
             # brak L_id.txt – pomijamy
             continue
 
-        try:
-            l_content = l_id_file.read_text(encoding="utf-8")
-        except Exception:
-            continue
+        wychodzace.setdefault(obiekt_A, set()).add(l_content)
 
+    for obiekt_A, l_ids in wychodzace.items():
         obj_folder = obiekty_by_id.get(obiekt_A)
         if not obj_folder:
             # nie znaleziono obiektu z tym id
             continue
 
+        # jedno L_id w linii, rosnąco → ten sam plik przy tym samym zestawie linii
+        tresc = "\n".join(sorted(l_ids, key=lambda v: (0, int(v), "") if v.isdigit() else (1, 0, v)))
         nastepny_file = obj_folder / "następny.txt"
         try:
-            nastepny_file.write_text(l_content, encoding="utf-8")
-            print(f"[OK] {nastepny_file} ← L_id z linii {linia_folder.name} (obiekt_A={obiekt_A})")
+            if nastepny_file.is_file() and nastepny_file.read_text(encoding="utf-8").strip() == tresc:
+                continue
+            nastepny_file.write_text(tresc, encoding="utf-8")
+            print(f"[OK] {nastepny_file} ← L_id {', '.join(tresc.splitlines())} (obiekt_A={obiekt_A})")
         except Exception as e:
             print(f"[ERR] Nie mogę zapisać {nastepny_file}: {e}")
 
-
 if __name__ == "__main__":
     main()
@@ -1,6 +1,10 @@
 import os
 import time
+import signal
 import subprocess
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 
@@ -17,8 +21,157 @@ okno_start = okno_folder / "start.py"
 auto_start_dir = base_dir / "auto_start"
 auto_procesy = []
 
-# lista plików zło
-pliki = sorted([p for p in folder.iterdir() if p.suffix == ".py"])
+# harmonogram zadań zlo
+DOMYSLNY_INTERWAL = 2.5   # s – tyle wynosił cykl starej pętli (5 plików × 0.5 s)
+TICK = 0.1                # s – co ile pętla sprawdza, czy któreś zadanie jest „do zrobienia”
+RESKAN_FOLDERU = 10.0     # s – co ile sprawdzać, czy w zlo/ pojawiły się / zniknęły pliki
+
+_stop = threading.Event()
+
+
+class ZadanieZlo:
+    """
+    Jeden plik z folderu zlo/ załadowany RAZ jako moduł.
+    - main() wołane w wątku puli (bez nowego interpretera)
+    - interwał: atrybut INTERWAL w pliku zadania albo DOMYSLNY_INTERWAL
+    - ochrona przed nakładaniem: kolejny przebieg nie startuje, dopóki poprzedni trwa
+    - brak main() → fallback na stary tryb (osobny proces), ale dalej mierzony
+    """
+
+    def __init__(self, plik: Path):
+        self.plik = plik
+        self.nazwa = plik.name
+        self.modul = None
+        self.main = None
+        self.mtime = None
+        self.interwal = DOMYSLNY_INTERWAL
+        self.nastepny_start = 0.0
+        self.w_toku = False
+        self.przebiegi = 0
+        self.bledy = 0
+        self.pominiete = 0
+        self.zaladuj()
+
+    def zaladuj(self):
+        try:
+            self.mtime = self.plik.stat().st_mtime
+        except OSError:
+            self.mtime = None
+
+        nazwa_modulu = "zlo_" + "".join(c if c.isalnum() else "_" for c in self.plik.stem)
+        try:
+            spec = importlib.util.spec_from_file_location(nazwa_modulu, str(self.plik))
+            modul = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(modul)
+        except Exception as e:
+            print(f"[zlo_manager] {self.nazwa}: import nieudany ({e}) → tryb procesu")
+            self.modul, self.main = None, None
+            return
+
+        self.modul = modul
+        fn = getattr(modul, "main", None)
+        self.main = fn if callable(fn) else None
+        try:
+            self.interwal = max(TICK, float(getattr(modul, "INTERWAL", DOMYSLNY_INTERWAL)))
+        except (TypeError, ValueError):
+            self.interwal = DOMYSLNY_INTERWAL
+
+        tryb = "in-process" if self.main else "proces (brak main())"
+        print(f"[zlo_manager] Załadowano {self.nazwa} → {tryb}, co {self.interwal:.2f}s")
+
+    def przeladuj_jesli_zmieniony(self):
+        try:
+            mtime = self.plik.stat().st_mtime
+        except OSError:
+            return
+        if mtime != self.mtime:
+            print(f"[zlo_manager] {self.nazwa} zmieniony na dysku → przeładowuję")
+            self.zaladuj()
+
+    def uruchom(self):
+        """Wykonuje jeden przebieg zadania. Wołane w wątku puli."""
+        t0 = time.perf_counter()
+        kod = 0
+        try:
+            if self.main is not None:
+                wynik = self.main()
+                kod = wynik if isinstance(wynik, int) else 0
+            else:
+                kod = subprocess.call([sys.executable, str(self.plik)])
+        except SystemExit as e:
+            kod = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            kod = 1
+            print(f"[zlo_manager] {self.nazwa}: wyjątek {type(e).__name__}: {e}")
+        finally:
+            czas_ms = (time.perf_counter() - t0) * 1000.0
+            self.przebiegi += 1
+            if kod != 0:
+                self.bledy += 1
+            print(f"[zlo_manager] {self.nazwa}: kod={kod} czas={czas_ms:.1f} ms")
+            self.w_toku = False
+
+
+def wczytaj_zadania(zadania: dict):
+    """Synchronizuje słownik zadań z zawartością folderu zlo/."""
+    if not folder.exists():
+        return
+    pliki = sorted([p for p in folder.iterdir() if p.suffix == ".py"])
+    obecne = {p.name for p in pliki}
+
+    for nazwa in list(zadania):
+        if nazwa not in obecne and not zadania[nazwa].w_toku:
+            print(f"[zlo_manager] {nazwa} usunięty z zlo/ → wyłączam")
+            del zadania[nazwa]
+
+    for p in pliki:
+        if p.name not in zadania:
+            zadania[p.name] = ZadanieZlo(p)
+
+
+def petla_zadan():
+    zadania = {}
+    wczytaj_zadania(zadania)
+    ostatni_reskan = time.monotonic()
+
+    # przebiegi jednego zadania się nie nakładają, więc wątków potrzeba najwyżej tyle, ile zadań;
+    # pula rośnie razem z listą zadań (stara dokańcza swoje przebiegi i jest zamykana na końcu)
+    pojemnosc = max(1, len(zadania)) + 2
+    pula = ThreadPoolExecutor(max_workers=pojemnosc, thread_name_prefix="zlo")
+    stare_pule = []
+
+    try:
+        while not _stop.is_set():
+            teraz = time.monotonic()
+
+            if teraz - ostatni_reskan >= RESKAN_FOLDERU:
+                wczytaj_zadania(zadania)
+                ostatni_reskan = teraz
+                if len(zadania) + 2 > pojemnosc:
+                    pojemnosc = len(zadania) + 2
+                    print(f"[zlo_manager] {len(zadania)} zadań → pula {pojemnosc} wątków")
+                    stare_pule.append(pula)
+                    pula.shutdown(wait=False)
+                    pula = ThreadPoolExecutor(max_workers=pojemnosc, thread_name_prefix="zlo")
+
+            for zadanie in list(zadania.values()):
+                if teraz < zadanie.nastepny_start:
+                    continue
+                zadanie.nastepny_start = teraz + zadanie.interwal
+
+                if zadanie.w_toku:
+                    zadanie.pominiete += 1
+                    print(f"[zlo_manager] {zadanie.nazwa}: poprzedni przebieg trwa → pomijam")
+                    continue
+
+                zadanie.przeladuj_jesli_zmieniony()
+                zadanie.w_toku = True
+                pula.submit(zadanie.uruchom)
+
+            _stop.wait(TICK)
+    finally:
+        for p in stare_pule + [pula]:
+            p.shutdown(wait=True)
 
 
 def start_auto_start():
@@ -63,17 +216,36 @@ def start_okno_startowe():
     )
 
 
-# --- START SYSTEMU ---
-start_okno_startowe()
-start_auto_start()
+def _na_sigterm(signum, frame):
+    # PLAMA zamyka menedżera przez terminate() → sprzątamy jak po Ctrl+C
+    _stop.set()
+
+
+if __name__ == "__main__":
+    # --- START SYSTEMU ---
+    start_okno_startowe()
+    start_auto_start()
+
+    try:
+        signal.signal(signal.SIGTERM, _na_sigterm)
+    except (ValueError, OSError):
+        pass
+
+    # pula ciepłych interpreterów dla proces.py (opcjonalna, PLAMA_PULA=1)
+    watek_puli = None
+    try:
+        import pula
+        if pula.wlaczona():
+            watek_puli = pula.start_w_tle(_stop)
+    except Exception as e:
+        print(f"[zlo_manager] Pula robotników niedostępna: {e}")
 
-try:
-    while True:
-        for plik in pliki:
-            print(f"[zlo_manager] Odpalam {plik.name}")
-            subprocess.Popen([sys.executable, str(plik)])
-            time.sleep(0.5)
-except KeyboardInterrupt:
+    try:
+        petla_zadan()
+    except KeyboardInterrupt:
+        _stop.set()
     print("[zlo_manager] Zamknięcie mapy")
     stop_auto_start()
+    if watek_puli is not None:
+        watek_puli.join(timeout=3)
     sys.exit(0)